@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Benchmark do parse de uma página de resultado: antes (BeautifulSoup da página
+inteira + cadeia de if/elif) x depois (extracao.py: só a tabela, lxml, mapa de rótulos)
+
+Com --selenium, compara também no Chrome: outerHTML + parse em Python x
+extração dentro da página (SCRIPT_EXTRAIR_TABELA)
+
+Uso:
+    python benchmark_extracao.py [--selenium]
+"""
+
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from bs4 import BeautifulSoup
+
+from extracao import extrair_dados_no_navegador, extrair_dados_tabela, localizar_tabela
+
+LINHAS_RESULTADO = [
+    ('Marca:', 'FIAT'), ('Genérico:', 'UNO'), ('Modelo:', 'UNO MILLE FIRE FLEX'),
+    ('Importado:', 'NÃO'), ('Ano:', '2010'), ('Ano Modelo:', '2011'), ('Cor:', 'Prata'),
+    ('Cilindrada:', '999'), ('Combustível:', 'Alcool / Gasolina'), ('Chassi:', '*****12345'),
+    ('Motor:', '*****678'), ('Passageiros:', '5'), ('UF:', 'MG'), ('Município:', 'Belo Horizonte'),
+]
+
+ESPERADO = {
+    'marca': 'FIAT', 'generico': 'UNO', 'modelo': 'UNO MILLE FIRE FLEX', 'importado': 'NÃO',
+    'ano': '2010', 'ano_modelo': '2011', 'cor': 'Prata', 'cilindrada': '999',
+    'combustivel': 'Alcool / Gasolina', 'chassi': '*****12345', 'motor': '*****678',
+    'passageiros': '5', 'uf': 'MG', 'municipio': 'Belo Horizonte',
+}
+
+
+def gerar_pagina(tamanho_kb: int = 80, com_resultado: bool = True, semente: int = 42) -> str:
+    """Página no formato do placafipe com ~tamanho_kb de marcação em volta da tabela"""
+    aleatorio = random.Random(semente)
+    blocos = []
+    while sum(len(b) for b in blocos) < tamanho_kb * 1024:
+        n = aleatorio.randint(1, 9999)
+        blocos.append(
+            f'<div class="card"><h3>Notícia {n}</h3><p>Texto de exemplo {n} sobre veículos, '
+            f'tabela FIPE e consultas.</p><a href="/noticia/{n}">Leia mais</a>'
+            f'<script>var x{n} = {n};</script></div>\n'
+        )
+    metade = len(blocos) // 2
+    tabela = ''
+    if com_resultado:
+        linhas = ''.join(f'<tr><td><b>{r}</b></td><td>{v}</td></tr>' for r, v in LINHAS_RESULTADO)
+        tabela = f'<table class="fipeTablePriceDetail table">{linhas}</table>'
+    return ('<html><head><title>Placa FIPE</title></head><body><nav>menu</nav>'
+            + ''.join(blocos[:metade]) + tabela + ''.join(blocos[metade:])
+            + '<table class="rodape"><tr><td>Contato</td><td>email</td></tr></table></body></html>')
+
+
+# --- Implementações anteriores (BeautifulSoup da página inteira) ---
+
+def _antes_selenium_requests(html: str) -> dict:
+    soup = BeautifulSoup(html, 'html.parser')
+    tabela = soup.find('table', class_='fipeTablePriceDetail')
+    if not tabela:
+        return {}
+    # _extrair_dados_tabela fazia um segundo parse do trecho
+    soup = BeautifulSoup(str(tabela), 'html.parser')
+    dados = {}
+    nomes = {'Marca': 'marca', 'Genérico': 'generico', 'Modelo': 'modelo', 'Importado': 'importado',
+             'Ano': 'ano', 'Ano Modelo': 'ano_modelo', 'Cor': 'cor', 'Cilindrada': 'cilindrada',
+             'Combustível': 'combustivel', 'Chassi': 'chassi', 'Motor': 'motor',
+             'Passageiros': 'passageiros', 'UF': 'uf', 'Município': 'municipio'}
+    for linha in soup.find_all('tr'):
+        colunas = linha.find_all('td')
+        if len(colunas) >= 2:
+            chave = colunas[0].get_text(strip=True).replace(':', '')
+            if chave in nomes:
+                dados[nomes[chave]] = colunas[1].get_text(strip=True)
+    return dados
+
+
+def _antes_requests(html: str) -> dict:
+    soup = BeautifulSoup(html, 'html.parser')
+    tabela = soup.find('table', class_='table') or soup.find('table')
+    dados = {}
+    mapeamento = {'marca': 'marca', 'marcaplacas mercosul': 'marca', 'genérico': 'generico',
+                  'modelo': 'modelo', 'importado': 'importado', 'ano': 'ano', 'ano modelo': 'ano_modelo',
+                  'cor': 'cor', 'cilindrada': 'cilindrada', 'combustível': 'combustivel',
+                  'chassi': 'chassi', 'motor': 'motor', 'passageiros': 'passageiros', 'uf': 'uf',
+                  'município': 'municipio'}
+    for linha in tabela.find_all('tr') if tabela else []:
+        celulas = linha.find_all(['td', 'th'])
+        if len(celulas) >= 2:
+            label = celulas[0].get_text(strip=True).lower()
+            valor = celulas[1].get_text(strip=True)
+            for key, value in mapeamento.items():
+                if key in label:
+                    dados[value] = valor
+                    break
+    return dados
+
+
+# --- Implementações atuais ---
+
+def _depois_selenium_requests(html: str) -> dict:
+    tabela = localizar_tabela(html, 'fipeTablePriceDetail')
+    return extrair_dados_tabela(tabela, aproximado=False) if tabela else {}
+
+
+def _depois_requests(html: str) -> dict:
+    tabela = localizar_tabela(html, 'table') or localizar_tabela(html)
+    return extrair_dados_tabela(tabela, celulas=('td', 'th')) if tabela else {}
+
+
+def medir(funcao, html: str, repeticoes: int) -> float:
+    """Mediana do tempo por página, em ms"""
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(html)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+    return statistics.median(tempos)
+
+
+def main():
+    print("🧪 BENCHMARK DE EXTRAÇÃO (ms por página, mediana)")
+    print("=" * 70)
+
+    casos = [
+        ("fipeTablePriceDetail (selenium/requests)", _antes_selenium_requests, _depois_selenium_requests),
+        ("tabela genérica (scraper_requests)", _antes_requests, _depois_requests),
+    ]
+
+    for tamanho_kb in (10, 80, 500):
+        html = gerar_pagina(tamanho_kb)
+        repeticoes = 50 if tamanho_kb < 500 else 10
+        print(f"\n📄 Página de {len(html) / 1024:.0f} KB")
+        for nome, antes, depois in casos:
+            # A versão antiga do scraper_requests mapeava 'Ano Modelo' para 'modelo'
+            # (primeira chave contida no rótulo); a nova usa a chave mais longa
+            assert depois(html) == ESPERADO, f"resultado incorreto em {nome}"
+            t_antes = medir(antes, html, repeticoes)
+            t_depois = medir(depois, html, repeticoes)
+            print(f"   {nome:42s} antes {t_antes:8.2f}  depois {t_depois:7.3f}  "
+                  f"({t_antes / t_depois:5.0f}x)")
+
+
+def main_selenium():
+    from selenium.webdriver.common.by import By
+    from driver_pool import PoolChromeDriver
+
+    print("\n🧪 SELENIUM: outerHTML + parse x extração na página (ms por tabela, mediana)")
+    print("=" * 70)
+
+    pool = PoolChromeDriver(tamanho=1)
+    try:
+        with pool.obter_aba() as aba:
+            driver = aba.executar(lambda d: d)
+            for tamanho_kb in (10, 80, 500):
+                with tempfile.NamedTemporaryFile('w', suffix='.html', delete=False, encoding='utf-8') as arquivo:
+                    arquivo.write(gerar_pagina(tamanho_kb))
+                try:
+                    driver.get('file://' + arquivo.name)
+                    tabela = driver.find_element(By.CLASS_NAME, 'fipeTablePriceDetail')
+
+                    def via_outer_html(_):
+                        return extrair_dados_tabela(tabela.get_attribute('outerHTML'), aproximado=False)
+
+                    def via_script(_):
+                        return extrair_dados_no_navegador(driver, tabela, aproximado=False)
+
+                    assert via_outer_html(None) == via_script(None) == ESPERADO
+                    t_html = medir(via_outer_html, None, 30)
+                    t_script = medir(via_script, None, 30)
+                    print(f"   📄 {tamanho_kb:4d} KB   outerHTML {t_html:7.2f}  script {t_script:7.2f}  "
+                          f"({t_html / t_script:4.1f}x)")
+                finally:
+                    os.unlink(arquivo.name)
+    finally:
+        pool.fechar()
+
+
+if __name__ == "__main__":
+    main()
+    if '--selenium' in sys.argv:
+        main_selenium()
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark dos extratores dos scrapers, com limites de regressão
+
+Roda cada extrator sobre um corpus de páginas (pequena, típica e 1 MB; com e
+sem resultado), mede o tempo por página (mediana) e o pico de memória alocada
+por página (tracemalloc), e grava tudo em JSON. Com --base, compara com um JSON
+gravado antes e termina com código 1 se algum caso piorou além do limite.
+
+As páginas vêm de gerar_pagina (benchmark_extracao) com semente fixa, então o
+corpus é o mesmo em qualquer máquina sem precisar de arquivos grandes no git.
+
+Uso:
+    python benchmark_extratores.py --json base.json                # grava a referência
+    python benchmark_extratores.py --base base.json [--json atual.json]
+        [--limite-tempo 0.25] [--limite-memoria 0.10]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+from benchmark_extracao import ESPERADO, LINHAS_RESULTADO, gerar_pagina
+from extracao import localizar_tabela
+
+# (nome, KB de marcação em volta da tabela, com resultado)
+CORPUS = [
+    ('pequena', 2, True), ('pequena_sem_resultado', 2, False),
+    ('tipica', 80, True), ('tipica_sem_resultado', 80, False),
+    ('1mb', 1024, True), ('1mb_sem_resultado', 1024, False),
+]
+
+# Rótulos vistos nas tabelas dos sites (e alguns que não mapeiam para nada)
+ROTULOS = [r for r, _ in LINHAS_RESULTADO] + [
+    'MARCA', 'ano modelo', 'Marca/Modelo:', 'Placa:', 'Renavam:', 'Situação:', 'Contato', '',
+]
+
+# Diferenças abaixo destes valores absolutos nunca contam como regressão (ruído de medição)
+FOLGA_TEMPO_MS = 0.05
+FOLGA_MEMORIA_KB = 4
+
+
+def criar_extratores() -> Dict[str, Callable]:
+    """Extratores reais dos scrapers, cada um recebendo o HTML da página inteira
+    (o _mapear_campo recebe a lista ROTULOS, medida uma vez só)"""
+    os.environ.setdefault('SCRAPING_COOKIES_DIR', '')
+    from scraper_requests import PlacaFipeScraperRequests
+    from scraper_alternative import PlacaFipeScraperAlternative
+
+    requests_ = PlacaFipeScraperRequests()
+    alternativo = PlacaFipeScraperAlternative()
+    extratores = {
+        '_extract_data_from_html': requests_._extract_data_from_html,
+        '_extract_data_generic': alternativo._extract_data_generic,
+    }
+    try:
+        from scraper import PlacaFipeScraper
+        selenium = PlacaFipeScraper()
+
+        def extrair_selenium(html):
+            # Caminho do fallback requests: localizar a fipeTablePriceDetail e extrair
+            tabela = localizar_tabela(html, 'fipeTablePriceDetail')
+            return selenium._extrair_dados_tabela(tabela) if tabela else {}
+
+        extratores['_extrair_dados_tabela'] = extrair_selenium
+    except ImportError:
+        print("⚠️  Selenium não disponível: _extrair_dados_tabela fora do benchmark")
+    extratores['_mapear_campo'] = lambda rotulos: [requests_._mapear_campo(r) for r in rotulos]
+    return extratores
+
+
+def _repeticoes(tamanho: int) -> int:
+    return max(5, min(200, int(2_000_000 / max(tamanho, 1))))
+
+
+def medir(funcao: Callable, html, repeticoes: int) -> Dict:
+    """Mediana do tempo (ms) e pico de memória alocada (KB) por página"""
+    funcao(html)  # aquecimento (imports, caches de regex)
+
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao(html)
+        tempos.append((time.perf_counter() - inicio) * 1000)
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        resultado = funcao(html)
+        pico = tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'tempo_ms': round(statistics.median(tempos), 4),
+        'memoria_kb': round(pico / 1024, 1),
+        'campos': len(resultado),
+    }
+
+
+def executar() -> Dict:
+    extratores = criar_extratores()
+    mapear_campo = extratores.pop('_mapear_campo')
+    resultados = {}
+    with open(os.devnull, 'w') as nulo:
+        resultados['_mapear_campo/rotulos'] = medir(mapear_campo, ROTULOS, 200)
+        resultados['_mapear_campo/rotulos']['pagina_kb'] = 0.0
+        for nome_pagina, tamanho_kb, com_resultado in CORPUS:
+            html = gerar_pagina(tamanho_kb, com_resultado)
+            for nome_extrator, funcao in extratores.items():
+                with contextlib.redirect_stdout(nulo):
+                    medicao = medir(funcao, html, _repeticoes(len(html)))
+                if nome_extrator in ('_extrair_dados_tabela', '_extract_data_from_html') and com_resultado:
+                    with contextlib.redirect_stdout(nulo):
+                        assert funcao(html) == ESPERADO, f"{nome_extrator} incorreto em {nome_pagina}"
+                medicao['pagina_kb'] = round(len(html) / 1024, 1)
+                resultados[f"{nome_extrator}/{nome_pagina}"] = medicao
+    return resultados
+
+
+def comparar(atual: Dict, base: Dict, limite_tempo: float = 0.25,
+             limite_memoria: float = 0.10) -> List[str]:
+    """Casos que pioraram além do limite relativo (e da folga absoluta)"""
+    regressoes = []
+    for caso, medicao in atual.items():
+        anterior = base.get(caso)
+        if not anterior:
+            continue
+        for chave, limite, folga, unidade in (('tempo_ms', limite_tempo, FOLGA_TEMPO_MS, 'ms'),
+                                               ('memoria_kb', limite_memoria, FOLGA_MEMORIA_KB, 'KB')):
+            antes, agora = anterior[chave], medicao[chave]
+            if agora > antes * (1 + limite) and agora - antes > folga:
+                regressoes.append(f"{caso}: {chave} {antes}{unidade} -> {agora}{unidade} "
+                                  f"(+{(agora / antes - 1) * 100 if antes else float('inf'):.0f}%)")
+    return regressoes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Micro-benchmark dos extratores")
+    parser.add_argument('--json', help="Arquivo onde gravar os resultados")
+    parser.add_argument('--base', help="Resultados de referência para detectar regressões")
+    parser.add_argument('--limite-tempo', type=float, default=0.25,
+                        help="Piora relativa tolerada no tempo por página (padrão 25%%)")
+    parser.add_argument('--limite-memoria', type=float, default=0.10,
+                        help="Piora relativa tolerada no pico de memória (padrão 10%%)")
+    args = parser.parse_args()
+
+    print("🧪 MICRO-BENCHMARK DOS EXTRATORES (mediana por página)")
+    print("=" * 78)
+    resultados = executar()
+    base = None
+    if args.base:
+        with open(args.base, encoding='utf-8') as f:
+            base = json.load(f)['resultados']
+
+    print(f"{'Caso':48s} {'KB':>7s} {'tempo':>10s} {'memória':>10s} {'campos':>6s}")
+    for caso, m in resultados.items():
+        linha = f"{caso:48s} {m['pagina_kb']:7.1f} {m['tempo_ms']:8.3f}ms {m['memoria_kb']:8.1f}KB {m['campos']:6d}"
+        if base and caso in base:
+            linha += f"   ({m['tempo_ms'] / max(base[caso]['tempo_ms'], 1e-9):4.2f}x)"
+        print(linha)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({'python': platform.python_version(), 'maquina': platform.machine(),
+                       'resultados': resultados}, f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Resultados gravados em {args.json}")
+
+    if base is not None:
+        regressoes = comparar(resultados, base, args.limite_tempo, args.limite_memoria)
+        if regressoes:
+            print(f"\n❌ {len(regressoes)} regressões acima do limite:")
+            for regressao in regressoes:
+                print(f"   {regressao}")
+            sys.exit(1)
+        print("\n✅ Nenhuma regressão acima do limite")
+
+
+if __name__ == "__main__":
+    main()
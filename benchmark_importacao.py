@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Benchmark de inicialização: tempo de importação (processo novo) da API e do run.py,
+com os backends de scraping carregados sob demanda x importação ansiosa (como antes,
+quando app importava scraper_hybrid e este importava Selenium e os três scrapers)
+
+Uso:
+    python benchmark_importacao.py [repeticoes]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+# Cada cenário roda em um processo Python novo; imprime módulos carregados e se o Selenium veio junto
+CENARIOS = [
+    ("API: import app (antes)",
+     "import app, scraper, scraper_requests, scraper_alternative"),
+    ("API: import app (sob demanda)",
+     "import app"),
+    ("run.py: verificação + app (antes)",
+     "import flask, requests, bs4, selenium; import app, scraper, scraper_requests, scraper_alternative"),
+    ("run.py: verificação + app (sob demanda)",
+     "import run; run.check_dependencies(); import app"),
+    ("Worker: híbrido + 1º backend (antes)",
+     "import scraper, scraper_requests, scraper_alternative, scraper_hybrid; "
+     "scraper.PlacaFipeScraper(); scraper_requests.PlacaFipeScraperRequests(); "
+     "scraper_alternative.PlacaFipeScraperAlternative()"),
+    ("Worker: híbrido + 1º backend (sob demanda)",
+     "import scraper_hybrid; h = scraper_hybrid.PlacaFipeScraperHybrid(); h._scraper_do_metodo('requests')"),
+]
+
+SUFIXO = "; import sys; print('@@', len(sys.modules), 'selenium' in sys.modules)"
+
+
+def medir(codigo: str, repeticoes: int):
+    """Mediana do tempo total do processo (s), módulos carregados e se importou o Selenium"""
+    ambiente = dict(os.environ, SCRAPING_WORKER_EMBUTIDO='false',
+                    SQLALCHEMY_DATABASE_URI='sqlite://', SCRAPING_COOKIES_DIR='')
+    tempos = []
+    modulos, selenium = 0, False
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        saida = subprocess.run([sys.executable, "-c", codigo + SUFIXO], capture_output=True,
+                               text=True, env=ambiente, cwd=os.path.dirname(os.path.abspath(__file__)))
+        tempos.append(time.perf_counter() - inicio)
+        if saida.returncode != 0:
+            raise RuntimeError(saida.stderr[-500:])
+        linha = [l for l in saida.stdout.splitlines() if l.startswith('@@')][-1]
+        _, modulos, selenium = linha.split()
+    return statistics.median(tempos), int(modulos), selenium == 'True'
+
+
+def main():
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"🧪 BENCHMARK DE INICIALIZAÇÃO (mediana de {repeticoes} processos)")
+    print("=" * 78)
+    print(f"{'Cenário':45s} {'tempo':>9s} {'módulos':>8s}  selenium")
+    for nome, codigo in CENARIOS:
+        tempo, modulos, selenium = medir(codigo, repeticoes)
+        print(f"{nome:45s} {tempo * 1000:7.0f}ms {modulos:8d}  {'sim' if selenium else 'não'}")
+
+
+if __name__ == "__main__":
+    main()
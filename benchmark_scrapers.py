@@ -1,13 +1,27 @@
 #!/usr/bin/env python3
 """
 Script para comparar performance entre diferentes métodos de scraping
+
+Uso:
+    python benchmark_scrapers.py              # sites reais, 3 placas
+    python benchmark_scrapers.py --offline    # servidor_replay local, determinístico
+        [--placas 200] [--latencia 0.02] [--taxa-erro 0.02] [--taxa-nao-encontrada 0.1]
+        [--rajada-403 0.01 5] [--semente 42] [--json resultados.json] [--selenium]
 """
 
+import argparse
+import contextlib
+import json
+import os
+import random
+import subprocess
 import time
 import statistics
 from typing import List, Dict
 import sys
 
+import requests
+
 def benchmark_scraper(scraper_class, placas: List[str], nome: str) -> Dict:
     """Executa benchmark de um scraper específico"""
     print(f"\n🚀 Benchmark: {nome}")
@@ -140,8 +154,192 @@ def exibir_resultados(resultados: List[Dict]):
             percentual = (diff / metodos_sucesso[0]['tempo_medio']) * 100
             print(f"   📊 Diferença: +{diff:.2f}s ({percentual:.1f}% mais lento)")
 
+def percentil(valores: List[float], fracao: float) -> float:
+    """Percentil por posição (nearest-rank) de uma lista não vazia"""
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, max(0, int(round(fracao * len(ordenados))) - 1))]
+
+
+def iniciar_servidor_replay(args) -> tuple:
+    """Sobe o servidor_replay em outro processo (não entra no CPU medido); retorna (processo, url)"""
+    comando = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'servidor_replay.py'),
+               '--porta', '0', '--latencia', str(args.latencia),
+               '--variacao-latencia', str(args.variacao_latencia), '--taxa-erro', str(args.taxa_erro),
+               '--taxa-nao-encontrada', str(args.taxa_nao_encontrada),
+               '--rajada-403', str(args.rajada_403[0]), str(int(args.rajada_403[1])),
+               '--semente', str(args.semente)]
+    processo = subprocess.Popen(comando, stdout=subprocess.PIPE, text=True)
+    linha = processo.stdout.readline()
+    if not linha.startswith('URL: '):
+        processo.kill()
+        raise RuntimeError(f"servidor_replay não iniciou: {linha!r}")
+    return processo, linha[5:].strip()
+
+
+def _medir_sequencial(scraper, placas: List[str]) -> List[tuple]:
+    medicoes = []
+    for placa in placas:
+        inicio = time.perf_counter()
+        try:
+            dados = scraper.scraping_placa(placa)
+        except Exception:
+            dados = None
+        medicoes.append((time.perf_counter() - inicio, bool(dados)))
+    return medicoes
+
+
+def _medir_async(scraper, placas: List[str]) -> List[tuple]:
+    medicoes = []
+    original = scraper.scraping_placa_async
+
+    async def medido(sessao, placa):
+        inicio = time.perf_counter()
+        dados = await original(sessao, placa)
+        medicoes.append((time.perf_counter() - inicio, bool(dados)))
+        return dados
+
+    scraper.scraping_placa_async = medido
+    scraper.scraping_multiplas_placas(placas)
+    return medicoes
+
+
+def benchmark_offline(nome: str, criar_scraper, placas: List[str], args, assincrono: bool = False) -> Dict:
+    """Mede um scraper contra um servidor_replay novo (mesmas respostas a cada execução)"""
+    print(f"\n🚀 Benchmark offline: {nome}")
+    processo, url = iniciar_servidor_replay(args)
+    try:
+        saida = contextlib.nullcontext(sys.stdout) if args.verbose else open(os.devnull, 'w')
+        with saida as destino, contextlib.redirect_stdout(destino):
+            scraper = criar_scraper(url)
+            cpu_inicio = time.process_time()
+            inicio = time.perf_counter()
+            medir = _medir_async if assincrono else _medir_sequencial
+            medicoes = medir(scraper, placas)
+            tempo_total = time.perf_counter() - inicio
+            cpu = time.process_time() - cpu_inicio
+            scraper.close()
+        contadores = requests.get(f"{url}/__replay/contadores", timeout=5).json()
+    except Exception as e:
+        print(f"   ❌ Erro: {e}")
+        return {"nome": nome, "status": "erro", "erro": str(e)}
+    finally:
+        processo.terminate()
+        processo.wait()
+
+    latencias = [duracao for duracao, _ in medicoes]
+    sucessos = sum(1 for _, sucesso in medicoes if sucesso)
+    return {
+        "nome": nome,
+        "status": "sucesso",
+        "total_placas": len(placas),
+        "sucessos": sucessos,
+        "taxa_sucesso": sucessos / len(placas) * 100,
+        "placas_por_segundo": len(placas) / tempo_total,
+        "latencia_p50_ms": percentil(latencias, 0.50) * 1000,
+        "latencia_p95_ms": percentil(latencias, 0.95) * 1000,
+        "latencia_p99_ms": percentil(latencias, 0.99) * 1000,
+        "cpu_por_placa_ms": cpu / len(placas) * 1000,
+        "requisicoes_por_placa": contadores.get('requisicoes', 0) / len(placas),
+        "respostas_servidor": contadores,
+    }
+
+
+def exibir_resultados_offline(resultados: List[Dict]):
+    print("\n" + "=" * 104)
+    print(f"{'Scraper':32s} {'placas/s':>9s} {'sucesso':>8s} {'p50':>8s} {'p95':>8s} {'p99':>8s} "
+          f"{'CPU/placa':>10s} {'req/placa':>10s}")
+    print("-" * 104)
+    for r in resultados:
+        if r['status'] != 'sucesso':
+            print(f"{r['nome']:32s} ❌ {r['erro']}")
+            continue
+        print(f"{r['nome']:32s} {r['placas_por_segundo']:9.1f} {r['taxa_sucesso']:7.1f}% "
+              f"{r['latencia_p50_ms']:6.1f}ms {r['latencia_p95_ms']:6.1f}ms {r['latencia_p99_ms']:6.1f}ms "
+              f"{r['cpu_por_placa_ms']:8.2f}ms {r['requisicoes_por_placa']:10.2f}")
+
+
+def main_offline(args):
+    """Benchmark determinístico contra o servidor_replay: sem rede e sem pausas de "comportamento humano\""""
+    # Cookies só em memória: um jar gravado por uma execução não pode mudar a seguinte
+    os.environ['SCRAPING_COOKIES_DIR'] = ''
+    os.environ['SCRAPING_WORKER_EMBUTIDO'] = 'false'
+
+    from scraper_requests import PlacaFipeScraperRequests
+    from scraper_async import PlacaFipeScraperAsync
+    from scraper_alternative import PlacaFipeScraperAlternative
+    from scraper_hybrid import PlacaFipeScraperHybrid
+
+    # As pausas aleatórias simulam uma pessoa; aqui mediriam só o sleep
+    for classe in (PlacaFipeScraperRequests, PlacaFipeScraperAlternative):
+        classe._get_random_delay = lambda self: 0.0
+
+    # Placas no formato antigo (ABC1234), as mesmas para a mesma semente
+    random.seed(args.semente)
+    letras, numeros = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', '0123456789'
+    placas = [''.join(random.choices(letras, k=3)) + ''.join(random.choices(numeros, k=4))
+              for _ in range(args.placas)]
+
+    def criar_hibrido(url):
+        hibrido = PlacaFipeScraperHybrid(opcoes_backends={
+            "requests": {"base_url": url},
+            "alternative": {"base_url": url},
+            "selenium": {"base_url": url},
+        })
+        hibrido.seletor.aleatorio = random.Random(args.semente)
+        hibrido.disponivel["selenium"] = args.selenium
+        return hibrido
+
+    cenarios = [
+        ("Requests + lxml", lambda url: PlacaFipeScraperRequests(base_url=url), False),
+        ("Assíncrono (aiohttp)",
+         lambda url: PlacaFipeScraperAsync(base_url=url, delay_min=0, delay_max=0), True),
+        ("Alternativo (Múltiplos Sites)", lambda url: PlacaFipeScraperAlternative(base_url=url), False),
+        ("Híbrido (Auto)", criar_hibrido, False),
+    ]
+    if args.selenium:
+        from scraper import PlacaFipeScraper
+        cenarios.append(("Selenium WebDriver", lambda url: PlacaFipeScraper(base_url=url), False))
+
+    print("🧪 BENCHMARK OFFLINE DE SCRAPERS (servidor_replay)")
+    print("=" * 50)
+    print(f"📋 {len(placas)} placas (semente {args.semente}), latência {args.latencia * 1000:.0f}ms "
+          f"± {args.variacao_latencia * 1000:.0f}ms, erro {args.taxa_erro:.0%}, "
+          f"não encontradas {args.taxa_nao_encontrada:.0%}, rajadas 403 {args.rajada_403[0]:.0%} "
+          f"x {int(args.rajada_403[1])}")
+
+    resultados = [benchmark_offline(nome, criar, placas, args, assincrono)
+                  for nome, criar, assincrono in cenarios]
+    exibir_resultados_offline(resultados)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({"parametros": vars(args), "placas": placas, "resultados": resultados},
+                      f, ensure_ascii=False, indent=2)
+        print(f"\n💾 Resultados gravados em {args.json}")
+
+
 def main():
     """Função principal do benchmark"""
+    parser = argparse.ArgumentParser(description="Compara a performance dos métodos de scraping")
+    parser.add_argument('--offline', action='store_true',
+                        help="Usa o servidor_replay local em vez dos sites reais")
+    parser.add_argument('--placas', type=int, default=200, help="Placas geradas (modo offline)")
+    parser.add_argument('--latencia', type=float, default=0.02)
+    parser.add_argument('--variacao-latencia', type=float, default=0.01)
+    parser.add_argument('--taxa-erro', type=float, default=0.02)
+    parser.add_argument('--taxa-nao-encontrada', type=float, default=0.1)
+    parser.add_argument('--rajada-403', type=float, nargs=2, default=(0.01, 5),
+                        metavar=('PROBABILIDADE', 'DURACAO'))
+    parser.add_argument('--semente', type=int, default=42)
+    parser.add_argument('--json', help="Arquivo onde gravar os resultados (modo offline)")
+    parser.add_argument('--selenium', action='store_true', help="Inclui o Selenium (requer Chrome)")
+    parser.add_argument('--verbose', action='store_true', help="Mostra o log dos scrapers")
+    args = parser.parse_args()
+
+    if args.offline:
+        main_offline(args)
+        return
+
     print("🧪 BENCHMARK DE SCRAPERS")
     print("=" * 50)
     
@@ -156,7 +354,7 @@ def main():
     # Testar scraper Requests (se disponível)
     try:
         from scraper_requests import PlacaFipeScraperRequests
-        resultado = benchmark_scraper(PlacaFipeScraperRequests, placas_teste, "Requests + BeautifulSoup")
+        resultado = benchmark_scraper(PlacaFipeScraperRequests, placas_teste, "Requests + lxml")
         resultados.append(resultado)
     except ImportError:
         print("⚠️  Scraper Requests não disponível")
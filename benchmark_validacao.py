@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Benchmark da validação de placas em lote (validacao_placas.validar_placas)
+x a validação anterior (PlacaFipeScraper.validar_placa, uma placa por vez,
+regex recompilada a cada chamada e sem normalização nem deduplicação)
+
+Uso:
+    python benchmark_validacao.py [quantidade]
+"""
+
+import random
+import re
+import sys
+import time
+
+from validacao_placas import validar_placas
+
+
+def _antes_validar_placa(placa):
+    padrao_mercosul = r'^[A-Za-z]{3}[0-9][A-Za-z][0-9]{2}$'
+    padrao_antigo = r'^[A-Za-z]{3}[0-9]{4}$'
+    return bool(re.match(padrao_mercosul, placa) or re.match(padrao_antigo, placa))
+
+
+def gerar_placas(quantidade: int, sujas: bool, semente: int = 42):
+    aleatorio = random.Random(semente)
+    letras, numeros = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', '0123456789'
+    placas = []
+    for _ in range(quantidade):
+        placa = (''.join(aleatorio.choices(letras, k=3)) + aleatorio.choice(numeros)
+                 + aleatorio.choice(letras + numeros) + ''.join(aleatorio.choices(numeros, k=2)))
+        if sujas:
+            sorteio = aleatorio.random()
+            if sorteio < 0.2:
+                placa = placa.lower()
+            elif sorteio < 0.3:
+                placa = f" {placa[:3]}-{placa[3:]} "
+            elif sorteio < 0.35:
+                placa = placa[:5]
+            elif sorteio < 0.45 and placas:
+                placa = aleatorio.choice(placas)
+        placas.append(placa)
+    return placas
+
+
+def main():
+    quantidade = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"🧪 BENCHMARK DE VALIDAÇÃO ({quantidade:,} placas)")
+    print("=" * 70)
+    for nome, sujas in (("placas canônicas", False), ("entrada suja", True)):
+        placas = gerar_placas(quantidade, sujas)
+
+        inicio = time.perf_counter()
+        resultado = validar_placas(placas)
+        depois = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        antes_validas = [p for p in placas if _antes_validar_placa(p)]
+        antes = time.perf_counter() - inicio
+
+        print(f"\n📋 {nome}: {len(resultado.validas):,} válidas, {len(resultado.duplicadas):,} duplicadas, "
+              f"{len(resultado.rejeitadas):,} rejeitadas")
+        print(f"   antes  (validar_placa, 1 a 1) {quantidade / antes / 1e6:6.2f} M placas/s "
+              f"({len(antes_validas):,} aceitas, sem normalizar/deduplicar)")
+        print(f"   depois (validar_placas)        {quantidade / depois / 1e6:6.2f} M placas/s "
+              f"({antes / depois:4.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Busca indexada de placas por placa, marca ou modelo
+
+A busca antiga (três LIKE '%termo%' com OR) lê a tabela inteira a cada
+consulta. Aqui:
+
+- Termos com 3+ caracteres: índice de texto por n-gramas, que acha o termo em
+  qualquer posição de placa, marca ou modelo.
+- Prefixo de placa (ABC1, abc-12, ABC1D23): também a faixa no índice único de
+  `placa`, somada ao índice de texto em UNION (um modelo como "UNO1" parece
+  prefixo de placa e continua sendo achado).
+    - MySQL: FULLTEXT ... WITH PARSER ngram em (placa, modelo), mantido pelo
+      próprio InnoDB; a marca, que fica na tabela de nomes, entra como
+      marca_id IN (marcas cujo nome contém o termo).
+    - SQLite: tabela FTS5 com tokenizer trigram (placa_busca) sobre a view
+      placa_busca_conteudo (placa com o nome da marca), mantida por triggers;
+      toda gravação do worker (upsert em lote) ou da importação chega ao
+      índice na mesma transação.
+- Termos curtos, ou banco ainda sem o índice: os mesmos LIKE de antes.
+
+No SQLite a listagem por cursor em ordem de id pede ao FTS5 só as próximas
+linhas (rowid > último ORDER BY rowid LIMIT n), sem materializar todas as que
+casam com o termo; a busca por texto é sempre listada em ordem de id.
+benchmark_busca.py mede o SQLite e, com --url, um MySQL com o índice FULLTEXT;
+só há números do SQLite (páginas < 10ms com 1 milhão de placas): no MySQL o
+alvo de 10ms ainda não foi comprovado.
+
+Uso: python busca_placas.py  (cria ou reconstrói o índice do banco configurado)
+"""
+
+import re
+import time
+from typing import Optional, Tuple
+
+from sqlalchemy import Column, Integer, MetaData, Table, bindparam, inspect, literal_column, text, union
+
+from paginacao import OrdemKeyset
+from validacao_placas import TAMANHO_PLACA
+
+TAMANHO_MINIMO = 3  # trigramas: termos menores não usam o índice
+TABELA_BUSCA = 'placa_busca'
+VIEW_BUSCA = 'placa_busca_conteudo'
+INDICE_MYSQL = 'ft_placa_busca'
+COLUNAS_BUSCA = ('placa', 'marca', 'modelo')
+COLUNAS_FULLTEXT = ('placa', 'modelo')  # MySQL: a marca é buscada na tabela de nomes
+
+# Prefixo de placa com ao menos o primeiro dígito (só letras pode ser marca ou modelo)
+_RE_PREFIXO_PLACA = re.compile(r'[A-Z]{3}[0-9](?:[A-Z0-9][0-9]{0,2})?')
+_SEPARADORES = str.maketrans('', '', ' -.')
+
+# Conteúdo do FTS5: placa com o nome da marca (os nomes nunca mudam, só ganham linhas)
+_VIEW_SQLITE = f"""
+    CREATE VIEW IF NOT EXISTS {VIEW_BUSCA} AS
+    SELECT placa.id AS id, placa.placa AS placa, marca.nome AS marca, placa.modelo AS modelo
+    FROM placa LEFT JOIN marca ON marca.id = placa.marca_id"""
+
+_TRIGGERS_SQLITE = {
+    f'{TABELA_BUSCA}_ai': f"""
+        CREATE TRIGGER IF NOT EXISTS {TABELA_BUSCA}_ai AFTER INSERT ON placa BEGIN
+            INSERT INTO {TABELA_BUSCA}(rowid, placa, marca, modelo)
+            VALUES (new.id, new.placa, (SELECT nome FROM marca WHERE id = new.marca_id), new.modelo);
+        END""",
+    f'{TABELA_BUSCA}_ad': f"""
+        CREATE TRIGGER IF NOT EXISTS {TABELA_BUSCA}_ad AFTER DELETE ON placa BEGIN
+            INSERT INTO {TABELA_BUSCA}({TABELA_BUSCA}, rowid, placa, marca, modelo)
+            VALUES ('delete', old.id, old.placa, (SELECT nome FROM marca WHERE id = old.marca_id), old.modelo);
+        END""",
+    # Só quando muda um campo da busca (status e data_scraping não mexem no índice)
+    f'{TABELA_BUSCA}_au': f"""
+        CREATE TRIGGER IF NOT EXISTS {TABELA_BUSCA}_au AFTER UPDATE OF placa, marca_id, modelo ON placa BEGIN
+            INSERT INTO {TABELA_BUSCA}({TABELA_BUSCA}, rowid, placa, marca, modelo)
+            VALUES ('delete', old.id, old.placa, (SELECT nome FROM marca WHERE id = old.marca_id), old.modelo);
+            INSERT INTO {TABELA_BUSCA}(rowid, placa, marca, modelo)
+            VALUES (new.id, new.placa, (SELECT nome FROM marca WHERE id = new.marca_id), new.modelo);
+        END""",
+}
+
+
+def prefixo_placa(search: str) -> Optional[str]:
+    """Prefixo canônico se o termo é o começo de uma placa ('abc-12' -> 'ABC12')"""
+    termo = search.strip().upper().translate(_SEPARADORES)
+    if len(termo) <= TAMANHO_PLACA and _RE_PREFIXO_PLACA.fullmatch(termo):
+        return termo
+    return None
+
+
+class BuscaPlacas:
+    """Condições de busca sobre o modelo Placa usando o índice de texto do banco"""
+
+    def __init__(self, db, modelo, marcas):
+        """
+        Args:
+            modelo: o modelo Placa
+            marcas: a tabela de nomes de marca (Placa.marca_id)
+        """
+        self.db = db
+        self.modelo = modelo
+        self.marcas = marcas
+        # Só o necessário da tabela FTS5 para montar as consultas
+        self.tabela = Table(TABELA_BUSCA, MetaData(), Column('rowid', Integer, primary_key=True))
+        self._mysql_disponivel = None
+
+    @property
+    def dialeto(self) -> str:
+        return self.db.engine.dialect.name
+
+    def disponivel(self) -> bool:
+        """Se o banco tem o índice de texto completo e em dia"""
+        if self.dialeto == 'sqlite':
+            # Barato e sem cache: um drop_all/create_all de placa leva os triggers junto
+            nomes = {nome for (nome,) in self.db.session.execute(text(
+                "SELECT name FROM sqlite_master WHERE name LIKE :prefixo"), {'prefixo': f'{TABELA_BUSCA}%'})}
+            return {TABELA_BUSCA, VIEW_BUSCA} <= nomes and set(_TRIGGERS_SQLITE) <= nomes
+        if self.dialeto == 'mysql':
+            if self._mysql_disponivel is None:
+                self._mysql_disponivel = bool(self.db.session.execute(text(
+                    "SELECT COUNT(*) FROM information_schema.STATISTICS "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = 'placa' AND INDEX_NAME = :indice"),
+                    {'indice': INDICE_MYSQL}).scalar())
+            return self._mysql_disponivel
+        return False
+
+    def criar_indice(self) -> bool:
+        """Cria o índice de texto (se faltar) e o preenche; retorna se a busca indexada ficou ativa"""
+        inicio = time.time()
+        if 'marca_id' not in {coluna['name'] for coluna in inspect(self.db.engine).get_columns('placa')}:
+            print("⚠️ Tabela placa no formato antigo (texto, sem tabelas de nomes): "
+                  "rode python migracao_placa.py antes de usar esta versão")
+            return False
+        if self.dialeto == 'sqlite':
+            if self.disponivel():
+                return True
+            # Recria do zero: pode haver um índice incompleto ou de antes da tabela de marcas
+            self.remover_indice_sqlite()
+            try:
+                self.db.session.execute(text(
+                    f"CREATE VIRTUAL TABLE {TABELA_BUSCA} USING fts5(placa, marca, modelo, "
+                    f"content='{VIEW_BUSCA}', content_rowid='id', tokenize='trigram')"))
+            except Exception as e:
+                # SQLite sem FTS5 ou anterior à 3.34 (sem o tokenizer trigram)
+                self.db.session.rollback()
+                print(f"⚠️ Busca indexada indisponível neste SQLite: {e}")
+                return False
+            self.db.session.execute(text(_VIEW_SQLITE))
+            for trigger in _TRIGGERS_SQLITE.values():
+                self.db.session.execute(text(trigger))
+            # Tabela de conteúdo externo: reconstrói a partir de placa (triggers podem ter faltado)
+            self.db.session.execute(text(f"INSERT INTO {TABELA_BUSCA}({TABELA_BUSCA}) VALUES ('rebuild')"))
+            self.db.session.commit()
+        elif self.dialeto == 'mysql':
+            if self.disponivel():
+                return True
+            print("🔨 Criando índice FULLTEXT (ngram) em placa; em tabelas grandes pode demorar")
+            self.db.session.execute(text(
+                f"ALTER TABLE placa ADD FULLTEXT INDEX {INDICE_MYSQL} "
+                f"({', '.join(COLUNAS_FULLTEXT)}) WITH PARSER ngram"))
+            self.db.session.commit()
+            self._mysql_disponivel = True
+        else:
+            return False
+        print(f"🔎 Índice de busca pronto em {time.time() - inicio:.1f}s")
+        return True
+
+    def remover_indice_sqlite(self):
+        """Apaga a tabela FTS5, a view e os triggers (sem commit)"""
+        for trigger in _TRIGGERS_SQLITE:
+            self.db.session.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+        self.db.session.execute(text(f"DROP TABLE IF EXISTS {TABELA_BUSCA}"))
+        self.db.session.execute(text(f"DROP VIEW IF EXISTS {VIEW_BUSCA}"))
+
+    def _marcas_com(self, search: str):
+        """marca_id IN (marcas cujo nome contém o termo): a tabela de nomes é pequena"""
+        return self.modelo.marca_id.in_(
+            self.db.select(self.marcas.id).where(self.marcas.nome.contains(search)))
+
+    def _filtro_like(self, search: str):
+        return (
+            self.modelo.placa.contains(search) |
+            self._marcas_com(search) |
+            self.modelo.modelo.contains(search)
+        )
+
+    def _ids_prefixo(self, prefixo: str):
+        """Ids das placas que começam com o prefixo, pela faixa do índice único"""
+        # Placas têm 7 caracteres de [A-Z0-9] e 'Z' é o maior deles: faixa fechada no índice único.
+        # Em subconsulta para o planejador não trocar a faixa por uma varredura
+        # do id quando a página vem com cursor (id > :ultimo ORDER BY id)
+        tabela = self.modelo.__table__.alias('placa_prefixo')
+        coluna = tabela.c.placa
+        return self.db.select(tabela.c.id).where(
+            coluna >= prefixo, coluna <= prefixo.ljust(TAMANHO_PLACA, 'Z'), coluna.like(f'{prefixo}%'))
+
+    def _termo_indexado(self, search: str) -> Optional[str]:
+        """O termo como frase da consulta de texto, ou None se a busca não usa o índice"""
+        termo = search.strip()
+        if len(termo) < TAMANHO_MINIMO or not self.disponivel():
+            return None
+        if self.dialeto == 'sqlite':
+            return '"' + termo.replace('"', '""') + '"'
+        return '"' + termo.replace('"', ' ') + '"'
+
+    def _match(self, frase: str, tabela: str = 'placa'):
+        """Condição de texto sobre a tabela placa (ou o alias `tabela` dela)"""
+        if self.dialeto == 'mysql':
+            return text(f"MATCH ({', '.join(f'{tabela}.{c}' for c in COLUNAS_FULLTEXT)}) "
+                        f"AGAINST (:frase_busca IN BOOLEAN MODE)").bindparams(frase_busca=frase)
+        ids = self.db.select(self.tabela.c.rowid).where(
+            literal_column(TABELA_BUSCA).op('MATCH')(bindparam('frase_busca', frase)))
+        return self.modelo.id.in_(ids)
+
+    def condicao(self, search: str):
+        """Condição WHERE da busca (listagem por página, totais e exportação)"""
+        prefixo = prefixo_placa(search)
+        frase = self._termo_indexado(search)
+        if frase is None:
+            if prefixo:
+                return self._filtro_like(search) | self.modelo.id.in_(self._ids_prefixo(prefixo))
+            return self._filtro_like(search)
+
+        consultas = [self._ids_prefixo(prefixo)] if prefixo else []
+        if self.dialeto == 'mysql':
+            # Ids resolvidos antes: sem marca com o termo nem prefixo, fica só o MATCH no índice FULLTEXT
+            marcas = self.db.session.execute(self.db.select(self.marcas.id).where(
+                self.marcas.nome.contains(search.strip()))).scalars().all()
+            if not consultas and not marcas:
+                return self._match(frase)
+            tabela = self.modelo.__table__.alias('placa_texto')
+            consultas.append(self.db.select(tabela.c.id).where(self._match(frase, 'placa_texto')))
+            if marcas:
+                consultas.append(self.db.select(tabela.c.id).where(tabela.c.marca_id.in_(marcas)))
+        else:
+            consultas.append(self.db.select(self.tabela.c.rowid.label('id')).where(
+                literal_column(TABELA_BUSCA).op('MATCH')(bindparam('frase_busca', frase))))
+        return self._ids_em_uniao(consultas)
+
+    def _ids_em_uniao(self, consultas):
+        """placa.id IN (consultas de ids), juntas em UNION quando são mais de uma
+
+        Com OR entre as condições o MySQL não usa o índice FULLTEXT (index merge
+        não junta FULLTEXT com outro índice) e varre a tabela. A UNION fica numa
+        tabela derivada para ser materializada uma vez, e não reavaliada a cada
+        linha de placa como uma subconsulta IN com UNION.
+        """
+        if len(consultas) == 1:
+            return self.modelo.id.in_(consultas[0])
+        ids = union(*consultas).subquery('ids_busca')
+        return self.modelo.id.in_(self.db.select(ids.c.id))
+
+    def contar(self, search: str) -> int:
+        """Total da busca; no SQLite o COUNT sai direto do FTS5, sem passar por placa"""
+        frase = None if prefixo_placa(search) else self._termo_indexado(search)
+        if frase is not None and self.dialeto == 'sqlite':
+            consulta = self.db.select(self.db.func.count()).select_from(self.tabela).where(
+                literal_column(TABELA_BUSCA).op('MATCH')(bindparam('frase_busca', frase)))
+        else:
+            consulta = self.db.select(self.db.func.count(self.modelo.id)).where(self.condicao(search))
+        return self.db.session.execute(consulta).scalar()
+
+    def consulta_keyset(self, consulta, search: str, ordem: OrdemKeyset) -> Tuple[object, OrdemKeyset]:
+        """(consulta filtrada, ordem) para a paginação por cursor
+
+        No SQLite, em ordem de id, a consulta passa a andar pelo rowid do FTS5:
+        o cursor e o LIMIT chegam ao índice de texto e cada página custa o
+        mesmo, seja o termo raro ou presente em metade da tabela.
+
+        Busca pelo índice de texto é sempre em ordem de id: em outra ordem
+        (data_scraping) o banco ordena todas as linhas que casam com o termo a
+        cada página, centenas de ms para um termo comum. A ordem devolvida
+        ('ordem' na resposta da API) mostra a troca.
+        """
+        frase = self._termo_indexado(search)
+        if frase is not None and ordem.colunas != [self.modelo.id]:
+            ordem = OrdemKeyset('id', [self.modelo.id])
+        if frase is None or prefixo_placa(search) or self.dialeto != 'sqlite':
+            return consulta.filter(self.condicao(search)), ordem
+
+        rowid = self.tabela.c.rowid
+        consulta = consulta.join(self.tabela, rowid == self.modelo.id).filter(
+            literal_column(TABELA_BUSCA).op('MATCH')(bindparam('frase_busca', frase)))
+        return consulta, OrdemKeyset(ordem.nome, [rowid], ordem.descendente, chaves=['id'])
+
+
+if __name__ == "__main__":
+    from app import app, db, busca_placas
+
+    with app.app_context():
+        db.create_all()
+        if not busca_placas.criar_indice():
+            print("❌ Este banco não tem índice de texto; a busca continua com LIKE")
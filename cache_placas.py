@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Cache de consultas de placas na frente do scraper
+
+Antes de ir à rede, verifica se a placa já tem dados recentes (data_scraping
+dentro do TTL). Um LRU em memória evita até a consulta ao banco para placas
+repetidas em um mesmo lote.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+
+
+def _agora_gmt3() -> datetime:
+    # Mesmo relógio usado em data_scraping (GMT-3, sem fuso depois de gravado)
+    return datetime.now(timezone(timedelta(hours=-3))).replace(tzinfo=None)
+
+
+class CacheConsultaPlacas:
+    """Scraper com cache de dados frescos (LRU em memória + banco)"""
+
+    def __init__(self, scraper, buscar_no_banco: Callable[[str, datetime], Optional[Dict[str, str]]],
+                 ttl_horas: Optional[float] = None, tamanho_lru: int = 10000):
+        """
+        Args:
+            scraper: objeto com scraping_placa(placa), usado nos misses
+            buscar_no_banco: função (placa, limite) que retorna os dados gravados
+                com data_scraping >= limite, ou None
+            ttl_horas: validade dos dados; padrão SCRAPING_CACHE_TTL_HORAS (24). 0 desliga o cache
+            tamanho_lru: placas mantidas em memória
+        """
+        self.scraper = scraper
+        self.buscar_no_banco = buscar_no_banco
+        if ttl_horas is None:
+            ttl_horas = float(os.getenv('SCRAPING_CACHE_TTL_HORAS', 24))
+        self.ttl = timedelta(hours=ttl_horas)
+        self.tamanho_lru = tamanho_lru
+
+        self._lru: "OrderedDict[str, tuple]" = OrderedDict()  # placa -> (dados, obtido_em)
+        self._lock = threading.Lock()
+
+        # Origem da última resposta: 'memoria', 'banco' ou 'rede'
+        self.ultima_origem = None
+        self.hits_memoria = 0
+        self.hits_banco = 0
+        self.misses = 0
+
+    @property
+    def ativo(self) -> bool:
+        return self.ttl > timedelta(0)
+
+    def _guardar(self, placa: str, dados: Dict[str, str], obtido_em: datetime):
+        with self._lock:
+            self._lru[placa] = (dados, obtido_em)
+            self._lru.move_to_end(placa)
+            while len(self._lru) > self.tamanho_lru:
+                self._lru.popitem(last=False)
+
+    def _buscar_memoria(self, placa: str, limite: datetime) -> Optional[Dict[str, str]]:
+        with self._lock:
+            entrada = self._lru.get(placa)
+            if entrada is None:
+                return None
+            dados, obtido_em = entrada
+            if obtido_em < limite:
+                del self._lru[placa]
+                return None
+            self._lru.move_to_end(placa)
+            return dict(dados)
+
+    def scraping_placa(self, placa: str) -> Optional[Dict[str, str]]:
+        """Retorna dados frescos do cache ou faz o scraping"""
+        if self.ativo:
+            limite = _agora_gmt3() - self.ttl
+
+            dados = self._buscar_memoria(placa, limite)
+            if dados:
+                self.hits_memoria += 1
+                self.ultima_origem = 'memoria'
+                print(f"   ⚡ {placa}: dados recentes em memória, sem consulta")
+                return dados
+
+            dados = self.buscar_no_banco(placa, limite)
+            if dados:
+                self.hits_banco += 1
+                self.ultima_origem = 'banco'
+                self._guardar(placa, dados, _agora_gmt3())
+                print(f"   ⚡ {placa}: dados recentes no banco, sem consulta")
+                return dict(dados)
+
+        self.misses += 1
+        self.ultima_origem = 'rede'
+        dados = self.scraper.scraping_placa(placa)
+        if dados and self.ativo:
+            self._guardar(placa, dict(dados), _agora_gmt3())
+        return dados
+
+    def esquecer(self, placa: str):
+        """Remove a placa do LRU (ex.: quando os dados dela mudam por fora)"""
+        with self._lock:
+            self._lru.pop(placa, None)
+
+    def estatisticas(self) -> Dict[str, float]:
+        """Contadores de hits e misses"""
+        consultas = self.hits_memoria + self.hits_banco + self.misses
+        hits = self.hits_memoria + self.hits_banco
+        return {
+            "hits_memoria": self.hits_memoria,
+            "hits_banco": self.hits_banco,
+            "misses": self.misses,
+            "taxa_acerto": round(hits / consultas, 4) if consultas else 0.0,
+            "placas_em_memoria": len(self._lru),
+            "ttl_horas": self.ttl.total_seconds() / 3600,
+        }
+
+    def get_status(self) -> Dict:
+        """Status do scraper interno acrescido das estatísticas do cache"""
+        status = self.scraper.get_status() if hasattr(self.scraper, 'get_status') else {}
+        status["cache"] = self.estatisticas()
+        return status
+
+    def close(self):
+        """Fecha o scraper interno"""
+        if hasattr(self.scraper, 'close'):
+            self.scraper.close()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Cache das respostas JSON da listagem e dos detalhes de placas
+
+O painel de gestão recarrega /api/placas e abre /api/placa/<id> o tempo todo;
+com o cache, uma mesma requisição (rota + parâmetros) é respondida da memória
+até as placas mudarem, e com ETag/Last-Modified o navegador revalida a cópia
+dele: se nada mudou a resposta é um 304 sem corpo e sem consulta ao banco.
+
+A invalidação acontece no commit de quem grava:
+- a listagem depende de todas as placas: guarda a versão dos dados com que foi
+  montada e deixa de valer quando qualquer placa é gravada;
+- o detalhe de uma placa só sai do cache quando essa placa é gravada.
+Gravações pelo ORM (objetos Placa novos, alterados ou removidos, em qualquer
+rota ou script) são vistas por acompanhar(); comandos do Core, como o upsert
+do GravadorLotes e a cópia da migração, chamam invalidar_placas diretamente.
+
+Por padrão o cache fica na memória do processo, o que basta com o worker
+embutido. Com workers em outros processos (python worker.py), use o Redis
+(CACHE_RESPOSTAS_REDIS_URL) para que as gravações deles cheguem ao cache do
+Flask; sem ele, CACHE_RESPOSTAS_TTL limita quanto tempo uma resposta pode ficar
+velha.
+"""
+
+import functools
+import hashlib
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlencode
+
+from flask import Response, current_app, request
+from sqlalchemy import event, inspect
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+class CacheRespostas:
+    """Respostas por rota e parâmetros, invalidadas pelas gravações de placas"""
+
+    def __init__(self, ttl: float = 300, maximo: int = 1000, redis_url: Optional[str] = None,
+                 prefixo: str = 'plate:respostas'):
+        """
+        Args:
+            ttl: segundos máximos de uma resposta no cache, mesmo sem gravações. 0 desliga o cache
+            maximo: respostas guardadas em memória (as menos usadas saem)
+            redis_url: cache compartilhado entre processos (ex.: redis://localhost:6379/0)
+            prefixo: prefixo das chaves no Redis
+        """
+        self.ttl = ttl
+        self.maximo = maximo
+        self.prefixo = prefixo
+        self._redis = None
+        if redis_url:
+            if REDIS_AVAILABLE:
+                self._redis = redis.Redis.from_url(redis_url)
+            else:
+                print("⚠️ CACHE_RESPOSTAS_REDIS_URL definido mas o pacote redis não está instalado; "
+                      "cache de respostas só em memória")
+
+        self._respostas: 'OrderedDict[str, dict]' = OrderedDict()
+        self._por_placa: Dict[str, set] = defaultdict(set)
+        self._versao = 0
+        self._versao_vista = 0
+        self._ao_mudar: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidacoes = 0
+
+    @classmethod
+    def do_ambiente(cls) -> 'CacheRespostas':
+        """Cria o cache com CACHE_RESPOSTAS_TTL, CACHE_RESPOSTAS_MAXIMO e CACHE_RESPOSTAS_REDIS_URL"""
+        return cls(ttl=float(os.getenv('CACHE_RESPOSTAS_TTL', 300)),
+                   maximo=int(os.getenv('CACHE_RESPOSTAS_MAXIMO', 1000)),
+                   redis_url=os.getenv('CACHE_RESPOSTAS_REDIS_URL') or None)
+
+    @property
+    def ativo(self) -> bool:
+        return self.ttl > 0
+
+    @property
+    def compartilhado(self) -> bool:
+        return self._redis is not None
+
+    def ao_mudar(self, funcao: Callable[[], None]):
+        """Registra uma função chamada quando este processo percebe placas gravadas
+
+        Com o Redis, percebe também as gravações de outros processos (na próxima
+        consulta ao cache). Ex.: vencer os totais da listagem.
+        """
+        self._ao_mudar.append(funcao)
+
+    def _chave_redis(self, *partes: str) -> str:
+        return ':'.join((self.prefixo,) + partes)
+
+    def _observar_versao(self, versao: int):
+        with self._lock:
+            mudou = versao != self._versao_vista
+            self._versao_vista = versao
+        if mudou:
+            for funcao in self._ao_mudar:
+                funcao()
+
+    def versao(self) -> int:
+        """Versão atual das placas (sobe a cada gravação)"""
+        if self._redis is None:
+            return self._versao
+        try:
+            versao = int(self._redis.get(self._chave_redis('versao')) or 0)
+        except redis.RedisError as e:
+            print(f"⚠️ Redis indisponível no cache de respostas: {e}")
+            return -1
+        self._observar_versao(versao)
+        return versao
+
+    def obter(self, chave: str) -> Optional[dict]:
+        """Resposta guardada e ainda válida, ou None"""
+        if not self.ativo:
+            return None
+        if self._redis is None:
+            with self._lock:
+                entrada = self._respostas.get(chave)
+                valida = entrada is not None and time.monotonic() - entrada['guardada_em'] < self.ttl and \
+                    (entrada['placa'] is not None or entrada['versao'] == self._versao)
+                if valida:
+                    self._respostas.move_to_end(chave)
+                    self.hits += 1
+                    return entrada
+                self.misses += 1
+                return None
+
+        try:
+            with self._redis.pipeline(transaction=False) as pipe:
+                pipe.get(self._chave_redis('versao'))
+                pipe.hgetall(self._chave_redis('r', chave))
+                versao, campos = pipe.execute()
+        except redis.RedisError as e:
+            print(f"⚠️ Redis indisponível no cache de respostas: {e}")
+            return None
+        versao = int(versao or 0)
+        self._observar_versao(versao)
+        if campos:
+            entrada = {
+                'corpo': campos[b'corpo'],
+                'etag': campos[b'etag'].decode(),
+                'modificado': int(campos[b'modificado']),
+                'versao': int(campos[b'versao']),
+                'placa': campos[b'placa'].decode() or None,
+            }
+            if entrada['placa'] is not None or entrada['versao'] == versao:
+                self.hits += 1
+                return entrada
+        self.misses += 1
+        return None
+
+    def guardar(self, chave: str, corpo: bytes, versao: int, placa: Optional[str] = None) -> dict:
+        """Guarda uma resposta montada com os dados da `versao` (lida antes da consulta ao banco)
+
+        Sem `placa`, a resposta vale até qualquer placa ser gravada; com ela,
+        até essa placa ser gravada. Se houve gravação durante a montagem, a
+        resposta é devolvida mas não fica no cache.
+        """
+        etag = hashlib.blake2b(corpo, digest_size=12).hexdigest()
+        entrada = {'corpo': corpo, 'etag': etag, 'modificado': int(time.time()),
+                   'versao': versao, 'placa': placa, 'guardada_em': time.monotonic()}
+        if not self.ativo or versao < 0:
+            return entrada
+
+        if self._redis is None:
+            with self._lock:
+                anterior = self._respostas.get(chave)
+                self._manter_data(entrada, anterior)
+                if versao != self._versao:
+                    return entrada
+                self._respostas[chave] = entrada
+                self._respostas.move_to_end(chave)
+                if placa is not None:
+                    self._por_placa[placa].add(chave)
+                while len(self._respostas) > self.maximo:
+                    removida, antiga = self._respostas.popitem(last=False)
+                    chaves = self._por_placa.get(antiga['placa'])
+                    if chaves is not None:
+                        chaves.discard(removida)
+                        if not chaves:
+                            del self._por_placa[antiga['placa']]
+            return entrada
+
+        chave_redis = self._chave_redis('r', chave)
+        try:
+            etag_anterior, modificado_anterior = self._redis.hmget(chave_redis, 'etag', 'modificado')
+            if etag_anterior:
+                self._manter_data(entrada, {'etag': etag_anterior.decode(),
+                                            'modificado': int(modificado_anterior)})
+            if self.versao() != versao:
+                return entrada
+            with self._redis.pipeline(transaction=False) as pipe:
+                pipe.hset(chave_redis, mapping={'corpo': corpo, 'etag': etag, 'modificado': entrada['modificado'],
+                                                'versao': versao, 'placa': placa or ''})
+                pipe.expire(chave_redis, int(self.ttl))
+                if placa is not None:
+                    pipe.sadd(self._chave_redis('p', placa), chave)
+                    pipe.expire(self._chave_redis('p', placa), int(self.ttl))
+                pipe.execute()
+        except redis.RedisError as e:
+            print(f"⚠️ Redis indisponível no cache de respostas: {e}")
+        return entrada
+
+    @staticmethod
+    def _manter_data(entrada: dict, anterior: Optional[dict]):
+        """Last-Modified só avança quando o conteúdo muda (e sempre avança quando muda)"""
+        if anterior is None:
+            return
+        if anterior['etag'] == entrada['etag']:
+            entrada['modificado'] = anterior['modificado']
+        else:
+            entrada['modificado'] = max(entrada['modificado'], anterior['modificado'] + 1)
+
+    def invalidar_placas(self, placas: Iterable[str]):
+        """Placas gravadas: vence a listagem e os detalhes dessas placas"""
+        placas = list(placas)
+        if self._redis is None:
+            with self._lock:
+                self._versao += 1
+                for placa in placas:
+                    for chave in self._por_placa.pop(placa, ()):
+                        self._respostas.pop(chave, None)
+            self.invalidacoes += 1
+            self._observar_versao(self._versao)
+            return
+
+        try:
+            with self._redis.pipeline(transaction=False) as pipe:
+                pipe.incr(self._chave_redis('versao'))
+                for placa in placas:
+                    pipe.smembers(self._chave_redis('p', placa))
+                versao, *conjuntos = pipe.execute()
+            chaves = [self._chave_redis('r', chave.decode()) for conjunto in conjuntos for chave in conjunto]
+            chaves += [self._chave_redis('p', placa) for placa in placas]
+            if chaves:
+                self._redis.delete(*chaves)
+        except redis.RedisError as e:
+            # Sem invalidar, as respostas ficam velhas até vencer o CACHE_RESPOSTAS_TTL
+            print(f"⚠️ Erro ao invalidar o cache de respostas no Redis: {e}")
+            return
+        self.invalidacoes += 1
+        self._observar_versao(int(versao))
+
+    def acompanhar(self, sessao, modelo, campo: str = 'placa'):
+        """Invalida as placas gravadas pelo ORM no commit das sessões de `sessao`
+
+        Args:
+            sessao: sessão (ou scoped_session, ex.: db.session) cujos commits são observados
+            modelo: classe mapeada das placas (Placa)
+            campo: atributo com a placa, chave dos detalhes em cache
+        """
+        chave = self._chave_redis('alteradas')
+
+        def apos_flush(session, contexto):
+            alteradas = session.info.setdefault(chave, set())
+            for objeto in itertools.chain(session.new, session.dirty, session.deleted):
+                if not isinstance(objeto, modelo):
+                    continue
+                if objeto in session.dirty and not session.is_modified(objeto):
+                    continue
+                # Placa renomeada: o detalhe em cache está com o valor antigo
+                historico = inspect(objeto).attrs[campo].history
+                alteradas.update(valor for valor in itertools.chain(historico.deleted, historico.unchanged,
+                                                                   historico.added) if valor)
+
+        def apos_commit(session):
+            alteradas = session.info.pop(chave, None)
+            if alteradas:
+                self.invalidar_placas(alteradas)
+
+        def apos_rollback(session):
+            session.info.pop(chave, None)
+
+        event.listen(sessao, 'after_flush', apos_flush)
+        event.listen(sessao, 'after_commit', apos_commit)
+        event.listen(sessao, 'after_rollback', apos_rollback)
+
+    def limpar(self):
+        """Esquece todas as respostas guardadas neste processo (o Redis vence por versão e TTL)"""
+        with self._lock:
+            self._respostas.clear()
+            self._por_placa.clear()
+
+    def estatisticas(self) -> Dict[str, float]:
+        """Contadores de hits e misses"""
+        consultas = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "taxa_acerto": round(self.hits / consultas, 4) if consultas else 0.0,
+            "invalidacoes": self.invalidacoes,
+            "respostas_em_memoria": len(self._respostas),
+            "compartilhado": self.compartilhado,
+            "ttl_segundos": self.ttl,
+        }
+
+    def em_cache(self, view):
+        """Decorator de rota Flask que devolve JSON: resposta do cache com ETag/Last-Modified
+
+        Só respostas 200 são guardadas. Uma resposta com "total_aproximado"
+        verdadeiro não fica no cache (o total exato chega logo depois); uma com o
+        campo "placa" é o detalhe dessa placa e vale até ela ser gravada.
+        """
+        @functools.wraps(view)
+        def responder(*args, **kwargs):
+            if not self.ativo:
+                return view(*args, **kwargs)
+
+            chave = request.path + '?' + urlencode(sorted(request.args.items(multi=True)))
+            entrada = self.obter(chave)
+            if entrada is None:
+                versao = self.versao()
+                resposta = current_app.make_response(view(*args, **kwargs))
+                if resposta.status_code != 200 or not resposta.is_json:
+                    return resposta
+                dados = resposta.get_json()
+                if not isinstance(dados, dict):
+                    dados = {}
+                if dados.get('total_aproximado'):
+                    return resposta
+                placa = dados.get('placa') if isinstance(dados.get('placa'), str) else None
+                entrada = self.guardar(chave, resposta.get_data(), versao, placa)
+
+            resposta = Response(entrada['corpo'], mimetype='application/json')
+            resposta.set_etag(entrada['etag'])
+            resposta.last_modified = datetime.fromtimestamp(entrada['modificado'], timezone.utc)
+            # O navegador guarda a resposta mas revalida sempre (If-None-Match -> 304)
+            resposta.cache_control.no_cache = True
+            return resposta.make_conditional(request)
+
+        return responder
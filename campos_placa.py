@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Conversão dos campos do scraping para as colunas tipadas de Placa
+
+Os scrapers devolvem tudo como texto ('2011', '5', 'mg'); no banco anos e
+passageiros são SMALLINT e a UF é CHAR(2). Valores que não se encaixam
+(estimativas como '2000-2018', UF inventada a partir da placa) viram NULL em
+vez de um dado errado. As mesmas regras existem em SQL em migracao_placa.py,
+para converter as linhas antigas.
+"""
+
+import re
+from typing import Optional
+
+UFS = ('AC', 'AL', 'AM', 'AP', 'BA', 'CE', 'DF', 'ES', 'GO', 'MA', 'MG', 'MS', 'MT', 'PA',
+       'PB', 'PE', 'PI', 'PR', 'RJ', 'RN', 'RO', 'RR', 'RS', 'SC', 'SE', 'SP', 'TO')
+
+TAMANHO_NOME = 100  # marca.nome / combustivel.nome
+
+# Ano com 4 dígitos no começo; '2011/2012' -> 2011, mas um intervalo ('2000-2018') não
+_RE_ANO = re.compile(r'([12][0-9]{3})(?:[^0-9-]|$)')
+_RE_INTEIRO_PEQUENO = re.compile(r'([0-9]{1,3})(?:[^0-9]|$)')
+
+
+def ano_inteiro(valor) -> Optional[int]:
+    """Ano como inteiro (1000-2999), ou None"""
+    if valor is None or isinstance(valor, bool):
+        return None
+    if isinstance(valor, int):
+        return valor if 1000 <= valor <= 2999 else None
+    encontrado = _RE_ANO.match(str(valor).strip())
+    return int(encontrado.group(1)) if encontrado else None
+
+
+def inteiro_pequeno(valor) -> Optional[int]:
+    """Quantidade de 1 a 999 ('5', '5 lugares'), ou None"""
+    if valor is None or isinstance(valor, bool):
+        return None
+    if isinstance(valor, int):
+        return valor if 1 <= valor <= 999 else None
+    encontrado = _RE_INTEIRO_PEQUENO.match(str(valor).strip())
+    numero = int(encontrado.group(1)) if encontrado else 0
+    return numero if numero >= 1 else None
+
+
+def sigla_uf(valor) -> Optional[str]:
+    """Sigla de uma das 27 UFs ('mg ' -> 'MG'), ou None"""
+    if not isinstance(valor, str):
+        return None
+    sigla = valor.strip().upper()
+    return sigla if sigla in UFS else None
+
+
+def nome_tabela(valor) -> Optional[str]:
+    """Nome de marca ou combustível como é gravado na tabela de nomes, ou None se vazio"""
+    if not isinstance(valor, str):
+        return None
+    nome = valor.strip()[:TAMANHO_NOME]
+    return nome or None
+
+
+# Coluna -> conversão aplicada antes de gravar
+CONVERSOES = {
+    'ano': ano_inteiro,
+    'ano_modelo': ano_inteiro,
+    'passageiros': inteiro_pequeno,
+    'uf': sigla_uf,
+}
+
+
+def converter_campos(dados: dict) -> dict:
+    """Cópia de `dados` com os campos tipados já convertidos"""
+    return {campo: CONVERSOES[campo](valor) if campo in CONVERSOES else valor
+            for campo, valor in dados.items()}
@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+"""
+Configuração comum dos testes (pytest)
+
+Os testes que importam o app usam um banco SQLite temporário e não sobem o
+worker embutido. O app lê a configuração quando é importado, então o ambiente
+é ajustado em pytest_configure, antes de o pytest importar os módulos de teste.
+Por isso esses testes rodam só pelo pytest (python -m pytest test_worker.py):
+executados como script, apagariam as tabelas do banco configurado.
+"""
+
+import os
+import tempfile
+
+
+def pytest_configure(config):
+    # Sobrescreve um SQLALCHEMY_DATABASE_URI do ambiente: os testes fazem drop_all
+    os.environ['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///' + os.path.join(tempfile.mkdtemp(), 'testes.db')
+    os.environ['SCRAPING_WORKER_EMBUTIDO'] = 'false'
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Preparação de sessão (cookies da página inicial) com cache em disco
+
+Os scrapers carregavam a página inicial antes de cada placa só para obter
+cookies. O InicializadorSessao faz isso uma vez, guarda até quando os cookies
+valem (menor expiração entre eles, ou SCRAPING_COOKIES_VALIDADE para cookies
+de sessão) e grava o jar em disco, para que um worker reiniciado não precise
+preparar de novo. A sessão só é preparada outra vez quando expira ou quando o
+site responde 403 (invalidar()).
+"""
+
+import json
+import os
+import threading
+import time
+from typing import List, Optional
+
+import requests
+
+
+class InicializadorSessao:
+    """Mantém os cookies de uma sessão requests preparados"""
+
+    def __init__(self, sessao: requests.Session, urls: List[str], nome: str,
+                 diretorio: Optional[str] = None, validade_padrao: Optional[float] = None):
+        """
+        Args:
+            sessao: sessão cujos cookies são preparados
+            urls: páginas iniciais tentadas, em ordem, até uma responder 200
+            nome: nome do arquivo do jar em disco (um por scraper)
+            diretorio: onde gravar os jars (SCRAPING_COOKIES_DIR, padrão .cookies); '' desliga o disco
+            validade_padrao: segundos de validade quando os cookies não informam expiração
+                (SCRAPING_COOKIES_VALIDADE, padrão 1800)
+        """
+        self.sessao = sessao
+        self.urls = urls
+        if diretorio is None:
+            diretorio = os.getenv('SCRAPING_COOKIES_DIR', '.cookies')
+        self.arquivo = os.path.join(diretorio, f"{nome}.json") if diretorio else None
+        if validade_padrao is None:
+            validade_padrao = float(os.getenv('SCRAPING_COOKIES_VALIDADE', 1800))
+        self.validade_padrao = validade_padrao
+
+        self.expira_em = 0.0  # time.time() até quando os cookies valem
+        self._lock = threading.Lock()
+
+        # Status HTTP da última página inicial carregada (ou 'timeout')
+        self.ultimo_status = None
+        self.preparacoes = 0
+        self.reaproveitamentos = 0
+
+        self._carregar()
+
+    @property
+    def valido(self) -> bool:
+        return time.time() < self.expira_em
+
+    def _calcular_expiracao(self, agora: float) -> float:
+        expiracao = agora + self.validade_padrao
+        for cookie in self.sessao.cookies:
+            if cookie.expires and cookie.expires > agora:
+                expiracao = min(expiracao, cookie.expires)
+        return expiracao
+
+    def _carregar(self):
+        """Recupera o jar gravado em disco, se ainda válido"""
+        if not self.arquivo or not os.path.exists(self.arquivo):
+            return
+        try:
+            with open(self.arquivo, encoding='utf-8') as f:
+                salvo = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Cookies em {self.arquivo} ignorados: {e}")
+            return
+
+        if salvo.get('expira_em', 0) <= time.time():
+            return
+        for cookie in salvo.get('cookies', []):
+            self.sessao.cookies.set(cookie['name'], cookie['value'], domain=cookie['domain'],
+                                    path=cookie['path'], expires=cookie['expires'],
+                                    secure=cookie['secure'])
+        self.expira_em = salvo['expira_em']
+        print(f"🍪 Cookies recuperados de {self.arquivo} (válidos por mais "
+              f"{int(self.expira_em - time.time())}s)")
+
+    def _gravar(self):
+        if not self.arquivo:
+            return
+        cookies = [
+            {'name': c.name, 'value': c.value, 'domain': c.domain, 'path': c.path,
+             'expires': c.expires, 'secure': c.secure}
+            for c in self.sessao.cookies
+        ]
+        try:
+            os.makedirs(os.path.dirname(self.arquivo) or '.', exist_ok=True)
+            temporario = f"{self.arquivo}.{os.getpid()}.tmp"
+            with open(temporario, 'w', encoding='utf-8') as f:
+                json.dump({'expira_em': self.expira_em, 'cookies': cookies}, f)
+            os.replace(temporario, self.arquivo)
+        except OSError as e:
+            print(f"⚠️  Não foi possível gravar os cookies em {self.arquivo}: {e}")
+
+    def preparar(self) -> Optional[bool]:
+        """Carrega a página inicial para obter cookies
+
+        Returns:
+            True se conseguiu, False se nenhuma página inicial respondeu, None se
+            outra thread preparou a sessão enquanto esta esperava o lock
+        """
+        with self._lock:
+            # Chamadas simultâneas esperam a primeira e não carregam a página de novo
+            if self.valido:
+                self.reaproveitamentos += 1
+                return None
+            for url in self.urls:
+                try:
+                    print(f"   🍪 Obtendo cookies da página inicial: {url}")
+                    resposta = self.sessao.get(url)
+                    self.ultimo_status = resposta.status_code
+                except requests.exceptions.RequestException as e:
+                    if isinstance(e, requests.exceptions.Timeout):
+                        self.ultimo_status = 'timeout'
+                    print(f"   ❌ Erro ao acessar {url}: {e}")
+                    continue
+
+                if resposta.status_code == 200:
+                    # A página que respondeu passa a ser a primeira tentada
+                    if url != self.urls[0]:
+                        self.urls.remove(url)
+                        self.urls.insert(0, url)
+                    agora = time.time()
+                    self.expira_em = self._calcular_expiracao(agora)
+                    self.preparacoes += 1
+                    self._gravar()
+                    print(f"   ✅ Sessão preparada ({len(self.sessao.cookies)} cookies, "
+                          f"válida por {int(self.expira_em - agora)}s)")
+                    return True
+                print(f"   ⚠️  Página inicial retornou {resposta.status_code}: {url}")
+            return False
+
+    def garantir(self) -> Optional[bool]:
+        """Prepara a sessão se preciso
+
+        Returns:
+            None se os cookies já valiam, True se a sessão acabou de ser preparada,
+            False se nenhuma página inicial respondeu
+        """
+        if self.valido:
+            self.reaproveitamentos += 1
+            return None
+        return self.preparar()
+
+    def invalidar(self):
+        """Descarta os cookies (ex.: depois de um 403); a próxima consulta prepara de novo"""
+        with self._lock:
+            self.expira_em = 0.0
+            self.sessao.cookies.clear()
+            if self.arquivo and os.path.exists(self.arquivo):
+                try:
+                    os.remove(self.arquivo)
+                except OSError:
+                    pass
+
+    def estatisticas(self):
+        return {
+            "preparacoes": self.preparacoes,
+            "reaproveitamentos": self.reaproveitamentos,
+            "valido_por": max(0, int(self.expira_em - time.time())),
+        }
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Disjuntor (circuit breaker) por fonte de dados
+
+fechado: a fonte é consultada normalmente; `limite_falhas` falhas seguidas abrem o disjuntor
+aberto: a fonte é pulada sem custo até passar o tempo de espera
+meio_aberto: uma única consulta de teste; sucesso fecha, falha reabre com espera dobrada
+(até `espera_maxima`)
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+FECHADO = 'fechado'
+ABERTO = 'aberto'
+MEIO_ABERTO = 'meio_aberto'
+
+
+class Disjuntor:
+    """Estado de saúde de uma fonte, com transições registradas no log"""
+
+    def __init__(self, nome: str, limite_falhas: Optional[int] = None,
+                 espera: Optional[float] = None, espera_maxima: Optional[float] = None):
+        """
+        Args:
+            nome: nome da fonte (usado no log)
+            limite_falhas: falhas seguidas que abrem o disjuntor (DISJUNTOR_FALHAS, padrão 5)
+            espera: segundos aberto antes da consulta de teste (DISJUNTOR_ESPERA, padrão 300)
+            espera_maxima: teto da espera após testes que falham (DISJUNTOR_ESPERA_MAXIMA, padrão 3600)
+        """
+        self.nome = nome
+        self.limite_falhas = limite_falhas or int(os.getenv('DISJUNTOR_FALHAS', 5))
+        self.espera_inicial = espera or float(os.getenv('DISJUNTOR_ESPERA', 300))
+        self.espera_maxima = espera_maxima or float(os.getenv('DISJUNTOR_ESPERA_MAXIMA', 3600))
+
+        self.estado = FECHADO
+        self.falhas_seguidas = 0
+        self.espera = self.espera_inicial
+        self.aberto_em = 0.0
+        self._teste_em_andamento = False
+        self._lock = threading.Lock()
+
+        self.consultas_puladas = 0
+
+    def _mudar_estado(self, novo: str, motivo: str):
+        if novo == self.estado:
+            return
+        icone = {FECHADO: '🟢', ABERTO: '🔴', MEIO_ABERTO: '🟡'}[novo]
+        print(f"   {icone} Disjuntor '{self.nome}': {self.estado} -> {novo} ({motivo})")
+        self.estado = novo
+
+    def permite(self) -> bool:
+        """Indica se a fonte pode ser consultada agora"""
+        with self._lock:
+            if self.estado == FECHADO:
+                return True
+            if self.estado == ABERTO and time.monotonic() - self.aberto_em >= self.espera:
+                self._mudar_estado(MEIO_ABERTO, f"{self.espera:.0f}s de espera cumpridos")
+            if self.estado == MEIO_ABERTO and not self._teste_em_andamento:
+                self._teste_em_andamento = True
+                return True
+            self.consultas_puladas += 1
+            return False
+
+    def registrar_sucesso(self):
+        with self._lock:
+            self.falhas_seguidas = 0
+            self._teste_em_andamento = False
+            self.espera = self.espera_inicial
+            self._mudar_estado(FECHADO, "consulta bem-sucedida")
+
+    def registrar_falha(self):
+        with self._lock:
+            self.falhas_seguidas += 1
+            if self.estado == MEIO_ABERTO:
+                self._teste_em_andamento = False
+                self.espera = min(self.espera * 2, self.espera_maxima)
+                self.aberto_em = time.monotonic()
+                self._mudar_estado(ABERTO, f"consulta de teste falhou, nova espera de {self.espera:.0f}s")
+            elif self.estado == FECHADO and self.falhas_seguidas >= self.limite_falhas:
+                self.aberto_em = time.monotonic()
+                self._mudar_estado(ABERTO, f"{self.falhas_seguidas} falhas seguidas")
+
+    def registrar(self, sucesso: bool):
+        if sucesso:
+            self.registrar_sucesso()
+        else:
+            self.registrar_falha()
+
+    def estatisticas(self) -> Dict:
+        with self._lock:
+            restante = 0.0
+            if self.estado == ABERTO:
+                restante = max(0.0, self.espera - (time.monotonic() - self.aberto_em))
+            return {
+                "estado": self.estado,
+                "falhas_seguidas": self.falhas_seguidas,
+                "consultas_puladas": self.consultas_puladas,
+                "reabre_em": round(restante, 1),
+            }
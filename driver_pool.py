@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Pool de navegadores Chrome (Selenium) reutilizados entre consultas
+
+Em vez de abrir e fechar um Chrome por placa, o pool mantém até N navegadores
+headless vivos. Cada navegador pode ter várias abas; cada consulta reserva uma
+aba, e o navegador é reciclado depois de K páginas ou quando trava.
+"""
+
+import subprocess
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, List, Optional
+
+from selenium import webdriver
+from selenium.common.exceptions import (
+    NoSuchElementException,
+    TimeoutException,
+    WebDriverException,
+)
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service
+from webdriver_manager.chrome import ChromeDriverManager
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Exceções que indicam apenas que a página não tinha o que procurávamos
+ERROS_DE_PAGINA = (TimeoutException, NoSuchElementException)
+
+
+class _Navegador:
+    """Um processo Chrome com suas abas"""
+
+    def __init__(self, driver, handles: List[str]):
+        self.driver = driver
+        self.lock = threading.Lock()
+        self.total_abas = len(handles)
+        self.abas_livres = list(handles)
+        self.em_uso = 0
+        self.paginas = 0
+        # Não recebe novas consultas; é fechado quando a última aba voltar
+        self.aposentado = False
+
+
+class Aba:
+    """Aba reservada de um navegador do pool
+
+    O WebDriver só fala com uma janela por vez, então todo comando passa por
+    executar(), que troca para esta aba segurando o lock do navegador. Esperas
+    longas devem ficar fora do lock (ver aguardar()) para as outras abas andarem.
+    """
+
+    def __init__(self, navegador: _Navegador, handle: str):
+        self._navegador = navegador
+        self.handle = handle
+
+    def executar(self, funcao: Callable):
+        """Executa funcao(driver) com esta aba ativa"""
+        with self._navegador.lock:
+            driver = self._navegador.driver
+            if self._navegador.total_abas > 1:
+                driver.switch_to.window(self.handle)
+            return funcao(driver)
+
+    def aguardar(self, condicao: Callable, timeout: float = 15, intervalo: float = 0.5):
+        """Repete condicao(driver) até retornar algo verdadeiro, liberando o navegador entre tentativas"""
+        limite = time.time() + timeout
+        while True:
+            resultado = self.executar(condicao)
+            if resultado:
+                return resultado
+            if time.time() >= limite:
+                return None
+            time.sleep(intervalo)
+
+    def registrar_pagina(self):
+        """Conta uma página carregada para a reciclagem do navegador"""
+        self._navegador.paginas += 1
+
+
+class PoolChromeDriver:
+    """Pool de navegadores Chrome headless de longa duração"""
+
+    def __init__(self, tamanho: int = 2, abas_por_navegador: int = 1,
+                 max_paginas: int = 50, headless: bool = True):
+        """
+        Inicializa o pool (nenhum Chrome é aberto até a primeira consulta)
+
+        Args:
+            tamanho: máximo de navegadores abertos ao mesmo tempo
+            abas_por_navegador: abas por navegador; mais abas em menos navegadores
+                consomem menos memória do que um navegador por consulta
+            max_paginas: páginas carregadas antes de reciclar o navegador
+            headless: abrir o Chrome sem interface
+        """
+        self.tamanho = max(1, tamanho)
+        self.abas_por_navegador = max(1, abas_por_navegador)
+        self.max_paginas = max_paginas
+        self.headless = headless
+
+        self._navegadores: List[_Navegador] = []
+        self._criando = 0
+        self._cond = threading.Condition()
+        self._fechado = False
+        self._service_path: Optional[str] = None
+
+        self.navegadores_criados = 0
+        self.navegadores_reciclados = 0
+
+    def _opcoes(self) -> Options:
+        """Opções do Chrome usadas por todos os navegadores do pool"""
+        chrome_options = Options()
+        if self.headless:
+            chrome_options.add_argument("--headless")
+        chrome_options.add_argument("--no-sandbox")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--disable-gpu")
+        chrome_options.add_argument("--window-size=1920,1080")
+        chrome_options.add_argument(f"--user-agent={USER_AGENT}")
+        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        chrome_options.add_experimental_option('useAutomationExtension', False)
+        return chrome_options
+
+    def _caminho_chromedriver(self) -> str:
+        """Resolve o ChromeDriver uma única vez por pool"""
+        if self._service_path:
+            return self._service_path
+
+        print(f"        🔧 Instalando ChromeDriver...")
+        try:
+            self._service_path = ChromeDriverManager().install()
+            print(f"        ✅ ChromeDriver instalado")
+        except Exception as e:
+            print(f"        ❌ Erro ao instalar ChromeDriver: {e}")
+            print(f"        🔄 Tentando método alternativo...")
+            # Tentar usar chromedriver do sistema
+            result = subprocess.run(['which', 'chromedriver'], capture_output=True, text=True)
+            if result.returncode != 0:
+                raise RuntimeError("ChromeDriver não encontrado no sistema") from e
+            self._service_path = result.stdout.strip()
+            print(f"        📍 ChromeDriver encontrado em: {self._service_path}")
+        return self._service_path
+
+    def _criar_navegador(self) -> _Navegador:
+        """Abre um Chrome novo com as abas configuradas"""
+        print(f"        🚀 Iniciando Chrome do pool...")
+        driver = webdriver.Chrome(service=Service(self._caminho_chromedriver()), options=self._opcoes())
+        try:
+            # Executar script para evitar detecção
+            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+
+            handles = [driver.current_window_handle]
+            for _ in range(self.abas_por_navegador - 1):
+                driver.switch_to.new_window('tab')
+                handles.append(driver.current_window_handle)
+        except Exception:
+            driver.quit()
+            raise
+
+        self.navegadores_criados += 1
+        return _Navegador(driver, handles)
+
+    def _encerrar_navegador(self, navegador: _Navegador):
+        """Fecha um navegador fora do lock do pool"""
+        try:
+            navegador.driver.quit()
+            print(f"        🚪 Chrome do pool fechado")
+        except Exception:
+            pass
+
+    def _liberar(self, navegador: _Navegador, handle: str) -> Optional[_Navegador]:
+        """Devolve uma aba; retorna o navegador se ele deve ser encerrado (chamar com o lock)"""
+        navegador.em_uso -= 1
+        if navegador.paginas >= self.max_paginas:
+            navegador.aposentado = True
+        if not navegador.aposentado:
+            navegador.abas_livres.append(handle)
+        elif navegador.em_uso == 0 and navegador in self._navegadores:
+            self._navegadores.remove(navegador)
+            self.navegadores_reciclados += 1
+            self._cond.notify_all()
+            return navegador
+        self._cond.notify_all()
+        return None
+
+    def _reservar(self, timeout: Optional[float]) -> Aba:
+        """Reserva uma aba livre, abrindo um navegador novo se houver espaço"""
+        limite = None if timeout is None else time.time() + timeout
+        with self._cond:
+            while True:
+                if self._fechado:
+                    raise RuntimeError("Pool de navegadores fechado")
+
+                for navegador in self._navegadores:
+                    if not navegador.aposentado and navegador.abas_livres:
+                        navegador.em_uso += 1
+                        return Aba(navegador, navegador.abas_livres.pop())
+
+                if len(self._navegadores) + self._criando < self.tamanho:
+                    self._criando += 1
+                    break
+
+                restante = None if limite is None else limite - time.time()
+                if restante is not None and restante <= 0:
+                    raise TimeoutError("Nenhum navegador livre no pool")
+                self._cond.wait(restante)
+
+        # Abrir o Chrome fora do lock: leva alguns segundos
+        try:
+            navegador = self._criar_navegador()
+        except Exception:
+            with self._cond:
+                self._criando -= 1
+                self._cond.notify_all()
+            raise
+
+        with self._cond:
+            self._criando -= 1
+            self._navegadores.append(navegador)
+            navegador.em_uso += 1
+            self._cond.notify_all()
+            return Aba(navegador, navegador.abas_livres.pop())
+
+    def _saudavel(self, aba: Aba) -> bool:
+        """Verifica se o navegador da aba ainda responde"""
+        try:
+            aba.executar(lambda driver: driver.title)
+            return True
+        except Exception:
+            return False
+
+    @contextmanager
+    def obter_aba(self, timeout: Optional[float] = None):
+        """Reserva uma aba saudável durante o bloco `with`"""
+        while True:
+            aba = self._reservar(timeout)
+            if self._saudavel(aba):
+                break
+            print(f"        ⚠️  Chrome do pool não responde, reciclando...")
+            aba._navegador.aposentado = True
+            self._devolver(aba)
+
+        try:
+            yield aba
+        except WebDriverException as e:
+            if not isinstance(e, ERROS_DE_PAGINA):
+                aba._navegador.aposentado = True
+            raise
+        finally:
+            self._devolver(aba)
+
+    def _devolver(self, aba: Aba):
+        with self._cond:
+            encerrar = self._liberar(aba._navegador, aba.handle)
+        if encerrar:
+            self._encerrar_navegador(encerrar)
+
+    def estatisticas(self) -> dict:
+        """Números do pool para acompanhamento"""
+        with self._cond:
+            return {
+                "navegadores_abertos": len(self._navegadores),
+                "abas_em_uso": sum(n.em_uso for n in self._navegadores),
+                "navegadores_criados": self.navegadores_criados,
+                "navegadores_reciclados": self.navegadores_reciclados,
+            }
+
+    def fechar(self):
+        """Fecha todos os navegadores do pool"""
+        with self._cond:
+            self._fechado = True
+            navegadores = list(self._navegadores)
+            self._navegadores.clear()
+            self._cond.notify_all()
+
+        for navegador in navegadores:
+            self._encerrar_navegador(navegador)
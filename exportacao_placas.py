@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Exportação em fluxo da tabela de placas (CSV ou NDJSON, opcionalmente gzip)
+
+As linhas chegam de um cursor do lado do servidor (stream_results/yield_per)
+como tuplas, sem objetos ORM, e saem em blocos de ~64 KB: a memória usada não
+depende do tamanho da tabela (/api/placas/export).
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime
+from typing import Iterable, Iterator, List, Sequence
+
+TAMANHO_BLOCO = 64 * 1024
+
+
+def _datas_iso(linhas: Iterable[Sequence], indices: List[int]) -> Iterator[Sequence]:
+    """Converte para ISO 8601 só as colunas de data (as demais passam como vieram)"""
+    if not indices:
+        yield from linhas
+        return
+    for linha in linhas:
+        linha = list(linha)
+        for i in indices:
+            if isinstance(linha[i], datetime):
+                linha[i] = linha[i].isoformat()
+        yield linha
+
+
+def gerar_csv(linhas: Iterable[Sequence], colunas: List[str], colunas_data: Sequence[str] = (),
+              tamanho_bloco: int = TAMANHO_BLOCO) -> Iterator[bytes]:
+    """Blocos CSV (UTF-8, com cabeçalho) das linhas; None vira campo vazio"""
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer, lineterminator='\n')
+    escritor.writerow(colunas)
+    for linha in _datas_iso(linhas, [colunas.index(c) for c in colunas_data]):
+        escritor.writerow(linha)
+        if buffer.tell() >= tamanho_bloco:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def gerar_ndjson(linhas: Iterable[Sequence], colunas: List[str], colunas_data: Sequence[str] = (),
+                 tamanho_bloco: int = TAMANHO_BLOCO) -> Iterator[bytes]:
+    """Blocos NDJSON (um objeto por linha) das linhas"""
+    partes, tamanho = [], 0
+    for linha in _datas_iso(linhas, [colunas.index(c) for c in colunas_data]):
+        parte = json.dumps(dict(zip(colunas, linha)), ensure_ascii=False) + '\n'
+        partes.append(parte)
+        tamanho += len(parte)
+        if tamanho >= tamanho_bloco:
+            yield ''.join(partes).encode('utf-8')
+            partes, tamanho = [], 0
+    if partes:
+        yield ''.join(partes).encode('utf-8')
+
+
+def compactar_gzip(blocos: Iterable[bytes], nivel: int = 6) -> Iterator[bytes]:
+    """Compacta um fluxo de blocos em formato gzip, bloco a bloco"""
+    compressor = zlib.compressobj(nivel, zlib.DEFLATED, 31)  # wbits 31 = cabeçalho gzip
+    for bloco in blocos:
+        compactado = compressor.compress(bloco)
+        if compactado:
+            yield compactado
+    yield compressor.flush()
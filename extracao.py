@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Extração de dados de veículos compartilhada pelos scrapers
+
+Em vez de montar a árvore BeautifulSoup da página inteira para ler uma tabela
+pequena, localiza o trecho <table>...</table> de interesse com uma busca de
+texto e só esse trecho é parseado (lxml). Os rótulos das linhas são mapeados
+para os campos do modelo por um dicionário pré-calculado.
+
+No Selenium a mesma extração roda dentro da página (SCRIPT_EXTRAIR_TABELA):
+só o dicionário de campos volta pelo WebDriver, sem outerHTML nem parse.
+"""
+
+import html as html_lib
+import re
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import lxml.html
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+    from bs4 import BeautifulSoup
+
+# Rótulo normalizado (minúsculo, sem ':' e com espaços simples) -> campo do modelo
+MAPA_CAMPOS = {
+    'marca': 'marca',
+    'marcaplacas mercosul': 'marca',
+    'genérico': 'generico',
+    'generico': 'generico',
+    'modelo': 'modelo',
+    'importado': 'importado',
+    'ano': 'ano',
+    'ano fabricação': 'ano',
+    'ano modelo': 'ano_modelo',
+    'cor': 'cor',
+    'cilindrada': 'cilindrada',
+    'combustível': 'combustivel',
+    'combustivel': 'combustivel',
+    'chassi': 'chassi',
+    'motor': 'motor',
+    'passageiros': 'passageiros',
+    'uf': 'uf',
+    'município': 'municipio',
+    'municipio': 'municipio',
+}
+
+# Para rótulos fora do mapa: chaves mais longas primeiro ('ano modelo' antes de 'ano')
+_CHAVES_POR_TAMANHO = sorted(MAPA_CAMPOS, key=len, reverse=True)
+
+_RE_ABRE_TABELA = re.compile(r'<table\b([^>]*)>', re.IGNORECASE)
+_RE_TAG_TABELA = re.compile(r'<(/?)table\b', re.IGNORECASE)
+_RE_CLASSE = re.compile(r'''\bclass\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s>]+))''', re.IGNORECASE)
+_RE_ESPACOS = re.compile(r'\s+')
+# Marcação que não aparece na tela: scripts/estilos inteiros, comentários e as próprias tags
+_RE_MARCACAO = re.compile(r'<(script|style)\b.*?</\1\s*>|<!--.*?-->|<[^>]*>', re.IGNORECASE | re.DOTALL)
+
+
+def normalizar_rotulo(label: str) -> str:
+    """'  Ano   Modelo: ' -> 'ano modelo'"""
+    return _RE_ESPACOS.sub(' ', label.replace(':', '')).strip().lower()
+
+
+@lru_cache(maxsize=1024)
+def _mapear_por_substring(rotulo: str) -> Optional[str]:
+    for chave in _CHAVES_POR_TAMANHO:
+        if chave in rotulo:
+            return MAPA_CAMPOS[chave]
+    return None
+
+
+def mapear_campo(label: str, aproximado: bool = True) -> Optional[str]:
+    """Campo do modelo para o rótulo de uma linha, ou None
+
+    Args:
+        label: texto da primeira célula da linha
+        aproximado: se o rótulo não estiver no mapa, aceita rótulos que contenham uma chave conhecida
+    """
+    rotulo = normalizar_rotulo(label)
+    campo = MAPA_CAMPOS.get(rotulo)
+    if campo is None and aproximado and rotulo:
+        campo = _mapear_por_substring(rotulo)
+    return campo
+
+
+def _classes(atributos: str) -> List[str]:
+    encontrado = _RE_CLASSE.search(atributos)
+    if not encontrado:
+        return []
+    valor = next(g for g in encontrado.groups() if g is not None)
+    return valor.split()
+
+
+def _fim_da_tabela(html: str, inicio: int) -> int:
+    """Posição logo após o </table> que fecha a tabela aberta em `inicio`"""
+    profundidade = 0
+    for tag in _RE_TAG_TABELA.finditer(html, inicio):
+        if tag.group(1):
+            profundidade -= 1
+            if profundidade == 0:
+                fim = html.find('>', tag.end())
+                return len(html) if fim == -1 else fim + 1
+        else:
+            profundidade += 1
+    return len(html)
+
+
+def localizar_tabelas(html: str, classe: Optional[str] = None) -> Iterator[str]:
+    """Trechos <table>...</table> da página (só os que têm `classe`, se informada)"""
+    for abertura in _RE_ABRE_TABELA.finditer(html):
+        if classe is not None and classe not in _classes(abertura.group(1)):
+            continue
+        yield html[abertura.start():_fim_da_tabela(html, abertura.start())]
+
+
+def localizar_tabela(html: str, classe: Optional[str] = None) -> Optional[str]:
+    """Primeira tabela da página (com `classe`, se informada), ou None"""
+    return next(localizar_tabelas(html, classe), None)
+
+
+def classes_das_tabelas(html: str) -> List[List[str]]:
+    """Classes de cada tabela da página (usado em mensagens de debug)"""
+    return [_classes(abertura.group(1)) for abertura in _RE_ABRE_TABELA.finditer(html)]
+
+
+def texto_visivel(html: str) -> str:
+    """Texto da página sem scripts, estilos e tags (cada tag vira uma quebra de linha)"""
+    return html_lib.unescape(_RE_MARCACAO.sub('\n', html))
+
+
+def linhas_tabela(trecho: str, celulas: Tuple[str, ...] = ('td',)) -> Iterator[Tuple[str, str]]:
+    """(rótulo, valor) das linhas com pelo menos duas células do trecho de tabela"""
+    if LXML_AVAILABLE:
+        tabela = lxml.html.fragment_fromstring(trecho)
+        for linha in tabela.iter('tr'):
+            colunas = [c for c in linha if c.tag in celulas]
+            if len(colunas) >= 2:
+                yield (_RE_ESPACOS.sub(' ', colunas[0].text_content()).strip(),
+                       _RE_ESPACOS.sub(' ', colunas[1].text_content()).strip())
+    else:
+        soup = BeautifulSoup(trecho, 'html.parser')
+        for linha in soup.find_all('tr'):
+            colunas = linha.find_all(list(celulas), recursive=False)
+            if len(colunas) >= 2:
+                yield colunas[0].get_text(' ', strip=True), colunas[1].get_text(' ', strip=True)
+
+
+def extrair_dados_tabela(trecho: str, celulas: Tuple[str, ...] = ('td',),
+                         aproximado: bool = True,
+                         ignorar_valores: Tuple[str, ...] = ('',)) -> Dict[str, str]:
+    """Campos do modelo lidos de um trecho <table>...</table>"""
+    dados = {}
+    for label, valor in linhas_tabela(trecho, celulas):
+        if valor in ignorar_valores:
+            continue
+        campo = mapear_campo(label, aproximado)
+        if campo:
+            dados[campo] = valor
+    return dados
+
+
+# Mesma lógica de linhas_tabela + extrair_dados_tabela, executada no navegador.
+# Argumentos: tabela, MAPA_CAMPOS, chaves por tamanho, células, aproximado, valores ignorados
+SCRIPT_EXTRAIR_TABELA = """
+var tabela = arguments[0], mapa = arguments[1], chaves = arguments[2],
+    celulas = arguments[3], aproximado = arguments[4], ignorar = arguments[5];
+var limpar = function (texto) { return texto.replace(/\\s+/g, ' ').trim(); };
+var dados = {};
+var linhas = tabela.getElementsByTagName('tr');
+for (var i = 0; i < linhas.length; i++) {
+    var colunas = [];
+    for (var j = 0; j < linhas[i].children.length; j++) {
+        var celula = linhas[i].children[j];
+        if (celulas.indexOf(celula.tagName.toLowerCase()) !== -1) colunas.push(celula);
+    }
+    if (colunas.length < 2) continue;
+    var valor = limpar(colunas[1].textContent);
+    if (ignorar.indexOf(valor) !== -1) continue;
+    var rotulo = limpar(colunas[0].textContent.replace(/:/g, '')).toLowerCase();
+    var campo = Object.prototype.hasOwnProperty.call(mapa, rotulo) ? mapa[rotulo] : null;
+    if (campo === null && aproximado && rotulo) {
+        for (var k = 0; k < chaves.length; k++) {
+            if (rotulo.indexOf(chaves[k]) !== -1) { campo = mapa[chaves[k]]; break; }
+        }
+    }
+    if (campo) dados[campo] = valor;
+}
+return dados;
+"""
+
+
+def extrair_dados_no_navegador(driver, elemento, celulas: Tuple[str, ...] = ('td',),
+                               aproximado: bool = True,
+                               ignorar_valores: Tuple[str, ...] = ('',)) -> Dict[str, str]:
+    """Campos do modelo lidos de um WebElement <table>, com a extração feita na própria página"""
+    dados = driver.execute_script(SCRIPT_EXTRAIR_TABELA, elemento, MAPA_CAMPOS, _CHAVES_POR_TAMANHO,
+                                  list(celulas), aproximado, list(ignorar_valores))
+    return dados or {}
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Leitura em fluxo de arquivos de placas (CSV, uma por linha ou NDJSON)
+
+O corpo do upload é lido em blocos e transformado em placas brutas sem nunca
+ficar inteiro na memória; em_lotes agrupa as placas para validação,
+deduplicação no banco e enfileiramento incremental (/api/importar-placas).
+Um upload multipart/form-data também é lido em fluxo (ArquivoMultipart), sem
+o request.files do Werkzeug, que grava o arquivo inteiro antes de devolvê-lo.
+"""
+
+import codecs
+import csv
+import json
+from typing import Iterable, Iterator, List, Optional
+
+from werkzeug.sansio.multipart import Data, Epilogue, File, MultipartDecoder, NeedData
+
+TAMANHO_BLOCO = 64 * 1024
+
+FORMATOS = ('csv', 'linhas', 'ndjson')
+
+# Content-Type do upload -> formato (quando ?formato= não é informado)
+FORMATOS_POR_TIPO = {
+    'text/csv': 'csv',
+    'application/csv': 'csv',
+    'application/x-ndjson': 'ndjson',
+    'application/ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+    'text/plain': 'linhas',
+}
+
+
+def ler_linhas(fluxo, tamanho_bloco: int = TAMANHO_BLOCO) -> Iterator[str]:
+    """Linhas (sem o fim de linha) de um fluxo binário, lido em blocos (UTF-8, com ou sem BOM)"""
+    decodificador = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+    resto = ''
+    while True:
+        bloco = fluxo.read(tamanho_bloco)
+        if not bloco:
+            break
+        texto = resto + decodificador.decode(bloco)
+        linhas = texto.splitlines()
+        # A última linha pode estar incompleta (ou terminar em \r de um \r\n partido)
+        if texto and texto[-1] not in '\r\n':
+            resto = linhas.pop()
+        else:
+            resto = ''
+        yield from linhas
+    resto += decodificador.decode(b'', final=True)
+    if resto:
+        yield from resto.splitlines()
+
+
+def detectar_formato(primeira_linha: str) -> str:
+    """Formato provável a partir da primeira linha não vazia"""
+    linha = primeira_linha.lstrip()
+    if linha.startswith(('{', '"')):
+        return 'ndjson'
+    if any(separador in linha for separador in ',;\t'):
+        return 'csv'
+    return 'linhas'
+
+
+def _placas_csv(linhas: Iterator[str], primeira: str) -> Iterator[str]:
+    delimitador = max(',;\t', key=primeira.count)
+    leitor = csv.reader(_com_primeira(primeira, linhas), delimiter=delimitador)
+    cabecalho = next(leitor, [])
+    nomes = [celula.strip().lower() for celula in cabecalho]
+    if 'placa' in nomes:
+        coluna = nomes.index('placa')
+    else:
+        # Sem cabeçalho: placa na primeira coluna e a primeira linha já é dado
+        coluna = 0
+        if cabecalho:
+            yield cabecalho[0]
+    for linha in leitor:
+        if not linha or not any(celula.strip() for celula in linha):
+            continue
+        yield linha[coluna] if coluna < len(linha) else ''
+
+
+def _placas_ndjson(linhas: Iterable[str]) -> Iterator:
+    for linha in linhas:
+        if not linha.strip():
+            continue
+        try:
+            valor = json.loads(linha)
+        except ValueError:
+            # Linha inválida vai para a validação e sai como rejeitada
+            yield linha
+            continue
+        yield valor.get('placa') if isinstance(valor, dict) else valor
+
+
+def _com_primeira(primeira: str, linhas: Iterator[str]) -> Iterator[str]:
+    yield primeira
+    yield from linhas
+
+
+def extrair_placas(linhas: Iterable[str], formato: Optional[str] = None) -> Iterator:
+    """Placas brutas (ainda não validadas) de cada linha do arquivo
+
+    Args:
+        linhas: linhas do arquivo (ex.: ler_linhas)
+        formato: 'csv' (coluna "placa" ou a primeira), 'linhas' ou 'ndjson'
+            ({"placa": ...} ou "ABC1234" por linha); None detecta pela primeira linha
+    """
+    linhas = iter(linhas)
+    primeira = next((linha for linha in linhas if linha.strip()), None)
+    if primeira is None:
+        return
+    formato = formato or detectar_formato(primeira)
+    if formato == 'csv':
+        yield from _placas_csv(linhas, primeira)
+    elif formato == 'ndjson':
+        yield from _placas_ndjson(_com_primeira(primeira, linhas))
+    else:
+        for linha in _com_primeira(primeira, linhas):
+            if linha.strip():
+                yield linha
+
+
+def em_lotes(itens: Iterable, tamanho: int) -> Iterator[List]:
+    """Agrupa um iterável em listas de até `tamanho` itens"""
+    lote = []
+    for item in itens:
+        lote.append(item)
+        if len(lote) >= tamanho:
+            yield lote
+            lote = []
+    if lote:
+        yield lote
+
+
+class ArquivoMultipart:
+    """Conteúdo de um campo de arquivo de um corpo multipart/form-data, lido em fluxo
+
+    abrir() lê o corpo até o começo do campo; read() devolve o conteúdo dele em
+    blocos, à medida que chega (como o fluxo esperado por ler_linhas).
+    """
+
+    def __init__(self, fluxo, boundary: str, campo: str, tamanho_bloco: int = TAMANHO_BLOCO):
+        self.fluxo = fluxo
+        self.campo = campo
+        self.tamanho_bloco = tamanho_bloco
+        self.mimetype = None
+        self._decodificador = MultipartDecoder(boundary.encode('latin-1'))
+        self._no_campo = False
+        self._fim = False
+
+    def _proximo_evento(self):
+        """Próximo evento do corpo, lendo mais blocos quando preciso (ValueError se truncado)"""
+        while True:
+            evento = self._decodificador.next_event()
+            if not isinstance(evento, NeedData):
+                return evento
+            bloco = self.fluxo.read(self.tamanho_bloco)
+            self._decodificador.receive_data(bloco or None)
+
+    def abrir(self) -> bool:
+        """Avança até o campo de arquivo; False se o corpo não tem esse campo"""
+        while True:
+            evento = self._proximo_evento()
+            if isinstance(evento, Epilogue):
+                return False
+            if isinstance(evento, File) and evento.name == self.campo:
+                self.mimetype = evento.headers.get('content-type', '').split(';')[0].strip() or None
+                self._no_campo = True
+                return True
+
+    def read(self, tamanho: int = -1) -> bytes:
+        """Próximo bloco do arquivo (b'' no fim); `tamanho` é ignorado"""
+        while self._no_campo and not self._fim:
+            evento = self._proximo_evento()
+            if not isinstance(evento, Data):
+                self._fim = True
+                break
+            if not evento.more_data:
+                self._fim = True
+            if evento.data:
+                return evento.data
+        return b''
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Migração online da tabela placa para o esquema tipado
+
+Do esquema antigo (tudo texto: ano '2011', uf VARCHAR(10), marca e combustível
+repetidos em cada linha, nenhum índice secundário) para o atual (anos e
+passageiros SMALLINT, uf CHAR(2), marca_id/combustivel_id nas tabelas de
+nomes e índices dos filtros), sem um ALTER TABLE que trave a tabela inteira:
+
+1. preparar: cria placa_nova já no esquema novo (com os índices, ainda vazia)
+   e triggers em placa que repetem ali cada INSERT, UPDATE e DELETE.
+2. copiar: converte as linhas existentes em lotes por faixa de id
+   (INSERT IGNORE ... SELECT de --lote linhas, commit e --pausa segundos entre
+   lotes). Cada lote trava só as suas linhas, por pouco tempo; o que os
+   triggers já gravaram não é sobrescrito. Pode ser interrompido e retomado.
+3. finalizar: com o app antigo parado, troca as tabelas
+   (RENAME TABLE placa TO placa_antiga, placa_nova TO placa, instantâneo) e
+   remove os triggers. Daí em diante sobe a versão nova do app.
+4. limpar: apaga placa_antiga (ou desfaz uma migração não finalizada).
+
+As conversões em SQL seguem as regras de campos_placa.py.
+
+Uso:
+    python migracao_placa.py preparar
+    python migracao_placa.py copiar [--lote 5000] [--pausa 0.1]
+    python migracao_placa.py finalizar
+    python migracao_placa.py estado
+    python migracao_placa.py limpar
+"""
+
+import argparse
+import os
+import time
+from typing import Dict, Optional
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, text
+from sqlalchemy.exc import NoSuchTableError
+
+from app import db, Placa, Marca, Combustivel, busca_placas, cache_respostas, get_current_time_gmt3
+from busca_placas import COLUNAS_FULLTEXT, INDICE_MYSQL
+from campos_placa import UFS
+
+TABELA_NOVA = 'placa_nova'
+TABELA_ANTIGA = 'placa_antiga'
+PREFIXO_TRIGGERS = 'migracao_placa'
+TRIGGERS = [f'{PREFIXO_TRIGGERS}_{evento}' for evento in ('ai', 'au', 'ad')]
+
+# Colunas que passam sem conversão
+COLUNAS_COPIADAS = ('id', 'placa', 'generico', 'modelo', 'importado', 'cor', 'cilindrada',
+                    'chassi', 'motor', 'municipio', 'data_scraping', 'status')
+# Coluna antiga com o nome -> tabela de nomes
+COLUNAS_NOMES = {'marca': Marca, 'combustivel': Combustivel}
+
+# Andamento da cópia (uma linha), fora do db.Model: só existe durante a migração
+estado_migracao = Table(
+    'migracao_placa', MetaData(),
+    Column('id', Integer, primary_key=True),
+    Column('ultimo_id', Integer, nullable=False),
+    Column('maximo_id', Integer, nullable=False),
+    Column('copiadas', Integer, nullable=False),
+    Column('etapa', String(20), nullable=False),  # copiando, copiada, finalizada
+    Column('atualizado_em', DateTime),
+)
+
+
+def esquema_antigo() -> bool:
+    """Se a tabela placa ainda está no formato antigo (marca em texto, sem marca_id)"""
+    try:
+        colunas = {coluna['name'] for coluna in inspect(db.session.connection()).get_columns('placa')}
+    except NoSuchTableError:
+        return False
+    return 'marca' in colunas and 'marca_id' not in colunas
+
+
+def _dialeto() -> str:
+    return db.engine.dialect.name
+
+
+def _sql_ano(valor: str) -> str:
+    """ano_inteiro em SQL: 4 dígitos de 1000 a 2999 no começo, sem outro dígito ou '-' depois"""
+    t = f"TRIM({valor})"
+    if _dialeto() == 'mysql':
+        return f"CASE WHEN {t} REGEXP '^[12][0-9]{{3}}([^0-9-]|$)' THEN CAST(LEFT({t}, 4) AS UNSIGNED) END"
+    return (f"CASE WHEN SUBSTR({t}, 1, 4) GLOB '[12][0-9][0-9][0-9]' AND SUBSTR({t}, 5, 1) NOT GLOB '[0-9-]' "
+            f"THEN CAST(SUBSTR({t}, 1, 4) AS INTEGER) END")
+
+
+def _sql_inteiro_pequeno(valor: str) -> str:
+    """inteiro_pequeno em SQL: 1 a 3 dígitos no começo, sem outro dígito depois, e maior que 0"""
+    t = f"TRIM({valor})"
+    if _dialeto() == 'mysql':
+        return (f"CASE WHEN {t} REGEXP '^[0-9]{{1,3}}([^0-9]|$)' "
+                f"THEN NULLIF(CAST(REGEXP_SUBSTR({t}, '^[0-9]+') AS UNSIGNED), 0) END")
+    casos = ' '.join(
+        f"WHEN SUBSTR({t}, 1, {n}) GLOB '{'[0-9]' * n}' AND SUBSTR({t}, {n + 1}, 1) NOT GLOB '[0-9]' "
+        f"THEN NULLIF(CAST(SUBSTR({t}, 1, {n}) AS INTEGER), 0)"
+        for n in (3, 2, 1))
+    return f"CASE {casos} END"
+
+
+def _sql_uf(valor: str) -> str:
+    """sigla_uf em SQL"""
+    siglas = ', '.join(f"'{uf}'" for uf in UFS)
+    return f"CASE WHEN UPPER(TRIM({valor})) IN ({siglas}) THEN UPPER(TRIM({valor})) END"
+
+
+def _sql_valores(origem: str) -> Dict[str, str]:
+    """Coluna de placa_nova -> expressão sobre a linha `origem` da placa antiga"""
+    valores = {coluna: f"{origem}.{coluna}" for coluna in COLUNAS_COPIADAS}
+    for coluna, modelo in COLUNAS_NOMES.items():
+        valores[f'{coluna}_id'] = (f"(SELECT id FROM {modelo.__tablename__} "
+                                   f"WHERE nome = TRIM({origem}.{coluna}))")
+    valores['ano'] = _sql_ano(f"{origem}.ano")
+    valores['ano_modelo'] = _sql_ano(f"{origem}.ano_modelo")
+    valores['passageiros'] = _sql_inteiro_pequeno(f"{origem}.passageiros")
+    valores['uf'] = _sql_uf(f"{origem}.uf")
+    return valores
+
+
+def _insert_ignore() -> str:
+    return 'INSERT IGNORE' if _dialeto() == 'mysql' else 'INSERT OR IGNORE'
+
+
+def _sql_inserir_nomes(coluna: str, origem: str, de: str) -> str:
+    """INSERT dos nomes ainda não cadastrados de `origem`.`coluna`
+
+    O NOT EXISTS evita gastar valores do AUTO_INCREMENT (SMALLINT) com nomes que
+    já existem; o IGNORE só cobre a corrida entre duas gravações.
+    """
+    tabela = COLUNAS_NOMES[coluna].__tablename__
+    nome = f"TRIM({origem}.{coluna})"
+    return (f"{_insert_ignore()} INTO {tabela} (nome) SELECT DISTINCT {nome}{de} "
+            f"{'AND' if ' WHERE ' in de else 'WHERE'} {nome} <> '' "
+            f"AND NOT EXISTS (SELECT 1 FROM {tabela} WHERE nome = {nome})")
+
+
+def _sql_triggers() -> Dict[str, str]:
+    """Triggers em placa que mantêm placa_nova igual a ela durante a cópia"""
+    mysql = _dialeto() == 'mysql'
+    valores = _sql_valores('NEW')
+    colunas = ', '.join(valores)
+    substituir = 'REPLACE' if mysql else 'INSERT OR REPLACE'
+    sem_tabela = ' FROM DUAL' if mysql else ''
+    gravar = '\n'.join(
+        [f"    {_sql_inserir_nomes(coluna, 'NEW', sem_tabela)};" for coluna in COLUNAS_NOMES] +
+        [f"    {substituir} INTO {TABELA_NOVA} ({colunas}) VALUES ({', '.join(valores.values())});"])
+    return {
+        f'{PREFIXO_TRIGGERS}_ai': f"CREATE TRIGGER {PREFIXO_TRIGGERS}_ai AFTER INSERT ON placa FOR EACH ROW BEGIN\n{gravar}\nEND",
+        f'{PREFIXO_TRIGGERS}_au': f"CREATE TRIGGER {PREFIXO_TRIGGERS}_au AFTER UPDATE ON placa FOR EACH ROW BEGIN\n{gravar}\nEND",
+        f'{PREFIXO_TRIGGERS}_ad': (f"CREATE TRIGGER {PREFIXO_TRIGGERS}_ad AFTER DELETE ON placa FOR EACH ROW BEGIN\n"
+                                   f"    DELETE FROM {TABELA_NOVA} WHERE id = OLD.id;\nEND"),
+    }
+
+
+def _remover_triggers():
+    for trigger in TRIGGERS:
+        db.session.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+
+
+def ler_estado() -> Optional[dict]:
+    """Andamento da migração, ou None se ela não foi preparada"""
+    try:
+        linha = db.session.execute(estado_migracao.select()).mappings().first()
+    except Exception:
+        db.session.rollback()
+        return None
+    return dict(linha) if linha else None
+
+
+def _gravar_estado(**valores):
+    valores['atualizado_em'] = get_current_time_gmt3()
+    db.session.execute(estado_migracao.update().values(**valores))
+
+
+def preparar() -> bool:
+    """Cria placa_nova, as tabelas de nomes e os triggers de sincronização"""
+    if ler_estado():
+        print("ℹ️ Migração já preparada (python migracao_placa.py estado)")
+        return True
+    if not esquema_antigo():
+        print("✅ Tabela placa já está no esquema novo; nada a migrar")
+        return False
+
+    conexao = db.session.connection()
+    for modelo in COLUNAS_NOMES.values():
+        modelo.__table__.create(conexao, checkfirst=True)
+    estado_migracao.create(conexao, checkfirst=True)
+
+    metadata = MetaData()
+    for modelo in COLUNAS_NOMES.values():
+        modelo.__table__.to_metadata(metadata)
+    nova = Placa.__table__.to_metadata(metadata, name=TABELA_NOVA)
+    if _dialeto() == 'sqlite':
+        # No SQLite o nome do índice vale para o banco todo: o da placa antiga sai
+        for indice in nova.indexes:
+            db.session.execute(text(f"DROP INDEX IF EXISTS {indice.name}"))
+    nova.create(conexao, checkfirst=True)
+    if _dialeto() == 'mysql':
+        # Com a tabela vazia o índice de texto sai na hora; a cópia já o preenche
+        db.session.execute(text(f"ALTER TABLE {TABELA_NOVA} ADD FULLTEXT INDEX {INDICE_MYSQL} "
+                                f"({', '.join(COLUNAS_FULLTEXT)}) WITH PARSER ngram"))
+
+    # Triggers antes de ler o maior id: o que chegar depois deles já vai para placa_nova
+    for trigger in _sql_triggers().values():
+        db.session.execute(text(trigger))
+    maximo = db.session.execute(text("SELECT MAX(id) FROM placa")).scalar() or 0
+    db.session.execute(estado_migracao.insert().values(
+        id=1, ultimo_id=0, maximo_id=maximo, copiadas=0, etapa='copiando',
+        atualizado_em=get_current_time_gmt3()))
+    db.session.commit()
+    print(f"🔧 {TABELA_NOVA} criada com triggers de sincronização; {maximo:,} ids a copiar "
+          f"(python migracao_placa.py copiar)")
+    return True
+
+
+def copiar(lote: Optional[int] = None, pausa: Optional[float] = None) -> bool:
+    """Converte as linhas existentes para placa_nova em lotes por faixa de id (retomável)"""
+    if lote is None:
+        lote = int(os.getenv('MIGRACAO_LOTE', 5000))
+    if pausa is None:
+        pausa = float(os.getenv('MIGRACAO_PAUSA', 0.1))
+    estado = ler_estado()
+    if estado is None:
+        print("❌ Migração não preparada (python migracao_placa.py preparar)")
+        return False
+    if estado['etapa'] != 'copiando':
+        print(f"ℹ️ Cópia já concluída (etapa: {estado['etapa']})")
+        return True
+
+    valores = _sql_valores('antiga')
+    faixa = " FROM placa antiga WHERE antiga.id > :de AND antiga.id <= :ate"
+    comandos_nomes = [text(_sql_inserir_nomes(coluna, 'antiga', faixa)) for coluna in COLUNAS_NOMES]
+    comando = text(f"{_insert_ignore()} INTO {TABELA_NOVA} ({', '.join(valores)}) "
+                   f"SELECT {', '.join(valores.values())}{faixa}")
+
+    ultimo, maximo, copiadas = estado['ultimo_id'], estado['maximo_id'], estado['copiadas']
+    print(f"📦 Copiando ids {ultimo + 1:,} a {maximo:,} em lotes de {lote:,} (pausa de {pausa}s)")
+    inicio = ultimo_aviso = time.time()
+    while ultimo < maximo:
+        ate = min(ultimo + lote, maximo)
+        parametros = {'de': ultimo, 'ate': ate}
+        try:
+            for comando_nomes in comandos_nomes:
+                db.session.execute(comando_nomes, parametros)
+            copiadas += db.session.execute(comando, parametros).rowcount
+            _gravar_estado(ultimo_id=ate, copiadas=copiadas)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        ultimo = ate
+        if time.time() - ultimo_aviso >= 5 or ultimo == maximo:
+            ultimo_aviso = time.time()
+            print(f"   ⏳ id {ultimo:,} de {maximo:,} ({ultimo / maximo:.0%}), {copiadas:,} linhas "
+                  f"em {time.time() - inicio:.0f}s")
+        if pausa and ultimo < maximo:
+            time.sleep(pausa)
+
+    _gravar_estado(etapa='copiada')
+    db.session.commit()
+    print(f"✅ Cópia concluída: {copiadas:,} linhas (python migracao_placa.py finalizar, com o app parado)")
+    return True
+
+
+def finalizar() -> bool:
+    """Troca placa por placa_nova (o app antigo precisa estar parado)"""
+    estado = ler_estado()
+    if estado is None or estado['etapa'] == 'copiando':
+        print("❌ A cópia ainda não terminou (python migracao_placa.py copiar)")
+        return False
+    if estado['etapa'] == 'finalizada':
+        print("ℹ️ Migração já finalizada")
+        return True
+
+    antigas = db.session.execute(text("SELECT COUNT(*) FROM placa")).scalar()
+    novas = db.session.execute(text(f"SELECT COUNT(*) FROM {TABELA_NOVA}")).scalar()
+    if antigas != novas:
+        print(f"❌ placa tem {antigas:,} linhas e {TABELA_NOVA} {novas:,}; nada foi trocado")
+        return False
+
+    if _dialeto() == 'mysql':
+        # Troca atômica; os triggers ficam com placa_antiga e saem em seguida
+        db.session.execute(text(f"RENAME TABLE placa TO {TABELA_ANTIGA}, {TABELA_NOVA} TO placa"))
+        _remover_triggers()
+    else:
+        # O índice de busca do formato antigo aponta para placa.marca: é recriado no fim
+        busca_placas.remover_indice_sqlite()
+        _remover_triggers()
+        db.session.execute(text(f"ALTER TABLE placa RENAME TO {TABELA_ANTIGA}"))
+        db.session.execute(text(f"ALTER TABLE {TABELA_NOVA} RENAME TO placa"))
+    _gravar_estado(etapa='finalizada')
+    db.session.commit()
+    print(f"🔁 placa trocada pela versão tipada ({novas:,} linhas); a antiga ficou em {TABELA_ANTIGA}")
+    # Respostas em cache (no Redis, de outros processos) têm o formato antigo
+    cache_respostas.invalidar_placas([])
+
+    busca_placas._mysql_disponivel = None
+    busca_placas.criar_indice()
+    return True
+
+
+def limpar() -> bool:
+    """Apaga placa_antiga depois de finalizar, ou desfaz uma migração não finalizada"""
+    estado = ler_estado()
+    if estado is None:
+        print("ℹ️ Nenhuma migração em andamento")
+        return False
+    if estado['etapa'] == 'finalizada':
+        db.session.execute(text(f"DROP TABLE IF EXISTS {TABELA_ANTIGA}"))
+        print(f"🧹 {TABELA_ANTIGA} removida")
+    else:
+        _remover_triggers()
+        db.session.execute(text(f"DROP TABLE IF EXISTS {TABELA_NOVA}"))
+        print(f"↩️ Migração desfeita: triggers e {TABELA_NOVA} removidos, placa intacta")
+    estado_migracao.drop(db.session.connection())
+    db.session.commit()
+    return True
+
+
+def mostrar_estado():
+    estado = ler_estado()
+    if estado is None:
+        print("🔎 Esquema antigo, migração não preparada" if esquema_antigo()
+              else "🔎 Nenhuma migração em andamento")
+        return
+    total = estado['maximo_id'] or 1
+    print(f"🔎 Etapa: {estado['etapa']}; id {estado['ultimo_id']:,} de {estado['maximo_id']:,} "
+          f"({min(estado['ultimo_id'] / total, 1):.0%}), {estado['copiadas']:,} linhas copiadas; "
+          f"atualizado em {estado['atualizado_em']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migração online da tabela placa para o esquema tipado")
+    parser.add_argument('etapa', choices=['preparar', 'copiar', 'finalizar', 'estado', 'limpar'])
+    parser.add_argument('--lote', type=int, help="linhas por lote da cópia (padrão MIGRACAO_LOTE, 5000)")
+    parser.add_argument('--pausa', type=float, help="segundos entre lotes (padrão MIGRACAO_PAUSA, 0.1)")
+    args = parser.parse_args()
+
+    from app import app
+
+    with app.app_context():
+        if args.etapa == 'preparar':
+            preparar()
+        elif args.etapa == 'copiar':
+            copiar(args.lote, args.pausa)
+        elif args.etapa == 'finalizar':
+            finalizar()
+        elif args.etapa == 'estado':
+            mostrar_estado()
+        else:
+            limpar()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+Paginação por cursor (keyset) e totais em cache para a listagem de placas
+
+Em vez de OFFSET (que percorre e descarta todas as linhas anteriores, ficando
+mais lento a cada página) a próxima página começa logo depois da última linha
+da atual: WHERE (data_scraping, id) < (:data, :id) ORDER BY data_scraping DESC,
+id DESC LIMIT n, resolvido pelo índice em qualquer profundidade. A posição vai
+para o cliente num token opaco (próxima/anterior).
+
+O COUNT(*) sai do caminho da página: TotaisEmCache guarda o total de cada busca
+por alguns segundos e o recalcula numa thread quando vence, devolvendo o valor
+anterior (ou uma estimativa) enquanto isso.
+"""
+
+import base64
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, false, or_
+
+
+class OrdemKeyset:
+    """Uma ordenação da listagem: colunas (a última única e não nula, ex.: id) e sentido
+
+    Só a primeira coluna pode aceitar NULL, que segue o MySQL/SQLite: NULL é o
+    menor valor (primeiro em ASC, último em DESC).
+    """
+
+    def __init__(self, nome: str, colunas: Sequence, descendente: bool = False,
+                 chaves: Optional[Sequence[str]] = None):
+        """
+        Args:
+            chaves: atributos dos itens com os valores das colunas (padrão: o nome de
+                cada coluna); ex.: ordenar pelo rowid de outra tabela igual ao id do item
+        """
+        self.nome = nome
+        self.colunas = list(colunas)
+        self.descendente = descendente
+        self.chaves = list(chaves) if chaves else [coluna.key for coluna in self.colunas]
+
+    def ordenar(self, anterior: bool = False) -> List:
+        """ORDER BY desta ordem (invertido para buscar a página anterior)"""
+        decrescente = self.descendente != anterior
+        return [coluna.desc() if decrescente else coluna.asc() for coluna in self.colunas]
+
+    def depois_de(self, valores: Sequence, anterior: bool = False) -> List:
+        """Condições das linhas que vêm depois (ou antes, se anterior) da posição `valores`
+
+        Cada condição é um trecho contínuo da ordem, na sequência em que os
+        trechos aparecem. Os NULL da primeira coluna ficam num trecho à parte:
+        um "OR coluna IS NULL" na mesma condição impede a busca por faixa no
+        índice e faz o banco percorrê-lo desde o início.
+        """
+        crescente = self.descendente == anterior
+        primeira, valor = self.colunas[0], valores[0]
+        if not primeira.nullable:
+            return [_faixa(self.colunas, valores, crescente)]
+
+        if valor is None:
+            resto = _faixa(self.colunas[1:], valores[1:], crescente) if len(self.colunas) > 1 else false()
+            nulos = and_(primeira.is_(None), resto)
+            # NULL é o menor valor: em ordem crescente os demais vêm depois deles
+            return [nulos, primeira.is_not(None)] if crescente else [nulos]
+        faixa = _faixa(self.colunas, valores, crescente)
+        return [faixa] if crescente else [faixa, primeira.is_(None)]
+
+    def posicao(self, item) -> List:
+        """Valores das colunas da ordem em um item (objeto ou linha)"""
+        return [getattr(item, chave) for chave in self.chaves]
+
+
+def _faixa(colunas: Sequence, valores: Sequence, crescente: bool):
+    """(c1, c2, ...) > (v1, v2, ...) (ou <) escrito como faixa na primeira coluna
+
+    c1 >= v1 AND (c1 > v1 OR (c2, ...) > (v2, ...)): o banco busca direto a
+    posição no índice em vez de avaliar um OR de igualdades linha a linha.
+    """
+    coluna, valor = colunas[0], valores[0]
+    depois = coluna > valor if crescente else coluna < valor
+    if len(colunas) == 1:
+        return depois
+    ate = coluna >= valor if crescente else coluna <= valor
+    return and_(ate, or_(depois, _faixa(colunas[1:], valores[1:], crescente)))
+
+
+def codificar_cursor(ordem: OrdemKeyset, valores: Sequence, anterior: bool = False) -> str:
+    """Token opaco (base64 url-safe) com a ordem, o sentido e a posição"""
+    dados = {
+        'o': ordem.nome,
+        'd': 'a' if anterior else 'p',
+        'v': [valor.isoformat() if isinstance(valor, datetime) else valor for valor in valores],
+    }
+    texto = json.dumps(dados, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(texto).decode('ascii').rstrip('=')
+
+
+def decodificar_cursor(token: str, ordem: OrdemKeyset) -> Tuple[List, bool]:
+    """(posição, anterior) de um token; ValueError se inválido ou de outra ordem"""
+    try:
+        texto = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        dados = json.loads(texto)
+        valores, sentido = dados['v'], dados['d']
+    except (ValueError, TypeError, KeyError):
+        raise ValueError('Cursor inválido')
+    if dados.get('o') != ordem.nome or sentido not in ('p', 'a') or \
+            not isinstance(valores, list) or len(valores) != len(ordem.colunas):
+        raise ValueError('Cursor inválido para esta ordenação')
+
+    posicao = []
+    for coluna, valor in zip(ordem.colunas, valores):
+        if valor is not None and coluna.type.python_type is datetime:
+            valor = datetime.fromisoformat(valor)
+        posicao.append(valor)
+    return posicao, sentido == 'a'
+
+
+def pagina_keyset(consulta, ordem: OrdemKeyset, por_pagina: int, cursor: Optional[str] = None) -> Dict:
+    """Uma página da consulta (Query do Flask-SQLAlchemy) a partir de um cursor
+
+    Returns:
+        {'itens': [...], 'proximo': token ou None, 'anterior': token ou None}
+    """
+    anterior, trechos = False, [None]
+    if cursor:
+        posicao, anterior = decodificar_cursor(cursor, ordem)
+        trechos = ordem.depois_de(posicao, anterior)
+
+    # Uma linha a mais só para saber se existe outra página nesse sentido
+    itens = []
+    for trecho in trechos:
+        consulta_trecho = consulta if trecho is None else consulta.filter(trecho)
+        itens += consulta_trecho.order_by(*ordem.ordenar(anterior)).limit(por_pagina + 1 - len(itens)).all()
+        if len(itens) > por_pagina:
+            break
+    mais = len(itens) > por_pagina
+    itens = itens[:por_pagina]
+    if anterior:
+        itens.reverse()
+
+    pagina = {'itens': itens, 'proximo': None, 'anterior': None}
+    if itens:
+        # Veio de um cursor: existe página do lado de onde ele aponta
+        if mais or (cursor and anterior):
+            pagina['proximo'] = codificar_cursor(ordem, ordem.posicao(itens[-1]))
+        if (mais and anterior) or (cursor and not anterior):
+            pagina['anterior'] = codificar_cursor(ordem, ordem.posicao(itens[0]), anterior=True)
+    return pagina
+
+
+class TotaisEmCache:
+    """Totais por busca guardados por `ttl` segundos e recalculados em segundo plano
+
+    A chave é qualquer valor hashable que identifique a busca (o termo, ou uma
+    tupla com o termo e os filtros).
+    """
+
+    def __init__(self, contar: Callable[[Hashable], int], ttl: Optional[float] = None,
+                 estimar: Optional[Callable[[Hashable], Optional[int]]] = None, maximo: int = 256):
+        """
+        Args:
+            contar: total exato de uma busca (o COUNT), chamado fora da requisição
+            ttl: segundos de validade; padrão PAGINACAO_TOTAL_TTL (60). 0 conta sempre
+            estimar: estimativa barata usada enquanto não há total (ex.: estatística da tabela)
+            maximo: buscas diferentes guardadas (as mais antigas saem)
+        """
+        if ttl is None:
+            ttl = float(os.getenv('PAGINACAO_TOTAL_TTL', 60))
+        self.contar = contar
+        self.estimar = estimar
+        self.ttl = ttl
+        self.maximo = maximo
+        self._totais: 'OrderedDict[Hashable, Tuple[int, float]]' = OrderedDict()
+        self._calculando = set()
+        self._lock = threading.Lock()
+
+    def obter(self, chave: Hashable = '', esperar: bool = False) -> Tuple[Optional[int], bool]:
+        """(total, aproximado) de uma busca
+
+        Com esperar=True, uma busca ainda sem total é contada na hora; senão a
+        contagem vai para uma thread e volta a estimativa (ou None).
+        """
+        if self.ttl <= 0:
+            return self.contar(chave), False
+
+        with self._lock:
+            entrada = self._totais.get(chave)
+        if entrada is not None:
+            total, calculado_em = entrada
+            if time.monotonic() - calculado_em < self.ttl:
+                return total, False
+            self._recalcular_em_segundo_plano(chave)
+            return total, True
+
+        if esperar:
+            return self._recalcular(chave), False
+        self._recalcular_em_segundo_plano(chave)
+        estimativa = self.estimar(chave) if self.estimar else None
+        return estimativa, True
+
+    def _recalcular(self, chave: Hashable) -> int:
+        total = self.contar(chave)
+        with self._lock:
+            self._totais[chave] = (total, time.monotonic())
+            self._totais.move_to_end(chave)
+            while len(self._totais) > self.maximo:
+                self._totais.popitem(last=False)
+        return total
+
+    def _recalcular_em_segundo_plano(self, chave: Hashable):
+        with self._lock:
+            if chave in self._calculando:
+                return
+            self._calculando.add(chave)
+
+        def recalcular():
+            try:
+                self._recalcular(chave)
+            except Exception as e:
+                print(f"⚠️ Erro ao recalcular total {chave!r}: {e}")
+            finally:
+                with self._lock:
+                    self._calculando.discard(chave)
+
+        threading.Thread(target=recalcular, daemon=True).start()
+
+    def aguardar(self, timeout: float = 5.0) -> bool:
+        """Espera as contagens em andamento terminarem (testes e benchmarks)"""
+        limite = time.monotonic() + timeout
+        while time.monotonic() < limite:
+            with self._lock:
+                if not self._calculando:
+                    return True
+            time.sleep(0.01)
+        return False
+
+    def vencer(self):
+        """Marca todos os totais como vencidos sem esquecê-los (ex.: placas gravadas)
+
+        A próxima consulta de cada busca devolve o total anterior como
+        aproximado e o reconta em segundo plano.
+        """
+        with self._lock:
+            for chave in list(self._totais):
+                total, _ = self._totais[chave]
+                self._totais[chave] = (total, float('-inf'))
+
+    def invalidar(self, chave: Optional[Hashable] = None):
+        """Esquece o total de uma busca (ou de todas)"""
+        with self._lock:
+            if chave is None:
+                self._totais.clear()
+            else:
+                self._totais.pop(chave, None)
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Gravação em lote dos resultados do scraping
+
+Em vez de SELECT + INSERT/UPDATE + commit por placa (e mais um commit para o
+histórico), o worker acumula os resultados e os grava de uma vez: um
+INSERT ... ON DUPLICATE KEY UPDATE com várias linhas (ON CONFLICT no SQLite),
+um UPDATE por status dos itens da fila e um UPDATE por histórico, tudo em uma
+única transação. O lote é descarregado por tamanho ou por tempo.
+
+Os itens são fechados antes das placas: só as placas de itens cujo lease ainda
+era deste worker são gravadas, para não sobrescrever o resultado de quem
+reservou o item depois que o lease venceu.
+"""
+
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects import mysql, sqlite, postgresql
+
+from app import (db, Placa, ItemFila, HistoricoScraping, cache_respostas,
+                 dados_para_insercao, dados_para_atualizacao, nomes_para_ids, salvar_dados_placa,
+                 get_current_time_gmt3)
+
+# Construtores de INSERT com upsert por dialeto
+_INSERTS = {
+    'mysql': mysql.insert,
+    'sqlite': sqlite.insert,
+    'postgresql': postgresql.insert,
+}
+
+# Campos gravados pelo id da tabela de nomes
+_COLUNAS_NOMES = {'marca': 'marca_id', 'combustivel': 'combustivel_id'}
+
+
+class GravadorLotes:
+    """Acumula resultados do worker e grava em lote"""
+
+    def __init__(self, worker_id: str, tamanho_lote: int = 50, intervalo_max: float = 5.0):
+        """
+        Args:
+            worker_id: dono dos leases; só itens ainda reservados por ele são fechados
+            tamanho_lote: resultados acumulados que disparam a gravação
+            intervalo_max: segundos máximos entre o primeiro resultado do lote e a gravação
+        """
+        self.worker_id = worker_id
+        self.tamanho_lote = tamanho_lote
+        self.intervalo_max = intervalo_max
+
+        self._placas: Dict[str, Dict[str, str]] = {}
+        self._itens: List[tuple] = []  # (item_id, historico_id, status, placa com dados ou None)
+        self._inicio_lote: Optional[float] = None
+
+        self.lotes_gravados = 0
+        self.placas_gravadas = 0
+
+    def __len__(self):
+        return len(self._itens)
+
+    @property
+    def itens_pendentes(self) -> List[int]:
+        """Ids dos itens da fila aguardando gravação (o heartbeat renova seus leases)"""
+        return [item_id for item_id, _, _, _ in self._itens]
+
+    def adicionar(self, item_id: int, historico_id: int, status: str,
+                  placa: Optional[str] = None, dados: Optional[Dict[str, str]] = None):
+        """Acumula o fechamento de um item e, se houver, os dados da placa"""
+        if self._inicio_lote is None:
+            self._inicio_lote = time.monotonic()
+        if placa and dados:
+            self._placas[placa] = dados
+        else:
+            placa = None
+        self._itens.append((item_id, historico_id, status, placa))
+
+    def tempo_restante(self) -> Optional[float]:
+        """Segundos até o lote atual vencer por tempo (None se vazio)"""
+        if self._inicio_lote is None:
+            return None
+        return max(0.0, self.intervalo_max - (time.monotonic() - self._inicio_lote))
+
+    def precisa_descarregar(self) -> bool:
+        return bool(self._itens) and (len(self._itens) >= self.tamanho_lote or self.tempo_restante() == 0)
+
+    def _upsert_placas(self, placas: Optional[Dict[str, Dict[str, str]]] = None):
+        """Grava as placas (padrão: as do lote) com um INSERT multi-linha por conjunto de colunas"""
+        placas = self._placas if placas is None else placas
+        insert = _INSERTS.get(db.engine.dialect.name)
+        if insert is None:
+            # Dialeto sem upsert conhecido: caminho linha a linha
+            for placa, dados in placas.items():
+                salvar_dados_placa(placa, dados)
+            return
+
+        agora = get_current_time_gmt3()
+
+        # Placas que atualizam as mesmas colunas vão no mesmo comando
+        grupos = defaultdict(list)
+        for placa, dados in placas.items():
+            colunas_update = tuple(sorted(_COLUNAS_NOMES.get(c, c) for c in dados_para_atualizacao(dados)))
+            linha = dados_para_insercao(dados)
+            linha.setdefault('status', 'pendente')
+            linha['placa'] = placa
+            linha['data_scraping'] = agora
+            grupos[colunas_update].append(linha)
+        # Marcas e combustíveis do lote inteiro: um SELECT (e um INSERT dos novos) por tabela
+        nomes_para_ids([linha for linhas in grupos.values() for linha in linhas])
+
+        for colunas_update, linhas in grupos.items():
+            # Todas as linhas de um INSERT multi-linha precisam das mesmas chaves
+            colunas = set().union(*linhas)
+            valores = [{c: linha.get(c) for c in colunas} for linha in linhas]
+
+            stmt = insert(Placa.__table__).values(valores)
+            if db.engine.dialect.name == 'mysql':
+                novos = stmt.inserted
+            else:
+                novos = stmt.excluded
+
+            set_ = {c: novos[c] for c in colunas_update}
+            set_['status'] = 'atualizado'
+            set_['data_scraping'] = novos['data_scraping']
+
+            if db.engine.dialect.name == 'mysql':
+                stmt = stmt.on_duplicate_key_update(set_)
+            else:
+                stmt = stmt.on_conflict_do_update(index_elements=['placa'], set_=set_)
+            db.session.execute(stmt)
+
+    def _fechar_itens(self):
+        """
+        Fecha os itens ainda reservados por este worker, um UPDATE por (histórico, status)
+
+        Returns:
+            ids dos itens fechados e {historico_id: itens concluídos}
+        """
+        por_grupo = defaultdict(list)
+        for item_id, historico_id, status, _ in self._itens:
+            por_grupo[(historico_id, status)].append(item_id)
+
+        def condicao(ids):
+            return (ItemFila.id.in_(ids), ItemFila.worker_id == self.worker_id,
+                    ItemFila.status == 'em_execucao')
+
+        retornar = db.engine.dialect.update_returning
+        if not retornar:
+            # Sem UPDATE ... RETURNING (MySQL): trava as linhas ainda nossas antes de fechá-las
+            nossos = set(db.session.execute(
+                select(ItemFila.id).where(*condicao([item[0] for item in self._itens])).with_for_update()
+            ).scalars())
+
+        fechados = set()
+        concluidos = defaultdict(int)
+        agora = get_current_time_gmt3()
+        for (historico_id, status), ids in por_grupo.items():
+            if not retornar:
+                ids = [item_id for item_id in ids if item_id in nossos]
+                if not ids:
+                    continue
+            stmt = update(ItemFila).where(*condicao(ids)).values(status=status, lease_ate=None, atualizado_em=agora)
+            if retornar:
+                grupo = set(db.session.execute(stmt.returning(ItemFila.id)).scalars())
+            else:
+                db.session.execute(stmt)
+                grupo = set(ids)
+            fechados |= grupo
+            if status == 'concluido':
+                concluidos[historico_id] += len(grupo)
+        return fechados, concluidos
+
+    def descartar(self):
+        """Esquece o lote atual sem gravar"""
+        self._placas.clear()
+        self._itens.clear()
+        self._inicio_lote = None
+
+    def descarregar(self):
+        """Grava o lote atual em uma transação; retorna os históricos afetados"""
+        if not self._itens:
+            return set()
+
+        inicio = time.time()
+        try:
+            fechados, processadas = self._fechar_itens()
+            if len(fechados) != len(self._itens):
+                print(f"   ⚠️  {len(self._itens) - len(fechados)} item(ns) com lease perdido no lote")
+
+            # Só placas de itens fechados agora; as outras são de quem tem o lease
+            placas = {placa: self._placas[placa] for item_id, _, _, placa in self._itens
+                      if placa and item_id in fechados}
+            if placas:
+                self._upsert_placas(placas)
+
+            # Contadores do histórico: uma vez por lote
+            for historico_id, quantidade in processadas.items():
+                if quantidade:
+                    db.session.execute(
+                        update(HistoricoScraping)
+                        .where(HistoricoScraping.id == historico_id)
+                        .values(placas_processadas=HistoricoScraping.placas_processadas + quantidade)
+                    )
+
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+        if placas:
+            # Depois do commit: o que foi montado com os dados anteriores fica com a versão antiga
+            cache_respostas.invalidar_placas(placas)
+
+        historicos = {historico_id for _, historico_id, _, _ in self._itens}
+        self.lotes_gravados += 1
+        self.placas_gravadas += len(placas)
+        print(f"   💾 Lote gravado: {len(placas)} placas, {len(fechados)} itens "
+              f"em {(time.time() - inicio) * 1000:.0f}ms")
+
+        self.descartar()
+        return historicos
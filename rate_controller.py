@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Controle adaptativo de ritmo das consultas (token bucket + AIMD por fonte)
+
+Cada fonte (requests, selenium, alternative...) tem seu próprio balde de tokens.
+A taxa de reposição sobe um pouco a cada resposta saudável (aumento aditivo) e
+cai pela metade a cada bloqueio ou timeout (redução multiplicativa), sempre
+entre os limites configurados em SCRAPING_DELAY_MIN e SCRAPING_DELAY_MAX.
+
+Os baldes vivem na memória do processo: N processos com scraping (worker
+embutido e cada `python worker.py`) consultam o site N vezes mais rápido.
+SCRAPING_WORKERS informa esse N e do_ambiente multiplica os intervalos por ele,
+dividindo a taxa configurada entre os processos.
+"""
+
+import os
+import threading
+import time
+from typing import Dict, Optional, Union
+
+# Respostas que indicam que o site está pedindo para irmos mais devagar
+STATUS_BLOQUEIO = {403, 429, 503}
+
+
+class _Balde:
+    """Estado do token bucket de uma fonte"""
+
+    def __init__(self, taxa: float, capacidade: float):
+        self.taxa = taxa
+        self.tokens = capacidade
+        self.atualizado = time.monotonic()
+        self.sucessos = 0
+        self.bloqueios = 0
+
+
+class ControladorTaxa:
+    """Token bucket por fonte com taxa ajustada por AIMD"""
+
+    def __init__(self, intervalo_min: float = 2.0, intervalo_max: float = 120.0,
+                 intervalo_inicial: float = 30.0, passos_ate_maximo: int = 20,
+                 fator_reducao: float = 0.5, capacidade: float = 1.0):
+        """
+        Args:
+            intervalo_min: menor intervalo entre consultas de uma fonte (piso), em segundos
+            intervalo_max: maior intervalo entre consultas de uma fonte (teto), em segundos
+            intervalo_inicial: intervalo usado antes de qualquer resposta
+            passos_ate_maximo: respostas saudáveis para ir do teto ao piso do intervalo
+            fator_reducao: fator aplicado à taxa em cada bloqueio/timeout
+            capacidade: tamanho do balde (consultas que podem sair em rajada)
+        """
+        if intervalo_min <= 0 or intervalo_max < intervalo_min:
+            raise ValueError("Limites de intervalo inválidos")
+
+        self.taxa_max = 1.0 / intervalo_min
+        self.taxa_min = 1.0 / intervalo_max
+        self.taxa_inicial = self._limitar(1.0 / max(intervalo_inicial, 1e-9))
+        self.aumento = (self.taxa_max - self.taxa_min) / max(passos_ate_maximo, 1)
+        self.fator_reducao = fator_reducao
+        self.capacidade = capacidade
+
+        self._baldes: Dict[str, _Balde] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def do_ambiente(cls) -> 'ControladorTaxa':
+        """Cria o controlador com os limites do .env
+
+        SCRAPING_DELAY_MIN / SCRAPING_DELAY_MAX definem piso e teto do intervalo.
+        SCRAPING_DELAY_INICIAL é o ponto de partida; se ausente, usa a média da
+        antiga sequência fixa SCRAPING_DELAYS (ex.: 30,45,65,48).
+        Os três valem para o site como um todo: com SCRAPING_WORKERS processos,
+        cada um usa intervalos SCRAPING_WORKERS vezes maiores.
+        """
+        processos = int(os.getenv('SCRAPING_WORKERS', 1))
+        if processos < 1:
+            raise ValueError("SCRAPING_WORKERS deve ser pelo menos 1")
+
+        intervalo_min = float(os.getenv('SCRAPING_DELAY_MIN', 2))
+        intervalo_max = float(os.getenv('SCRAPING_DELAY_MAX', 120))
+
+        inicial = os.getenv('SCRAPING_DELAY_INICIAL')
+        if inicial is None:
+            delays = [float(d) for d in os.getenv('SCRAPING_DELAYS', '').split(',') if d.strip()]
+            inicial = sum(delays) / len(delays) if delays else 30
+        intervalo_inicial = min(max(float(inicial), intervalo_min), intervalo_max)
+
+        # Taxa do site dividida entre os processos
+        intervalo_min *= processos
+        intervalo_max *= processos
+        intervalo_inicial *= processos
+
+        return cls(intervalo_min=intervalo_min, intervalo_max=intervalo_max,
+                   intervalo_inicial=intervalo_inicial)
+
+    def _limitar(self, taxa: float) -> float:
+        return min(max(taxa, self.taxa_min), self.taxa_max)
+
+    def _balde(self, fonte: str) -> _Balde:
+        """Retorna o balde da fonte (chamar com o lock)"""
+        balde = self._baldes.get(fonte)
+        if balde is None:
+            balde = _Balde(self.taxa_inicial, self.capacidade)
+            self._baldes[fonte] = balde
+        return balde
+
+    def _repor(self, balde: _Balde, agora: float):
+        """Repõe os tokens acumulados desde a última atualização (chamar com o lock)"""
+        balde.tokens = min(self.capacidade, balde.tokens + (agora - balde.atualizado) * balde.taxa)
+        balde.atualizado = agora
+
+    def aguardar(self, fonte: str) -> float:
+        """Bloqueia até haver um token para a fonte; retorna o tempo esperado"""
+        esperado = 0.0
+        while True:
+            with self._lock:
+                balde = self._balde(fonte)
+                agora = time.monotonic()
+                self._repor(balde, agora)
+                if balde.tokens >= 1:
+                    balde.tokens -= 1
+                    return esperado
+                espera = (1 - balde.tokens) / balde.taxa
+
+            print(f"   ⏰ Aguardando {espera:.1f} segundos ({fonte})...")
+            time.sleep(espera)
+            esperado += espera
+
+    def registrar(self, fonte: str, status: Optional[Union[int, str]], sucesso: bool):
+        """Ajusta a taxa da fonte a partir do resultado de uma consulta
+
+        Args:
+            fonte: nome da fonte consultada
+            status: último status HTTP, 'timeout' ou None quando não se aplica
+            sucesso: se a consulta trouxe dados
+        """
+        with self._lock:
+            balde = self._balde(fonte)
+            self._repor(balde, time.monotonic())
+            anterior = balde.taxa
+
+            if status == 'timeout' or status in STATUS_BLOQUEIO:
+                balde.bloqueios += 1
+                balde.taxa = self._limitar(balde.taxa * self.fator_reducao)
+                # Esvazia o balde: a próxima consulta espera o intervalo novo inteiro
+                balde.tokens = min(balde.tokens, 0)
+            elif sucesso or status == 200:
+                balde.sucessos += 1
+                balde.taxa = self._limitar(balde.taxa + self.aumento)
+            else:
+                return
+
+            if balde.taxa < anterior:
+                print(f"   🐢 {fonte}: recebeu {status}, intervalo agora {1 / balde.taxa:.1f}s")
+
+    def intervalo(self, fonte: str) -> float:
+        """Intervalo atual entre consultas da fonte, em segundos"""
+        with self._lock:
+            return 1.0 / self._balde(fonte).taxa
+
+    def estatisticas(self) -> Dict[str, Dict[str, float]]:
+        """Intervalo atual e contadores de cada fonte"""
+        with self._lock:
+            return {
+                fonte: {
+                    "intervalo": round(1.0 / balde.taxa, 2),
+                    "sucessos": balde.sucessos,
+                    "bloqueios": balde.bloqueios,
+                }
+                for fonte, balde in self._baldes.items()
+            }
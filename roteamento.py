@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Roteamento aprendido entre endpoints de consulta
+
+Cada rota (ex.: caminho do POST + formato do formulário) tem uma nota de saúde
+que é uma média móvel exponencial dos resultados: sucessos puxam para 1,
+falhas para 0 e o histórico antigo perde peso a cada tentativa. A rota que
+deu certo por último é a "vencedora" e é a única tentada enquanto continuar
+funcionando; só depois de `falhas_para_sondar` falhas seguidas dela todas as
+rotas são sondadas de novo, em ordem de saúde.
+"""
+
+import threading
+from typing import Dict, Hashable, List, Optional, Sequence
+
+
+class RoteadorEndpoints:
+    """Escolhe a ordem das rotas a tentar a partir dos resultados anteriores"""
+
+    def __init__(self, rotas: Sequence[Hashable], fator: float = 0.8, falhas_para_sondar: int = 2):
+        """
+        Args:
+            rotas: rotas candidatas, na ordem usada enquanto nada foi aprendido
+            fator: peso do histórico na nota de saúde (0-1; maior = esquece mais devagar)
+            falhas_para_sondar: falhas seguidas da vencedora antes de sondar todas as rotas
+        """
+        self.rotas = list(rotas)
+        self.fator = fator
+        self.falhas_para_sondar = falhas_para_sondar
+
+        self.saude: Dict[Hashable, float] = {rota: 0.5 for rota in self.rotas}
+        self.vencedora: Optional[Hashable] = None
+        self.falhas_vencedora = 0
+        self.sondagens = 0
+        self._lock = threading.Lock()
+
+    def _vencedora_confiavel(self) -> bool:
+        return self.vencedora is not None and self.falhas_vencedora < self.falhas_para_sondar
+
+    def precisa_sondar(self) -> bool:
+        """Se a próxima consulta tentaria todas as rotas (sem vencedora confiável)"""
+        with self._lock:
+            return not self._vencedora_confiavel()
+
+    def ordem(self) -> List[Hashable]:
+        """Rotas a tentar nesta consulta: só a vencedora, ou todas por saúde"""
+        with self._lock:
+            if self._vencedora_confiavel():
+                return [self.vencedora]
+            self.sondagens += 1
+            # sorted é estável: em empate vale a ordem original
+            return sorted(self.rotas, key=lambda rota: -self.saude[rota])
+
+    def registrar(self, rota: Hashable, sucesso: bool):
+        """Atualiza a saúde da rota e a vencedora"""
+        with self._lock:
+            self.saude[rota] = self.saude[rota] * self.fator + (1 - self.fator) * (1.0 if sucesso else 0.0)
+            if sucesso:
+                if rota != self.vencedora:
+                    print(f"   🧭 Nova rota preferida: {rota}")
+                self.vencedora = rota
+                self.falhas_vencedora = 0
+            elif rota == self.vencedora:
+                self.falhas_vencedora += 1
+
+    def estatisticas(self) -> Dict:
+        with self._lock:
+            return {
+                "vencedora": str(self.vencedora) if self.vencedora is not None else None,
+                "falhas_vencedora": self.falhas_vencedora,
+                "sondagens": self.sondagens,
+                "saude": {str(rota): round(nota, 3) for rota, nota in self.saude.items()},
+            }
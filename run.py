@@ -19,17 +19,15 @@ def check_python_version():
 
 def check_dependencies():
     """Verifica se as dependências estão instaladas"""
-    try:
-        import flask
-        import requests
-        import bs4
-        import selenium
-        print("✅ Todas as dependências estão instaladas")
-        return True
-    except ImportError as e:
-        print(f"❌ Dependência não encontrada: {e}")
+    # find_spec só localiza os pacotes: Selenium e cia. não são importados na inicialização
+    from importlib.util import find_spec
+    faltando = [nome for nome in ('flask', 'requests', 'bs4', 'selenium') if find_spec(nome) is None]
+    if faltando:
+        print(f"❌ Dependência não encontrada: {', '.join(faltando)}")
         print("Execute: pip install -r requirements.txt")
         return False
+    print("✅ Todas as dependências estão instaladas")
+    return True
 
 def create_directories():
     """Cria diretórios necessários"""
@@ -39,9 +37,10 @@ def create_directories():
 def setup_database():
     """Configura o banco de dados"""
     try:
-        from app import app, db
+        from app import app, db, busca_placas
         with app.app_context():
             db.create_all()
+            busca_placas.criar_indice()
         print("✅ Banco de dados configurado")
         return True
     except Exception as e:
@@ -78,7 +77,8 @@ def main():
     
     # Inicia o servidor Flask
     try:
-        from app import app
+        from app import app, retomar_scraping_pendente
+        retomar_scraping_pendente(com_reloader=True)
         app.run(debug=True, host='0.0.0.0', port=5000)
     except KeyboardInterrupt:
         print("\n\n👋 Servidor parado pelo usuário")
@@ -1,28 +1,56 @@
 import requests
-from bs4 import BeautifulSoup
 import time
 import random
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.service import Service
-from webdriver_manager.chrome import ChromeDriverManager
-from selenium.webdriver.chrome.options import Options
+import os
+import threading
+from driver_pool import PoolChromeDriver
+from transporte_http import obter_transporte
+from cookies_sessao import InicializadorSessao
+from selenium.common.exceptions import JavascriptException
+from validacao_placas import formato_valido
+from extracao import classes_das_tabelas, extrair_dados_no_navegador, extrair_dados_tabela, localizar_tabela
 
 class PlacaFipeScraper:
-    def __init__(self):
-        self.base_url = "https://placafipe.com/"
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+    def __init__(self, tamanho_pool=None, abas_por_navegador=None, max_paginas_navegador=None,
+                 base_url=None):
+        """
+        Args:
+            tamanho_pool: navegadores Chrome mantidos abertos (SELENIUM_POOL_TAMANHO)
+            abas_por_navegador: abas por navegador (SELENIUM_ABAS_POR_NAVEGADOR)
+            max_paginas_navegador: páginas antes de reciclar um navegador (SELENIUM_MAX_PAGINAS)
+            base_url: site consultado (ex.: o servidor_replay local); padrão placafipe.com
+        """
+        self.base_url = base_url.rstrip('/') + '/' if base_url else "https://placafipe.com/"
+        paginas_iniciais = [self.base_url] if base_url else [
+            self.base_url, 'https://www.placafipe.com/', 'https://placafipe.com.br/'
+        ]
+        # Sessão do fallback requests (cookies mantidos entre placas) sobre o pool compartilhado
+        self.session = obter_transporte().criar_sessao({'Referer': 'https://www.google.com/'})
+        # Cookies da página inicial, preparados uma vez e renovados só ao expirar ou em 403
+        self.inicializador = InicializadorSessao(
+            self.session,
+            paginas_iniciais,
+            nome='placafipe_selenium_fallback'
+        )
+        
+        self.tamanho_pool = tamanho_pool or int(os.getenv('SELENIUM_POOL_TAMANHO', 2))
+        self.abas_por_navegador = abas_por_navegador or int(os.getenv('SELENIUM_ABAS_POR_NAVEGADOR', 1))
+        self.max_paginas_navegador = max_paginas_navegador or int(os.getenv('SELENIUM_MAX_PAGINAS', 50))
+        self.pool = None
+        self._pool_lock = threading.Lock()
+        
+        # Status HTTP da última resposta do fallback requests (ou 'timeout')
+        self.ultimo_status = None
         
     def scraping_placa(self, placa):
         """
         Faz o scraping de uma placa específica
         """
         print(f"      🌐 Iniciando scraping para placa: {placa}")
+        self.ultimo_status = None
         
         try:
             # Usar Selenium para melhor compatibilidade
@@ -48,107 +76,69 @@ class PlacaFipeScraper:
             traceback.print_exc()
             return None
     
+    def _obter_pool(self):
+        """Cria o pool de navegadores na primeira consulta via Selenium"""
+        with self._pool_lock:
+            if self.pool is None:
+                self.pool = PoolChromeDriver(
+                    tamanho=self.tamanho_pool,
+                    abas_por_navegador=self.abas_por_navegador,
+                    max_paginas=self.max_paginas_navegador,
+                    headless=os.getenv('SELENIUM_HEADLESS', 'true').lower() != 'false'
+                )
+            return self.pool
+    
     def _scraping_selenium(self, placa):
         """
-        Scraping usando Selenium
+        Scraping usando Selenium (navegador reservado do pool)
         """
-        driver = None
         try:
-            print(f"        🚗 Configurando Chrome...")
-            
-            # Configurar Chrome
-            chrome_options = Options()
-            chrome_options.add_argument("--headless")
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("--disable-gpu")
-            chrome_options.add_argument("--window-size=1920,1080")
-            chrome_options.add_argument("--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-            chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-            chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-            chrome_options.add_experimental_option('useAutomationExtension', False)
-            
-            print(f"        🔧 Instalando ChromeDriver...")
-            try:
-                service = Service(ChromeDriverManager().install())
-                print(f"        ✅ ChromeDriver instalado")
-            except Exception as e:
-                print(f"        ❌ Erro ao instalar ChromeDriver: {e}")
-                print(f"        🔄 Tentando método alternativo...")
-                # Tentar usar chromedriver do sistema
-                import subprocess
-                try:
-                    result = subprocess.run(['which', 'chromedriver'], capture_output=True, text=True)
-                    if result.returncode == 0:
-                        chromedriver_path = result.stdout.strip()
-                        print(f"        📍 ChromeDriver encontrado em: {chromedriver_path}")
-                        service = Service(chromedriver_path)
-                    else:
-                        print(f"        ❌ ChromeDriver não encontrado no sistema")
-                        return None
-                except Exception as e2:
-                    print(f"        ❌ Erro ao procurar ChromeDriver: {e2}")
-                    return None
-            
-            print(f"        🚀 Iniciando Chrome...")
-            driver = webdriver.Chrome(service=service, options=chrome_options)
-            
-            # Executar script para evitar detecção
-            driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-            
-            print(f"        🌐 Acessando site...")
-            driver.get(self.base_url)
+            timeout = int(os.getenv('SELENIUM_TIMEOUT', 15))
             
-            # Aguardar carregamento da página
-            wait = WebDriverWait(driver, 15)
-            
-            print(f"        🔍 Procurando campo de placa...")
-            # Encontrar campo de placa
-            campo_placa = wait.until(
-                EC.presence_of_element_located((By.ID, "sPlaca"))
-            )
-            
-            print(f"        ✏️  Inserindo placa: {placa}")
-            # Limpar e inserir placa
-            campo_placa.clear()
-            campo_placa.send_keys(placa)
-            
-            print(f"        🔘 Procurando botão de pesquisa...")
-            # Encontrar e clicar no botão de pesquisa
-            botao_pesquisa = driver.find_element(By.XPATH, "//button[@type='submit']")
-            botao_pesquisa.click()
-            
-            print(f"        ⏳ Aguardando resultados...")
-            # Aguardar carregamento dos resultados
-            time.sleep(5)
-            
-            # Verificar se há resultados
-            try:
+            with self._obter_pool().obter_aba() as aba:
+                def preencher_formulario(driver):
+                    print(f"        🌐 Acessando site...")
+                    driver.get(self.base_url)
+                    
+                    print(f"        🔍 Procurando campo de placa...")
+                    # Encontrar campo de placa
+                    campo_placa = WebDriverWait(driver, timeout).until(
+                        EC.presence_of_element_located((By.ID, "sPlaca"))
+                    )
+                    
+                    print(f"        ✏️  Inserindo placa: {placa}")
+                    # Limpar e inserir placa
+                    campo_placa.clear()
+                    campo_placa.send_keys(placa)
+                    
+                    print(f"        🔘 Procurando botão de pesquisa...")
+                    # Encontrar e clicar no botão de pesquisa
+                    botao_pesquisa = driver.find_element(By.XPATH, "//button[@type='submit']")
+                    botao_pesquisa.click()
+                
+                aba.executar(preencher_formulario)
+                aba.registrar_pagina()
+                
+                print(f"        ⏳ Aguardando resultados...")
+                # Aguardar fora do lock para as outras abas do navegador seguirem
+                time.sleep(5)
+                
                 print(f"        📊 Procurando tabela de resultados...")
-                tabela_resultado = wait.until(
-                    EC.presence_of_element_located((By.CLASS_NAME, "fipeTablePriceDetail"))
+                tabelas = aba.aguardar(
+                    lambda driver: driver.find_elements(By.CLASS_NAME, "fipeTablePriceDetail"),
+                    timeout=timeout
                 )
+                if not tabelas:
+                    print(f"        ⚠️  Nenhum resultado encontrado para a placa {placa}")
+                    return None
                 
                 print(f"        ✅ Tabela encontrada, extraindo dados...")
                 # Extrair dados da tabela
-                dados = self._extrair_dados_tabela(tabela_resultado)
-                return dados
-                
-            except Exception as e:
-                print(f"        ⚠️  Nenhum resultado encontrado para a placa {placa}: {e}")
-                return None
+                return aba.executar(lambda driver: self._extrair_dados_tabela(tabelas[0]))
                 
         except Exception as e:
             print(f"        ❌ Erro no Selenium para placa {placa}: {str(e)}")
             return None
-            
-        finally:
-            if driver:
-                try:
-                    driver.quit()
-                    print(f"        🚪 Chrome fechado")
-                except:
-                    pass
     
     def _scraping_requests(self, placa):
         """
@@ -157,58 +147,19 @@ class PlacaFipeScraper:
         try:
             print(f"        🌐 Tentando com requests...")
             
-            # Configurar headers mais realistas
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,image/apng,*/*;q=0.8',
-                'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8',
-                'Accept-Encoding': 'gzip, deflate, br',
-                'DNT': '1',
-                'Connection': 'keep-alive',
-                'Upgrade-Insecure-Requests': '1',
-                'Sec-Fetch-Dest': 'document',
-                'Sec-Fetch-Mode': 'navigate',
-                'Sec-Fetch-Site': 'none',
-                'Sec-Fetch-User': '?1',
-                'Cache-Control': 'max-age=0',
-                'Referer': 'https://www.google.com/'
-            }
-            
-            # Primeiro, acessar a página inicial para obter cookies
-            print(f"        🍪 Obtendo cookies da página inicial...")
-            session = requests.Session()
-            session.headers.update(headers)
-            
-            # Tentar acessar com diferentes URLs
-            urls_teste = [
-                self.base_url,
-                'https://www.placafipe.com/',
-                'https://placafipe.com.br/'
-            ]
-            
-            response_inicial = None
-            for url in urls_teste:
-                try:
-                    print(f"        🔗 Tentando URL: {url}")
-                    response_inicial = session.get(url, timeout=30)
-                    if response_inicial.status_code == 200:
-                        print(f"        ✅ URL funcionou: {url}")
-                        break
-                    else:
-                        print(f"        ⚠️  URL retornou {response_inicial.status_code}: {url}")
-                except Exception as e:
-                    print(f"        ❌ Erro ao acessar {url}: {e}")
-                    continue
-            
-            if not response_inicial or response_inicial.status_code != 200:
-                print(f"        ❌ Nenhuma URL funcionou")
-                return None
-            
-            print(f"        ✅ Página inicial acessada, cookies obtidos")
-            print(f"        📊 Tamanho da resposta: {len(response_inicial.content)} bytes")
+            session = self.session
             
-            # Aguardar um pouco para simular comportamento humano
-            time.sleep(3)
+            # Página inicial só quando os cookies não existem ou expiraram
+            preparada = self.inicializador.garantir()
+            if preparada is None:
+                print(f"        🍪 Sessão com cookies válidos, sem carregar a página inicial")
+            else:
+                self.ultimo_status = self.inicializador.ultimo_status
+                if not preparada:
+                    print(f"        ❌ Nenhuma URL funcionou")
+                    return None
+                # Aguardar um pouco para simular comportamento humano
+                time.sleep(3)
             
             # Fazer POST para o formulário
             data = {
@@ -216,13 +167,15 @@ class PlacaFipeScraper:
             }
             
             print(f"        📤 Enviando requisição POST para placa {placa}...")
-            response = session.post(self.base_url, data=data, headers=headers, timeout=30)
+            response = session.post(self.base_url, data=data)
+            self.ultimo_status = response.status_code
             
             print(f"        📥 Resposta recebida: {response.status_code}")
             print(f"        📊 Tamanho da resposta: {len(response.content)} bytes")
             
             if response.status_code == 403:
                 print(f"        🚫 Acesso bloqueado (403) - site pode estar detectando automação")
+                self.inicializador.invalidar()
                 print(f"        📄 Headers da resposta:")
                 for key, value in response.headers.items():
                     print(f"           {key}: {value}")
@@ -232,12 +185,9 @@ class PlacaFipeScraper:
                 print(f"        📄 Conteúdo da resposta: {response.text[:500]}...")
                 return None
             
-            # Parsear HTML
-            print(f"        🔍 Parseando HTML...")
-            soup = BeautifulSoup(response.content, 'html.parser')
-            
-            # Procurar pela tabela de resultados
-            tabela = soup.find('table', class_='fipeTablePriceDetail')
+            # Procurar pela tabela de resultados (só ela é parseada)
+            print(f"        🔍 Procurando tabela de resultados...")
+            tabela = localizar_tabela(response.text, 'fipeTablePriceDetail')
             
             if tabela:
                 print(f"        ✅ Tabela encontrada no HTML")
@@ -252,15 +202,17 @@ class PlacaFipeScraper:
                 
                 # Procurar por outras estruturas que possam conter os dados
                 print(f"        🔍 Procurando por outras estruturas...")
-                todas_tabelas = soup.find_all('table')
+                todas_tabelas = classes_das_tabelas(response.text)
                 print(f"        📊 Total de tabelas encontradas: {len(todas_tabelas)}")
                 
-                for i, tab in enumerate(todas_tabelas):
-                    print(f"        📋 Tabela {i+1}: classes='{tab.get('class', [])}'")
+                for i, classes in enumerate(todas_tabelas):
+                    print(f"        📋 Tabela {i+1}: classes='{classes}'")
                 
                 return None
                 
         except Exception as e:
+            if isinstance(e, requests.exceptions.Timeout):
+                self.ultimo_status = 'timeout'
             print(f"        ❌ Erro no requests para placa {placa}: {str(e)}")
             import traceback
             traceback.print_exc()
@@ -268,66 +220,26 @@ class PlacaFipeScraper:
     
     def _extrair_dados_tabela(self, tabela):
         """
-        Extrai os dados da tabela HTML
+        Extrai os dados da tabela HTML (WebElement, tag ou trecho HTML)
         """
-        dados = {}
-        
         try:
             print(f"        🔍 Extraindo dados da tabela...")
             
-            # Se for um WebElement do Selenium, converter para HTML
+            dados = None
+            
+            # WebElement do Selenium: extrair na própria página (só o JSON volta)
             if hasattr(tabela, 'get_attribute'):
-                html_content = tabela.get_attribute('outerHTML')
-                print(f"        📄 Convertendo WebElement para HTML...")
+                try:
+                    dados = extrair_dados_no_navegador(tabela.parent, tabela, aproximado=False)
+                except JavascriptException as e:
+                    print(f"        ⚠️  Extração no navegador falhou, usando outerHTML: {e.msg}")
+                    html_content = tabela.get_attribute('outerHTML')
             else:
                 html_content = str(tabela)
-                print(f"        📄 Usando HTML diretamente...")
             
-            # Parsear HTML
-            soup = BeautifulSoup(html_content, 'html.parser')
-            print(f"        🔍 HTML parseado, procurando linhas...")
-            
-            # Encontrar todas as linhas da tabela
-            linhas = soup.find_all('tr')
-            print(f"        📊 Encontradas {len(linhas)} linhas na tabela")
-            
-            for i, linha in enumerate(linhas):
-                colunas = linha.find_all('td')
-                if len(colunas) >= 2:
-                    chave = colunas[0].get_text(strip=True).replace(':', '')
-                    valor = colunas[1].get_text(strip=True)
-                    
-                    print(f"        📝 Linha {i+1}: {chave} = {valor}")
-                    
-                    # Mapear chaves para os campos do modelo
-                    if chave == 'Marca':
-                        dados['marca'] = valor
-                    elif chave == 'Genérico':
-                        dados['generico'] = valor
-                    elif chave == 'Modelo':
-                        dados['modelo'] = valor
-                    elif chave == 'Importado':
-                        dados['importado'] = valor
-                    elif chave == 'Ano':
-                        dados['ano'] = valor
-                    elif chave == 'Ano Modelo':
-                        dados['ano_modelo'] = valor
-                    elif chave == 'Cor':
-                        dados['cor'] = valor
-                    elif chave == 'Cilindrada':
-                        dados['cilindrada'] = valor
-                    elif chave == 'Combustível':
-                        dados['combustivel'] = valor
-                    elif chave == 'Chassi':
-                        dados['chassi'] = valor
-                    elif chave == 'Motor':
-                        dados['motor'] = valor
-                    elif chave == 'Passageiros':
-                        dados['passageiros'] = valor
-                    elif chave == 'UF':
-                        dados['uf'] = valor
-                    elif chave == 'Município':
-                        dados['municipio'] = valor
+            if dados is None:
+                # Só rótulos exatos da fipeTablePriceDetail ('Marca', 'Ano Modelo'...)
+                dados = extrair_dados_tabela(html_content, aproximado=False)
             
             print(f"        ✅ Dados extraídos: {len(dados)} campos")
             return dados
@@ -340,17 +252,9 @@ class PlacaFipeScraper:
     
     def validar_placa(self, placa):
         """
-        Valida o formato da placa
+        Valida o formato da placa (antigo ou Mercosul; para listas use validar_placas)
         """
-        import re
-        
-        # Padrões de placas brasileiras
-        padrao_mercosul = r'^[A-Za-z]{3}[0-9][A-Za-z][0-9]{2}$'
-        padrao_antigo = r'^[A-Za-z]{3}[0-9]{4}$'
-        
-        if re.match(padrao_mercosul, placa) or re.match(padrao_antigo, placa):
-            return True
-        return False
+        return formato_valido(placa)
     
     def gerar_placas_teste(self, quantidade=10):
         """
@@ -368,10 +272,12 @@ class PlacaFipeScraper:
         return placas
 
     def close(self):
-        """Fecha o driver do Chrome"""
+        """Fecha todos os navegadores do pool"""
         try:
-            if hasattr(self, 'driver') and self.driver:
-                self.driver.quit()
-                print("✅ Driver do Chrome fechado")
+            if self.pool:
+                self.pool.fechar()
+                self.pool = None
+                print("✅ Pool de navegadores Chrome fechado")
         except Exception as e:
-            print(f"⚠️  Erro ao fechar driver: {e}")
+            print(f"⚠️  Erro ao fechar pool de navegadores: {e}")
+        self.session.close()
@@ -4,33 +4,62 @@ Scraper Alternativo para placas - Tenta diferentes sites e métodos
 """
 
 import requests
-from bs4 import BeautifulSoup
+from extracao import extrair_dados_tabela, localizar_tabelas, texto_visivel
+from transporte_http import obter_transporte
+from disjuntor import Disjuntor
 import time
 import random
 from typing import Dict, Optional, List
 import re
+from urllib.parse import urlsplit
+
+# (rótulo, campo, formato do valor) procurados no texto da página; 'ano modelo' antes de 'ano'
+PADROES_GENERICOS = [
+    ('ano modelo', 'ano_modelo', r'\d{4}'),
+    ('marca', 'marca', r'[^\n\r<]+'),
+    ('modelo', 'modelo', r'[^\n\r<]+'),
+    ('ano', 'ano', r'\d{4}'),
+    ('cor', 'cor', r'[^\n\r<]+'),
+    ('combustível', 'combustivel', r'[^\n\r<]+'),
+    ('chassi', 'chassi', r'[^\n\r<]+'),
+    ('motor', 'motor', r'[^\n\r<]+'),
+    ('passageiros', 'passageiros', r'\d+'),
+    ('uf', 'uf', r'[A-Z]{2}'),
+    ('município', 'municipio', r'[^\n\r<]+'),
+    ('cilindrada', 'cilindrada', r'[^\n\r<]+'),
+    ('importado', 'importado', r'[^\n\r<]+'),
+    ('genérico', 'generico', r'[^\n\r<]+'),
+]
+
+# Uma alternação só, com um grupo nomeado por campo: o texto é percorrido uma vez.
+# O lookahead com as iniciais dos rótulos descarta rápido as posições que não podem casar;
+# o valor é capturado dentro de um lookahead para que rótulos no meio dele (ex.: "Marca: FIAT
+# Modelo: UNO" na mesma linha) ainda sejam vistos, como quando cada padrão rodava separado.
+_RE_GENERICO = re.compile(
+    r'\b(?=[' + ''.join(sorted({rotulo[0] for rotulo, _, _ in PADROES_GENERICOS})) + r'])(?:'
+    + '|'.join(f'{re.escape(rotulo)}[:\\s]+(?=(?P<{campo}>{valor}))' for rotulo, campo, valor in PADROES_GENERICOS)
+    + ')',
+    re.IGNORECASE
+)
 
 class PlacaFipeScraperAlternative:
     """Scraper alternativo que tenta diferentes sites"""
     
-    def __init__(self):
-        """Inicializa o scraper alternativo"""
-        self.session = requests.Session()
+    def __init__(self, base_url: Optional[str] = None):
+        """Inicializa o scraper alternativo
         
-        # Configurar headers mais realistas
-        self.session.headers.update({
+        Args:
+            base_url: se informado, todos os sites são consultados sob esta URL
+                (ex.: o servidor_replay local), como {base_url}/{host}{caminho}
+        """
+        # Sessão própria (cookies) sobre o pool de conexões compartilhado
+        self.session = obter_transporte().criar_sessao({
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'none',
-            'Cache-Control': 'max-age=0'
         })
         
+        # Status HTTP da última resposta (ou 'timeout'), usado no controle de ritmo
+        self.ultimo_status = None
+        
         # Lista de sites para tentar (mais confiáveis)
         self.sites = [
             {
@@ -52,6 +81,24 @@ class PlacaFipeScraperAlternative:
                 'params': {}
             }
         ]
+        
+        # Página consultada pelo método genérico
+        self.url_generico = 'https://www.gov.br/denatran/pt-br/assuntos/veiculos/placa-mercosul'
+        
+        if base_url:
+            for site in self.sites:
+                site['url'] = self._reescrever_url(site['url'], base_url)
+            self.url_generico = self._reescrever_url(self.url_generico, base_url)
+        
+        # Um disjuntor por site: fontes que só falham são puladas até a próxima consulta de teste
+        self.disjuntores = {site['name']: Disjuntor(site['name']) for site in self.sites}
+        self.disjuntores['generico'] = Disjuntor('Gov.br (método genérico)')
+    
+    @staticmethod
+    def _reescrever_url(url: str, base_url: str) -> str:
+        """Leva a URL de um site para debaixo de base_url, mantendo host e caminho"""
+        partes = urlsplit(url)
+        return f"{base_url.rstrip('/')}/{partes.netloc}{partes.path}"
     
     def _get_random_delay(self) -> float:
         """Retorna um delay aleatório entre 2-5 segundos"""
@@ -59,64 +106,21 @@ class PlacaFipeScraperAlternative:
     
     def _extract_data_generic(self, html_content: str) -> Dict[str, str]:
         """Extrai dados de forma genérica do HTML"""
-        soup = BeautifulSoup(html_content, 'html.parser')
         dados = {}
         
-        # Procurar por padrões comuns de dados de veículos
-        patterns = [
-            (r'marca[:\s]+([^\n\r<]+)', 'marca'),
-            (r'modelo[:\s]+([^\n\r<]+)', 'modelo'),
-            (r'ano[:\s]+(\d{4})', 'ano'),
-            (r'cor[:\s]+([^\n\r<]+)', 'cor'),
-            (r'combustível[:\s]+([^\n\r<]+)', 'combustivel'),
-            (r'chassi[:\s]+([^\n\r<]+)', 'chassi'),
-            (r'motor[:\s]+([^\n\r<]+)', 'motor'),
-            (r'passageiros[:\s]+(\d+)', 'passageiros'),
-            (r'uf[:\s]+([A-Z]{2})', 'uf'),
-            (r'município[:\s]+([^\n\r<]+)', 'municipio'),
-            (r'cilindrada[:\s]+([^\n\r<]+)', 'cilindrada'),
-            (r'importado[:\s]+([^\n\r<]+)', 'importado'),
-            (r'genérico[:\s]+([^\n\r<]+)', 'generico'),
-            (r'ano modelo[:\s]+(\d{4})', 'ano_modelo')
-        ]
-        
-        # Procurar por padrões no HTML
-        for pattern, field in patterns:
-            matches = re.findall(pattern, html_content, re.IGNORECASE)
-            if matches:
-                dados[field] = matches[0].strip()
+        # Rótulos no texto visível (sem scripts e tags), numa única passada;
+        # vale a primeira ocorrência de cada campo com valor preenchido
+        for encontrado in _RE_GENERICO.finditer(texto_visivel(html_content)):
+            campo = encontrado.lastgroup
+            if campo not in dados:
+                valor = encontrado.group(campo).strip()
+                if valor not in ('', '-', 'N/A'):
+                    dados[campo] = valor
         
-        # Procurar por dados em tabelas
-        tables = soup.find_all('table')
-        for table in tables:
-            rows = table.find_all('tr')
-            for row in rows:
-                cells = row.find_all(['td', 'th'])
-                if len(cells) >= 2:
-                    key = cells[0].get_text(strip=True).lower()
-                    value = cells[1].get_text(strip=True)
-                    
-                    # Mapear chaves para campos do modelo
-                    key_mapping = {
-                        'marca': 'marca',
-                        'modelo': 'modelo',
-                        'ano': 'ano',
-                        'cor': 'cor',
-                        'combustível': 'combustivel',
-                        'chassi': 'chassi',
-                        'motor': 'motor',
-                        'passageiros': 'passageiros',
-                        'uf': 'uf',
-                        'município': 'municipio',
-                        'cilindrada': 'cilindrada',
-                        'importado': 'importado',
-                        'genérico': 'generico',
-                        'ano modelo': 'ano_modelo'
-                    }
-                    
-                    for k, v in key_mapping.items():
-                        if k in key and value and value not in ['-', 'N/A', '']:
-                            dados[v] = value
+        # Procurar por dados em tabelas (cada tabela é parseada isoladamente)
+        for tabela in localizar_tabelas(html_content):
+            dados.update(extrair_dados_tabela(tabela, celulas=('td', 'th'),
+                                              ignorar_valores=('', '-', 'N/A')))
         
         return dados
     
@@ -132,8 +136,7 @@ class PlacaFipeScraperAlternative:
                 
                 response = self.session.get(
                     site['url'],
-                    params=params,
-                    timeout=30
+                    params=params
                 )
             else:
                 # Método POST
@@ -142,10 +145,10 @@ class PlacaFipeScraperAlternative:
                 
                 response = self.session.post(
                     site['url'],
-                    data=data,
-                    timeout=30
+                    data=data
                 )
             
+            self.ultimo_status = response.status_code
             print(f"   📊 Status: {response.status_code}")
             
             if response.status_code == 200:
@@ -161,21 +164,33 @@ class PlacaFipeScraperAlternative:
             return None
             
         except Exception as e:
+            if isinstance(e, requests.exceptions.Timeout):
+                self.ultimo_status = 'timeout'
             print(f"   ❌ Erro ao tentar {site['name']}: {str(e)}")
             return None
     
     def scraping_placa(self, placa: str) -> Optional[Dict[str, str]]:
         """Faz scraping de uma placa tentando diferentes sites"""
         print(f"   🌐 Iniciando scraping alternativo para placa: {placa}")
+        self.ultimo_status = None
         
-        # Tentar cada site
+        # Tentar cada site com disjuntor fechado (ou em teste)
+        consultou = False
         for site in self.sites:
+            disjuntor = self.disjuntores[site['name']]
+            if not disjuntor.permite():
+                print(f"   ⏭️  {site['name']} pulado (disjuntor {disjuntor.estado})")
+                continue
+            
+            # Delay entre tentativas
+            if consultou:
+                time.sleep(self._get_random_delay())
+            consultou = True
+            
             dados = self._try_site(site, placa)
+            disjuntor.registrar(bool(dados))
             if dados:
                 return dados
-            
-            # Delay entre tentativas
-            time.sleep(self._get_random_delay())
         
         # Se nenhum site funcionou, tentar método genérico
         print("   🔍 Tentando método genérico...")
@@ -203,17 +218,20 @@ class PlacaFipeScraperAlternative:
                 dados['status'] = 'formato_mercosul'
             
             # Tentar fazer uma consulta básica em sites públicos
-            try:
-                # Tentar consultar informações básicas do Denatran
-                response = self.session.get(
-                    'https://www.gov.br/denatran/pt-br/assuntos/veiculos/placa-mercosul',
-                    timeout=10
-                )
-                if response.status_code == 200:
-                    dados['fonte_consulta'] = 'gov.br'
-                    dados['status'] = 'consulta_gov_br'
-            except:
-                pass
+            disjuntor = self.disjuntores['generico']
+            if disjuntor.permite():
+                try:
+                    # Tentar consultar informações básicas do Denatran
+                    response = self.session.get(
+                        self.url_generico,
+                        timeout=10
+                    )
+                    disjuntor.registrar(response.status_code == 200)
+                    if response.status_code == 200:
+                        dados['fonte_consulta'] = 'gov.br'
+                        dados['status'] = 'consulta_gov_br'
+                except:
+                    disjuntor.registrar_falha()
             
             # Tentar extrair informações da placa baseado em padrões conhecidos
             # Exemplo: placas que começam com certas letras podem indicar região
@@ -227,6 +245,10 @@ class PlacaFipeScraperAlternative:
             print(f"   ❌ Erro no método genérico: {str(e)}")
             return None
     
+    def get_status(self) -> Dict[str, Dict]:
+        """Estado dos disjuntores de cada site"""
+        return {nome: disjuntor.estatisticas() for nome, disjuntor in self.disjuntores.items()}
+    
     def close(self):
         """Fecha a sessão"""
         self.session.close()
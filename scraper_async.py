@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Scraper assíncrono para placas (asyncio + aiohttp)
+Mesma extração e mapeamento de campos do PlacaFipeScraperRequests,
+mas processando muitas placas em paralelo com limites de concorrência
+global e por host.
+"""
+
+import asyncio
+import random
+from typing import Dict, Optional, List
+from urllib.parse import urlsplit
+
+import aiohttp
+from yarl import URL
+
+from scraper_requests import PlacaFipeScraperRequests
+
+
+class PlacaFipeScraperAsync(PlacaFipeScraperRequests):
+    """Scraper de placas assíncrono com concorrência limitada"""
+
+    def __init__(self, base_url: str = "https://placafipe.com",
+                 max_concorrencia: int = 20,
+                 max_por_host: int = 4,
+                 timeout: float = 30,
+                 delay_min: float = 1.0,
+                 delay_max: float = 3.0):
+        """
+        Inicializa o scraper assíncrono
+
+        Args:
+            base_url: URL base do site consultado
+            max_concorrencia: máximo de requisições simultâneas no total
+            max_por_host: máximo de requisições simultâneas para um mesmo host
+            timeout: timeout total de cada requisição, em segundos
+            delay_min, delay_max: intervalo da pausa depois de carregar a página inicial
+        """
+        super().__init__(base_url=base_url)
+        # A sessão síncrona herdada só carrega a página inicial (self.inicializador):
+        # os cookies dela são copiados para a ClientSession do lote
+        self._sessao_preparada = None
+
+        self.max_concorrencia = max_concorrencia
+        self.max_por_host = max_por_host
+        self.timeout = timeout
+        self.delay_min = delay_min
+        self.delay_max = delay_max
+
+        # Semáforos e locks são criados dentro do loop em execução (_preparar_loop)
+        self._loop = None
+        self._sem_global = None
+        self._sem_hosts = {}
+        self._lock_sondagem = None
+        self._lock_cookies = None
+
+    def _preparar_loop(self):
+        """Cria semáforos e locks no primeiro uso em cada loop de eventos
+
+        Chamado pelas duas entradas (lote e scraping_placa_async direto): primitivas
+        do asyncio não servem a outro loop, e cada asyncio.run cria um novo.
+        """
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._sem_global = asyncio.Semaphore(self.max_concorrencia)
+            self._sem_hosts = {}
+            self._lock_sondagem = asyncio.Lock()
+            self._lock_cookies = asyncio.Lock()
+
+    def _get_random_delay(self) -> float:
+        """Retorna um delay aleatório entre delay_min e delay_max"""
+        return random.uniform(self.delay_min, self.delay_max)
+
+    def _semaforo_host(self, url: str) -> asyncio.Semaphore:
+        """Retorna (criando se necessário) o semáforo do host da URL"""
+        host = urlsplit(url).netloc
+        semaforo = self._sem_hosts.get(host)
+        if semaforo is None:
+            semaforo = asyncio.Semaphore(self.max_por_host)
+            self._sem_hosts[host] = semaforo
+        return semaforo
+
+    async def _requisicao(self, sessao: aiohttp.ClientSession, metodo: str, url: str, **kwargs):
+        """Executa uma requisição respeitando os limites global e por host"""
+        async with self._sem_global, self._semaforo_host(url):
+            async with sessao.request(metodo, url, **kwargs) as response:
+                texto = await response.text(errors='replace')
+                return response.status, texto
+
+    async def _consultar_rotas(self, sessao: aiohttp.ClientSession, placa: str) -> Optional[Dict[str, str]]:
+        """POST de consulta nas rotas do roteador (o mesmo do scraper síncrono)"""
+        loop = asyncio.get_running_loop()
+        for rota in self.roteador.ordem():
+            caminho, formato = rota
+            url = f"{self.base_url}{caminho}"
+            try:
+                status, texto = await self._requisicao(
+                    sessao, 'POST', url, data=self._montar_dados_consulta(placa, formato)
+                )
+
+                if status == 403:
+                    # Bloqueio da sessão, não da rota: não conta na saúde
+                    print(f"   🚫 URL {url} retornou 403 ({placa}), sessão será preparada de novo")
+                    self._invalidar_sessao(sessao)
+                    return None
+
+                if status != 200:
+                    print(f"   ⚠️  URL {url} retornou status {status} ({placa})")
+                    self.roteador.registrar(rota, False)
+                    continue
+
+                if self._resposta_sem_resultado(texto):
+                    # A rota respondeu a consulta: outra rota não acharia a placa
+                    print(f"   ⚠️  Placa {placa} não encontrada ou erro na consulta")
+                    self.roteador.registrar(rota, True)
+                    return None
+
+                # O parse do HTML é CPU; roda fora do loop de eventos
+                dados = await loop.run_in_executor(None, self._extract_data_from_html, texto)
+                self.roteador.registrar(rota, bool(dados))
+                if dados:
+                    print(f"   ✅ Dados extraídos com sucesso para {placa}")
+                    return dados
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                print(f"   ⚠️  Erro ao tentar URL {url} ({placa}): {str(e)}")
+                self.roteador.registrar(rota, False)
+
+        return None
+
+    async def _preparar_sessao(self, sessao: aiohttp.ClientSession) -> bool:
+        """Cookies da página inicial na ClientSession, carregados uma vez pelo InicializadorSessao
+
+        Só uma placa prepara; as outras esperam e reaproveitam os mesmos cookies.
+        """
+        if self._sessao_preparada is sessao and self.inicializador.valido:
+            return True
+        async with self._lock_cookies:
+            if self._sessao_preparada is sessao and self.inicializador.valido:
+                return True
+            preparada = await asyncio.get_running_loop().run_in_executor(None, self.inicializador.garantir)
+            if preparada is False:
+                print(f"   ⚠️  Página inicial retornou status {self.inicializador.ultimo_status}")
+                return False
+            sessao.cookie_jar.update_cookies(
+                {cookie.name: cookie.value for cookie in self.session.cookies}, URL(self.base_url)
+            )
+            self._sessao_preparada = sessao
+
+        if preparada:
+            # Pausa fora do lock: só esta placa espera, as demais já usam os cookies
+            await asyncio.sleep(self._get_random_delay())
+        else:
+            print("   🍪 Sessão com cookies válidos, sem carregar a página inicial")
+        return True
+
+    def _invalidar_sessao(self, sessao: aiohttp.ClientSession):
+        """Descarta os cookies depois de um 403; a próxima placa prepara de novo"""
+        if self._sessao_preparada is sessao:
+            self._sessao_preparada = None
+            self.inicializador.invalidar()
+            sessao.cookie_jar.clear()
+
+    async def scraping_placa_async(self, sessao: aiohttp.ClientSession, placa: str) -> Optional[Dict[str, str]]:
+        """Faz scraping de uma placa específica (versão assíncrona)"""
+        print(f"   🌐 Iniciando scraping assíncrono para placa: {placa}")
+
+        self._preparar_loop()
+        try:
+            # Página inicial (cookies) só quando a sessão do lote não está preparada
+            if not await self._preparar_sessao(sessao):
+                return None
+
+            # Sem rota aprendida, uma placa por vez sonda; as outras esperam e
+            # usam a rota que ela aprender em vez de sondar todas ao mesmo tempo
+            if self.roteador.precisa_sondar():
+                async with self._lock_sondagem:
+                    if self.roteador.precisa_sondar():
+                        return await self._consultar_rotas(sessao, placa)
+            return await self._consultar_rotas(sessao, placa)
+
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            print(f"   ❌ Erro de requisição para {placa}: {str(e)}")
+            return None
+        except Exception as e:
+            print(f"   ❌ Erro geral para {placa}: {str(e)}")
+            return None
+
+    async def scraping_multiplas_placas_async(self, placas: List[str]) -> List[Dict[str, str]]:
+        """Faz scraping de várias placas em paralelo, mantendo a ordem de entrada"""
+        self._preparar_loop()
+
+        connector = aiohttp.TCPConnector(limit=self.max_concorrencia, limit_per_host=self.max_por_host)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+
+        # Uma sessão (um cookie jar) para o lote; unsafe aceita cookies de hosts por IP
+        sessao = aiohttp.ClientSession(connector=connector, timeout=timeout, headers=self.headers,
+                                       cookie_jar=aiohttp.CookieJar(unsafe=True))
+
+        async def processar(placa: str) -> Optional[Dict[str, str]]:
+            dados = await self.scraping_placa_async(sessao, placa)
+            if dados:
+                dados['placa'] = placa
+            return dados
+
+        try:
+            resultados = await asyncio.gather(*(processar(placa) for placa in placas))
+        finally:
+            self._sessao_preparada = None
+            await sessao.close()
+
+        return [dados for dados in resultados if dados]
+
+    def scraping_placa(self, placa: str) -> Optional[Dict[str, str]]:
+        """Faz scraping de uma placa (interface síncrona)"""
+        resultados = self.scraping_multiplas_placas([placa])
+        if resultados:
+            dados = resultados[0]
+            dados.pop('placa', None)
+            return dados
+        return None
+
+    def scraping_multiplas_placas(self, placas: List[str], delay_entre_placas: float = 0) -> List[Dict[str, str]]:
+        """Faz scraping de várias placas (interface síncrona)
+
+        O delay_entre_placas é ignorado: o ritmo é controlado pelos limites de concorrência.
+        """
+        return asyncio.run(self.scraping_multiplas_placas_async(placas))
+
+    def close(self):
+        """Fecha a sessão da página inicial (as ClientSessions vivem apenas durante cada lote)"""
+        self.session.close()
+
+# Função de teste
+def testar_scraper_async():
+    """Função para testar o scraper assíncrono"""
+    scraper = PlacaFipeScraperAsync()
+
+    try:
+        placas_teste = ["ABC1234", "DEF5678", "GHI9012"]
+        print(f"🧪 Testando scraper assíncrono com placas: {placas_teste}")
+
+        resultados = scraper.scraping_multiplas_placas(placas_teste)
+        print(f"✅ {len(resultados)}/{len(placas_teste)} placas com dados: {resultados}")
+
+    except Exception as e:
+        print(f"❌ Erro no teste: {str(e)}")
+    finally:
+        scraper.close()
+
+if __name__ == "__main__":
+    testar_scraper_async()
@@ -3,107 +3,127 @@
 Scraper Híbrido para placas - Alterna automaticamente entre Selenium e Requests
 """
 
+import importlib
+import importlib.util
+import os
 import time
 import random
-from typing import Dict, Optional, List, Union
+import threading
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Optional, List, Union
 import logging
 
-# Importar ambos os scrapers
-try:
-    from scraper import PlacaFipeScraper
-    SELENIUM_AVAILABLE = True
-except ImportError:
-    SELENIUM_AVAILABLE = False
-    print("⚠️  Selenium não disponível")
+from selecao_metodo import SeletorMetodos
+from transporte_http import estatisticas_transporte
 
-try:
-    from scraper_requests import PlacaFipeScraperRequests
-    REQUESTS_AVAILABLE = True
-except ImportError:
-    REQUESTS_AVAILABLE = False
-    print("⚠️  Requests não disponível")
+# Backends carregados sob demanda: o módulo de cada scraper (e o Selenium /
+# webdriver_manager, no caso do navegador) só é importado quando o híbrido
+# escolhe aquele método pela primeira vez
+BACKENDS = {
+    "requests": ("scraper_requests", "PlacaFipeScraperRequests", "Requests"),
+    "alternative": ("scraper_alternative", "PlacaFipeScraperAlternative", "Alternativo"),
+    "selenium": ("scraper", "PlacaFipeScraper", "Selenium"),
+}
+
+# Disponibilidade verificada sem importar (find_spec só localiza o pacote)
+SELENIUM_AVAILABLE = importlib.util.find_spec("selenium") is not None
+REQUESTS_AVAILABLE = importlib.util.find_spec("requests") is not None
+ALTERNATIVE_AVAILABLE = REQUESTS_AVAILABLE
 
-try:
-    from scraper_alternative import PlacaFipeScraperAlternative
-    ALTERNATIVE_AVAILABLE = True
-except ImportError:
-    ALTERNATIVE_AVAILABLE = False
-    print("⚠️  Scraper alternativo não disponível")
+if not SELENIUM_AVAILABLE:
+    print("⚠️  Selenium não disponível")
+if not REQUESTS_AVAILABLE:
+    print("⚠️  Requests não disponível")
 
 class PlacaFipeScraperHybrid:
     """Scraper híbrido que alterna entre métodos automaticamente"""
     
-    def __init__(self, preferencia: str = "auto"):
+    # Segundos de espera por um método livre quando todos rodam consultas perdidas no hedge
+    ESPERA_OCUPADOS = 120.0
+    # Intervalo de verificação enquanto o método atual ainda espera o ritmo da fonte
+    ESPERA_RITMO = 0.05
+    
+    def __init__(self, preferencia: str = "auto", controlador_taxa=None,
+                 hedge: Optional[bool] = None, percentil_hedge: Optional[float] = None,
+                 opcoes_backends: Optional[Dict[str, Dict]] = None):
         """
         Inicializa o scraper híbrido
         
         Args:
             preferencia: "auto", "requests", "selenium", "alternative"
+            controlador_taxa: ControladorTaxa opcional que dita o ritmo de cada método
+            hedge: se o método atual passar do limiar de latência, inicia o próximo em
+                paralelo e fica com o primeiro resultado válido (SCRAPING_HEDGE, padrão false)
+            percentil_hedge: percentil da latência do método usado como limiar
+                (SCRAPING_HEDGE_PERCENTIL, padrão 0.9)
+            opcoes_backends: argumentos do construtor de cada método,
+                ex.: {"requests": {"base_url": "http://127.0.0.1:8765"}}
         """
         self.preferencia = preferencia
+        self.controlador_taxa = controlador_taxa
+        if hedge is None:
+            hedge = os.getenv('SCRAPING_HEDGE', 'false').lower() == 'true'
+        self.hedge = hedge
+        self.percentil_hedge = percentil_hedge or float(os.getenv('SCRAPING_HEDGE_PERCENTIL', 0.9))
+        self.opcoes_backends = opcoes_backends or {}
+        self._executor = None
+        self._ocupados = set()  # métodos ainda rodando de uma consulta perdida no hedge
+        self._ocupados_lock = threading.Condition()
+        self.hedges_iniciados = 0
+        self.hedges_vencidos = 0
         self.scraper_selenium = None
         self.scraper_requests = None
         self.scraper_alternative = None
         self.metodo_atual = None
+        # Estatísticas por método que decidem a ordem de tentativa no modo "auto"
+        self.seletor = SeletorMetodos()
         
-        # Inicializar scrapers disponíveis
-        if SELENIUM_AVAILABLE:
-            try:
-                self.scraper_selenium = PlacaFipeScraper()
-                print("✅ Scraper Selenium inicializado")
-            except Exception as e:
-                print(f"⚠️  Erro ao inicializar Selenium: {e}")
-        
-        if REQUESTS_AVAILABLE:
-            try:
-                self.scraper_requests = PlacaFipeScraperRequests()
-                print("✅ Scraper Requests inicializado")
-            except Exception as e:
-                print(f"⚠️  Erro ao inicializar Requests: {e}")
-        
-        if ALTERNATIVE_AVAILABLE:
-            try:
-                self.scraper_alternative = PlacaFipeScraperAlternative()
-                print("✅ Scraper Alternativo inicializado")
-            except Exception as e:
-                print(f"⚠️  Erro ao inicializar Alternativo: {e}")
+        # Scrapers são importados e criados na primeira vez que o método é escolhido
+        self.disponivel = {
+            "requests": REQUESTS_AVAILABLE,
+            "alternative": ALTERNATIVE_AVAILABLE,
+            "selenium": SELENIUM_AVAILABLE,
+        }
+        self._construcao_lock = threading.Lock()
         
         # Verificar disponibilidade
-        if not any([self.scraper_selenium, self.scraper_requests, self.scraper_alternative]):
+        if not any(self.disponivel.values()):
             raise Exception("❌ Nenhum scraper disponível!")
         
         print(f"🚀 Scraper Híbrido inicializado - Preferência: {preferencia}")
     
+    def _metodos_disponiveis(self) -> List[str]:
+        """Métodos com scraper criado ou ainda possível de criar"""
+        return [metodo for metodo in ("requests", "alternative", "selenium")
+                if getattr(self, f"scraper_{metodo}") is not None or self.disponivel[metodo]]
+    
+    def _ordem_metodos(self) -> List[str]:
+        """Ordem de tentativa para uma placa: preferência fixa primeiro, o resto pelo custo esperado"""
+        disponiveis = self._metodos_disponiveis()
+        if not disponiveis:
+            raise Exception("❌ Nenhum método disponível!")
+        if self.preferencia in disponiveis:
+            outros = [metodo for metodo in disponiveis if metodo != self.preferencia]
+            return [self.preferencia] + self.seletor.ordem(outros)
+        # Auto: o método com menor custo esperado (sucesso x latência), explorando os outros às vezes
+        return self.seletor.ordem(disponiveis)
+    
     def _escolher_metodo(self) -> str:
-        """Escolhe o melhor método baseado na preferência e disponibilidade"""
-        if self.preferencia == "requests" and self.scraper_requests:
-            return "requests"
-        elif self.preferencia == "selenium" and self.scraper_selenium:
-            return "selenium"
-        elif self.preferencia == "alternative" and self.scraper_alternative:
-            return "alternative"
-        elif self.preferencia == "auto":
-            # Auto: preferir requests (mais rápido), depois alternativo, depois selenium
-            if self.scraper_requests:
-                return "requests"
-            elif self.scraper_alternative:
-                return "alternative"
-            elif self.scraper_selenium:
-                return "selenium"
-        
-        # Fallback: usar o que estiver disponível
-        if self.scraper_requests:
-            return "requests"
-        elif self.scraper_alternative:
-            return "alternative"
-        elif self.scraper_selenium:
-            return "selenium"
-        
-        raise Exception("❌ Nenhum método disponível!")
+        """Escolhe o melhor método baseado na preferência e nas estatísticas"""
+        return self._ordem_metodos()[0]
     
     def scraping_placa(self, placa: str) -> Optional[Dict[str, str]]:
         """Faz scraping de uma placa usando o melhor método disponível"""
-        metodo = self._escolher_metodo()
+        ordem = self._ordem_metodos()
+        if self.hedge:
+            ordem = self._metodos_livres(ordem)
+            if not ordem:
+                print(f"❌ Todos os métodos ocupados há mais de {self.ESPERA_OCUPADOS:.0f}s")
+                return None
+            if len(ordem) > 1:
+                return self._scraping_com_hedge(placa, ordem)
+        
+        metodo = ordem[0]
         self.metodo_atual = metodo
         
         print(f"🔧 Usando método: {metodo.upper()}")
@@ -111,55 +131,204 @@ class PlacaFipeScraperHybrid:
         # Tentar o método escolhido
         dados = None
         try:
-            if metodo == "requests":
-                dados = self.scraper_requests.scraping_placa(placa)
-            elif metodo == "selenium":
-                dados = self.scraper_selenium.scraping_placa(placa)
-            elif metodo == "alternative":
-                dados = self.scraper_alternative.scraping_placa(placa)
+            dados = self._executar_metodo(metodo, self._scraper_do_metodo(metodo), placa)
         except Exception as e:
             print(f"❌ Erro com método {metodo}: {str(e)}")
         
         # Se o método escolhido falhou, tentar fallback
         if not dados:
             print("🔄 Método principal falhou, tentando fallback...")
-            dados = self._tentar_fallback(placa, metodo)
+            dados = self._tentar_fallback(placa, metodo, ordem[1:])
         
         return dados
     
-    def _tentar_fallback(self, placa: str, metodo_falhou: str) -> Optional[Dict[str, str]]:
+    def _scraper_do_metodo(self, metodo: str):
+        """Retorna a instância do scraper de um método, importando e criando na primeira vez"""
+        atributo = f"scraper_{metodo}"
+        scraper = getattr(self, atributo)
+        if scraper is not None or not self.disponivel[metodo]:
+            return scraper
+        
+        with self._construcao_lock:
+            scraper = getattr(self, atributo)
+            if scraper is None and self.disponivel[metodo]:
+                modulo, classe, nome = BACKENDS[metodo]
+                try:
+                    inicio = time.time()
+                    scraper = getattr(importlib.import_module(modulo), classe)(**self.opcoes_backends.get(metodo, {}))
+                    setattr(self, atributo, scraper)
+                    print(f"✅ Scraper {nome} inicializado em {(time.time() - inicio) * 1000:.0f}ms")
+                except Exception as e:
+                    # ImportError ou falha no construtor: o método sai da rotação
+                    self.disponivel[metodo] = False
+                    print(f"⚠️  Erro ao inicializar {nome}: {e}")
+            return scraper
+    
+    def _executar_metodo(self, metodo: str, scraper, placa: str,
+                         cancelado: Optional[threading.Event] = None,
+                         ao_comecar: Optional[Callable[[], None]] = None) -> Optional[Dict[str, str]]:
+        """Consulta a placa com um método, respeitando o ritmo da fonte
+        
+        ao_comecar é chamada depois da espera pelo ritmo, quando a consulta sai de fato.
+        """
+        if scraper is None:
+            return None
+        if self.controlador_taxa:
+            self.controlador_taxa.aguardar(metodo)
+        if cancelado is not None and cancelado.is_set():
+            return None
+        if ao_comecar is not None:
+            ao_comecar()
+        
+        dados = None
+        inicio = time.time()
+        try:
+            dados = scraper.scraping_placa(placa)
+            return dados
+        finally:
+            # Uma consulta que perdeu o hedge não chegou ao fim "de verdade": não entra nas estatísticas
+            if cancelado is None or not cancelado.is_set():
+                self.seletor.registrar(metodo, bool(dados), time.time() - inicio)
+            if self.controlador_taxa:
+                self.controlador_taxa.registrar(metodo, getattr(scraper, 'ultimo_status', None), bool(dados))
+    
+    def _limiar_hedge(self, metodo: str) -> float:
+        """Segundos de espera pelo método antes de iniciar o próximo em paralelo"""
+        limiar = self.seletor.percentil(metodo, self.percentil_hedge)
+        if limiar is None:
+            # Poucas medições: o dobro da latência média (ou da inicial)
+            limiar = 2 * self.seletor.latencia(metodo)
+        return max(limiar, 0.1)
+    
+    def _metodos_livres(self, ordem: List[str]) -> List[str]:
+        """Métodos da ordem sem consulta perdida em andamento
+        
+        Cada método tem uma instância só (sessão, ultimo_status): um método que
+        ainda roda a consulta que perdeu o hedge fica fora desta placa. Se todos
+        estão ocupados, espera o primeiro terminar (até ESPERA_OCUPADOS segundos).
+        """
+        with self._ocupados_lock:
+            self._ocupados_lock.wait_for(lambda: any(m not in self._ocupados for m in ordem),
+                                         timeout=self.ESPERA_OCUPADOS)
+            return [m for m in ordem if m not in self._ocupados]
+    
+    def _iniciar_em_paralelo(self, metodo: str, placa: str, cancelado: threading.Event,
+                             ao_comecar: Optional[Callable[[], None]] = None):
+        """Submete a consulta de um método ao executor do hedge (None se o método está ocupado)"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=6, thread_name_prefix="hedge")
+        with self._ocupados_lock:
+            if metodo in self._ocupados:
+                return None
+            self._ocupados.add(metodo)
+        try:
+            futuro = self._executor.submit(self._executar_metodo, metodo,
+                                           self._scraper_do_metodo(metodo), placa, cancelado, ao_comecar)
+        except Exception:
+            self._liberar(metodo)
+            raise
+        futuro.add_done_callback(lambda _: self._liberar(metodo))
+        return futuro
+    
+    def _liberar(self, metodo: str):
+        with self._ocupados_lock:
+            self._ocupados.discard(metodo)
+            self._ocupados_lock.notify_all()
+    
+    def _scraping_com_hedge(self, placa: str, ordem: List[str]) -> Optional[Dict[str, str]]:
+        """Tenta os métodos em ordem; se o atual passa do limiar, o próximo começa em paralelo
+        
+        O primeiro resultado válido vence e as consultas ainda em andamento são canceladas
+        (o resultado delas é descartado; a que ainda não começou nem chega a consultar).
+        O limiar conta a partir do começo da consulta: a espera pelo ritmo da fonte
+        (ControladorTaxa) fica fora, como nas latências de onde o limiar vem.
+        """
+        # Só métodos livres (ver _metodos_livres); um que ficar ocupado até a vez dele é pulado
+        fila = list(ordem)
+        em_andamento = {}
+        comecos = {}  # método -> time.monotonic() em que a consulta saiu
+        
+        def iniciar(por_hedge=False):
+            while fila:
+                metodo = fila.pop(0)
+                cancelado = threading.Event()
+                futuro = self._iniciar_em_paralelo(
+                    metodo, placa, cancelado, lambda metodo=metodo: comecos.setdefault(metodo, time.monotonic()))
+                if futuro is not None:
+                    em_andamento[futuro] = (metodo, cancelado, por_hedge)
+                    return metodo
+            return None
+        
+        ultimo = iniciar()
+        if ultimo is None:
+            print("❌ Todos os métodos ocupados")
+            return None
+        print(f"🔧 Usando método: {ultimo.upper()} (hedge)")
+        
+        try:
+            while em_andamento:
+                limiar = espera = None
+                if fila and ultimo in comecos:
+                    limiar = self._limiar_hedge(ultimo)
+                    espera = max(0.0, comecos[ultimo] + limiar - time.monotonic())
+                elif fila:
+                    # O método ainda espera o ritmo da fonte: o limiar nem começou a contar
+                    espera = self.ESPERA_RITMO
+                concluidos, _ = wait(em_andamento, timeout=espera, return_when=FIRST_COMPLETED)
+                
+                if not concluidos:
+                    if limiar is None:
+                        continue
+                    proximo = iniciar(por_hedge=True)
+                    if proximo is not None:
+                        print(f"⏱️  {ultimo.upper()} passou de {limiar:.1f}s, iniciando {proximo.upper()} em paralelo")
+                        self.hedges_iniciados += 1
+                        ultimo = proximo
+                    continue
+                
+                for futuro in concluidos:
+                    metodo, _, por_hedge = em_andamento.pop(futuro)
+                    try:
+                        dados = futuro.result()
+                    except Exception as e:
+                        print(f"❌ Erro com método {metodo}: {str(e)}")
+                        dados = None
+                    if dados:
+                        if em_andamento:
+                            print(f"✅ {metodo.upper()} respondeu primeiro, cancelando os demais")
+                        if por_hedge:
+                            self.hedges_vencidos += 1
+                        self.metodo_atual = metodo
+                        return dados
+                    print(f"🔄 {metodo.upper()} não trouxe dados")
+                
+                # Nada em andamento e ainda há métodos: fallback imediato
+                if not em_andamento and fila:
+                    proximo = iniciar()
+                    if proximo is not None:
+                        ultimo = proximo
+                        print(f"🔄 Tentando fallback para {ultimo.upper()}...")
+            
+            print("❌ Todos os métodos falharam")
+            return None
+        finally:
+            for _, cancelado, _ in em_andamento.values():
+                cancelado.set()
+    
+    def _tentar_fallback(self, placa: str, metodo_falhou: str,
+                         ordem: Optional[List[str]] = None) -> Optional[Dict[str, str]]:
         """Tenta métodos alternativos quando o principal falha"""
-        fallback_methods = []
-        
-        # Definir ordem de fallback baseada no método que falhou
-        if metodo_falhou == "requests":
-            if self.scraper_alternative:
-                fallback_methods.append(("alternative", self.scraper_alternative))
-            if self.scraper_selenium:
-                fallback_methods.append(("selenium", self.scraper_selenium))
-        elif metodo_falhou == "alternative":
-            if self.scraper_requests:
-                fallback_methods.append(("requests", self.scraper_requests))
-            if self.scraper_selenium:
-                fallback_methods.append(("selenium", self.scraper_selenium))
-        elif metodo_falhou == "selenium":
-            if self.scraper_requests:
-                fallback_methods.append(("requests", self.scraper_requests))
-            if self.scraper_alternative:
-                fallback_methods.append(("alternative", self.scraper_alternative))
-        
-        # Tentar cada método de fallback
-        for nome_metodo, scraper in fallback_methods:
+        # Ordem de fallback pelo custo esperado de cada método
+        if ordem is None:
+            ordem = self.seletor.ordem([m for m in self._metodos_disponiveis() if m != metodo_falhou])
+        
+        # Tentar cada método de fallback (o scraper só é criado quando chega a vez dele)
+        for nome_metodo in ordem:
             try:
                 print(f"🔄 Tentando fallback para {nome_metodo.upper()}...")
                 self.metodo_atual = nome_metodo
                 
-                if nome_metodo == "requests":
-                    dados = scraper.scraping_placa(placa)
-                elif nome_metodo == "selenium":
-                    dados = scraper.scraping_placa(placa)
-                elif nome_metodo == "alternative":
-                    dados = scraper.scraping_placa(placa)
+                dados = self._executar_metodo(nome_metodo, self._scraper_do_metodo(nome_metodo), placa)
                 
                 if dados:
                     print(f"✅ Fallback para {nome_metodo.upper()} funcionou!")
@@ -191,18 +360,29 @@ class PlacaFipeScraperHybrid:
         
         return resultados
     
-    def get_status(self) -> Dict[str, Union[str, bool]]:
+    def get_status(self) -> Dict[str, Union[str, bool, dict]]:
         """Retorna o status dos scrapers"""
         return {
             "metodo_atual": self.metodo_atual,
-            "selenium_disponivel": bool(self.scraper_selenium),
-            "requests_disponivel": bool(self.scraper_requests),
-            "alternative_disponivel": bool(self.scraper_alternative),
-            "preferencia": self.preferencia
+            "selenium_disponivel": self.disponivel["selenium"],
+            "requests_disponivel": self.disponivel["requests"],
+            "alternative_disponivel": self.disponivel["alternative"],
+            "carregados": [metodo for metodo in BACKENDS if getattr(self, f"scraper_{metodo}") is not None],
+            "preferencia": self.preferencia,
+            "metodos": self.seletor.estatisticas(),
+            "hedge": {"ativo": self.hedge, "iniciados": self.hedges_iniciados,
+                      "vencidos_pelo_paralelo": self.hedges_vencidos},
+            "disjuntores": (self.scraper_alternative.get_status()
+                            if hasattr(self.scraper_alternative, 'get_status') else {}),
+            "ritmo": self.controlador_taxa.estatisticas() if self.controlador_taxa else {},
+            "http": estatisticas_transporte() or {}
         }
     
     def close(self):
         """Fecha todos os scrapers"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        
         if self.scraper_selenium:
             try:
                 self.scraper_selenium.close()
@@ -1,23 +1,30 @@
 #!/usr/bin/env python3
 """
-Scraper para placas usando Requests + BeautifulSoup (sem navegador)
+Scraper para placas usando Requests + lxml (sem navegador)
 Muito mais rápido e eficiente que Selenium
 """
 
 import requests
-from bs4 import BeautifulSoup
+from extracao import extrair_dados_tabela, localizar_tabela, mapear_campo
+from transporte_http import obter_transporte
+from cookies_sessao import InicializadorSessao
+from roteamento import RoteadorEndpoints
 import time
 import random
 from typing import Dict, Optional, List
-import re
 
 class PlacaFipeScraperRequests:
     """Scraper de placas usando requisições HTTP diretas"""
     
-    def __init__(self):
-        self.session = requests.Session()
-        self.base_url = "https://placafipe.com"
-        self.search_url = "https://placafipe.com/consulta"
+    # Caminhos testados, em ordem, para o POST de consulta
+    CAMINHOS_CONSULTA = ['/consulta', '/buscar', '/', '/index.php']
+    
+    # Formatos do formulário de consulta (o campo do site é sPlaca)
+    FORMATOS_CONSULTA = ['padrao', 'splaca']
+    
+    def __init__(self, base_url: str = "https://placafipe.com"):
+        self.base_url = base_url.rstrip('/')
+        self.search_url = f"{self.base_url}/consulta"
         
         # Headers mais realistas para simular um navegador real
         self.headers = {
@@ -38,48 +45,36 @@ class PlacaFipeScraperRequests:
             'sec-ch-ua-platform': '"Linux"'
         }
         
-        # Configurar session
-        self.session.headers.update(self.headers)
+        # Sessão própria (cookies) sobre o pool de conexões compartilhado
+        self.session = obter_transporte().criar_sessao(self.headers)
+        # Cookies da página inicial, preparados uma vez e renovados só ao expirar ou em 403
+        self.inicializador = InicializadorSessao(self.session, [self.base_url], nome='placafipe_requests')
+        
+        # Rotas (caminho, formato): a última que funcionou é tentada primeiro
+        self.roteador = RoteadorEndpoints(
+            [(caminho, formato) for formato in self.FORMATOS_CONSULTA for caminho in self.CAMINHOS_CONSULTA]
+        )
         
-        # Adicionar referer e outras configurações
-        self.session.verify = True
-        self.session.allow_redirects = True
+        # Status HTTP da última resposta (ou 'timeout'), usado no controle de ritmo
+        self.ultimo_status = None
         
     def _get_random_delay(self) -> float:
         """Retorna um delay aleatório entre 1-3 segundos"""
         return random.uniform(1, 3)
     
     def _extract_data_from_html(self, html_content: str) -> Dict[str, str]:
-        """Extrai dados do HTML usando BeautifulSoup"""
-        soup = BeautifulSoup(html_content, 'html.parser')
-        dados = {}
-        
+        """Extrai dados da tabela de resultados (só a tabela é parseada)"""
         try:
             # Procurar pela tabela de resultados
-            tabela = soup.find('table', class_='table') or soup.find('table')
+            tabela = localizar_tabela(html_content, 'table') or localizar_tabela(html_content)
             
             if not tabela:
                 print("   ⚠️  Tabela de resultados não encontrada")
                 return {}
             
-            # Extrair linhas da tabela
-            linhas = tabela.find_all('tr')
-            print(f"   📊 Encontradas {len(linhas)} linhas na tabela")
-            
-            for i, linha in enumerate(linhas):
-                # Procurar por células com label e valor
-                celulas = linha.find_all(['td', 'th'])
-                if len(celulas) >= 2:
-                    # Tentar extrair label e valor
-                    label = celulas[0].get_text(strip=True)
-                    valor = celulas[1].get_text(strip=True)
-                    
-                    if label and valor:
-                        # Mapear labels para campos do banco
-                        campo = self._mapear_campo(label)
-                        if campo:
-                            dados[campo] = valor
-                            print(f"   📝 {campo}: {valor}")
+            dados = extrair_dados_tabela(tabela, celulas=('td', 'th'))
+            for campo, valor in dados.items():
+                print(f"   📝 {campo}: {valor}")
             
             print(f"   ✅ Dados extraídos: {len(dados)} campos")
             return dados
@@ -88,109 +83,104 @@ class PlacaFipeScraperRequests:
             print(f"   ❌ Erro ao extrair dados: {str(e)}")
             return {}
     
+    def _montar_dados_consulta(self, placa: str, formato: str = 'padrao') -> Dict[str, str]:
+        """Monta o formulário enviado no POST de consulta"""
+        if formato == 'splaca':
+            return {'sPlaca': placa}
+        return {
+            'placa': placa,
+            'submit': 'Consultar',
+            'buscar': 'Consultar',
+            'search': placa
+        }
+    
+    def _resposta_sem_resultado(self, html_content: str) -> bool:
+        """Indica se a página retornada é de erro ou de placa não encontrada"""
+        texto = html_content.lower()
+        return 'erro' in texto or 'não encontrada' in texto
+    
     def _mapear_campo(self, label: str) -> Optional[str]:
         """Mapeia labels da tabela para campos do banco"""
-        label_lower = label.lower()
-        
-        mapeamento = {
-            'marca': 'marca',
-            'marcaplacas mercosul': 'marca',
-            'genérico': 'generico',
-            'modelo': 'modelo',
-            'importado': 'importado',
-            'ano': 'ano',
-            'ano modelo': 'ano_modelo',
-            'cor': 'cor',
-            'cilindrada': 'cilindrada',
-            'combustível': 'combustivel',
-            'chassi': 'chassi',
-            'motor': 'motor',
-            'passageiros': 'passageiros',
-            'uf': 'uf',
-            'município': 'municipio'
-        }
-        
-        for key, value in mapeamento.items():
-            if key in label_lower:
-                return value
-        
-        return None
+        return mapear_campo(label)
     
     def scraping_placa(self, placa: str) -> Optional[Dict[str, str]]:
         """Faz scraping de uma placa específica"""
         print(f"   🌐 Iniciando scraping para placa: {placa}")
+        self.ultimo_status = None
         
         try:
-            # Primeira requisição para obter cookies e simular navegação
-            print("   🔍 Obtendo página inicial...")
-            response = self.session.get(self.base_url, timeout=30)
-            print(f"   📊 Status da página inicial: {response.status_code}")
-            
-            if response.status_code != 200:
-                print(f"   ⚠️  Página inicial retornou status {response.status_code}")
-                print(f"   📄 Conteúdo: {response.text[:200]}...")
-                return None
-            
-            # Aguardar um pouco para simular comportamento humano
-            time.sleep(self._get_random_delay())
-            
-            # Tentar diferentes URLs de consulta
-            urls_consulta = [
-                f"{self.base_url}/consulta",
-                f"{self.base_url}/buscar",
-                f"{self.base_url}/",
-                f"{self.base_url}/index.php"
-            ]
+            # Página inicial (cookies) só quando a sessão não está preparada
+            preparada = self.inicializador.garantir()
+            if preparada is None:
+                print("   🍪 Sessão com cookies válidos, sem carregar a página inicial")
+            else:
+                self.ultimo_status = self.inicializador.ultimo_status
+                if not preparada:
+                    print(f"   ⚠️  Página inicial retornou status {self.ultimo_status}")
+                    return None
+                # Aguardar um pouco para simular comportamento humano
+                time.sleep(self._get_random_delay())
             
+            # Rota aprendida primeiro; sondagem completa só quando ela falha
             dados = None
-            for url in urls_consulta:
+            for caminho, formato in self.roteador.ordem():
+                url = f"{self.base_url}{caminho}"
+                sucesso = False
                 try:
-                    print(f"   🔍 Tentando URL: {url}")
+                    print(f"   🔍 Tentando URL: {url} (formulário {formato})")
                     
                     # Preparar dados para a consulta
-                    data = {
-                        'placa': placa,
-                        'submit': 'Consultar',
-                        'buscar': 'Consultar',
-                        'search': placa
-                    }
+                    data = self._montar_dados_consulta(placa, formato)
                     
                     # Fazer a consulta
                     print(f"   🔍 Consultando placa: {placa}")
                     response = self.session.post(
                         url,
                         data=data,
-                        timeout=30,
                         allow_redirects=True
                     )
+                    self.ultimo_status = response.status_code
                     
                     print(f"   📊 Status da consulta: {response.status_code}")
                     print(f"   📄 Tamanho da resposta: {len(response.text)} bytes")
                     
                     if response.status_code == 200:
                         # Verificar se a consulta foi bem-sucedida
-                        if 'erro' in response.text.lower() or 'não encontrada' in response.text.lower():
+                        if self._resposta_sem_resultado(response.text):
+                            # A rota respondeu a consulta: outra rota não acharia a placa
                             print(f"   ⚠️  Placa {placa} não encontrada ou erro na consulta")
-                            continue
-                        
-                        # Extrair dados do HTML retornado
-                        dados = self._extract_data_from_html(response.text)
-                        
-                        if dados:
-                            print(f"   ✅ Dados extraídos com sucesso para {placa}")
-                            break
+                            sucesso = True
                         else:
-                            print(f"   ⚠️  Nenhum dado extraído da URL {url}")
+                            # Extrair dados do HTML retornado
+                            dados = self._extract_data_from_html(response.text)
+                            
+                            if dados:
+                                print(f"   ✅ Dados extraídos com sucesso para {placa}")
+                                sucesso = True
+                            else:
+                                print(f"   ⚠️  Nenhum dado extraído da URL {url}")
+                    elif response.status_code == 403:
+                        # Bloqueio da sessão, não da rota: não conta na saúde
+                        print(f"   🚫 URL {url} retornou 403, sessão será preparada de novo")
+                        self.inicializador.invalidar()
+                        break
                     else:
                         print(f"   ⚠️  URL {url} retornou status {response.status_code}")
                         
                 except Exception as e:
+                    if isinstance(e, requests.exceptions.Timeout):
+                        self.ultimo_status = 'timeout'
                     print(f"   ⚠️  Erro ao tentar URL {url}: {str(e)}")
-                    continue
+                
+                self.roteador.registrar((caminho, formato), sucesso)
+                if sucesso:
+                    break
             
             return dados
                 
         except requests.exceptions.RequestException as e:
+            if isinstance(e, requests.exceptions.Timeout):
+                self.ultimo_status = 'timeout'
             print(f"   ❌ Erro de requisição para {placa}: {str(e)}")
             return None
         except Exception as e:
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Escolha adaptativa do método de scraping (bandit)
+
+Para cada método guarda uma taxa de sucesso e uma latência móveis. A cada
+placa sorteia uma taxa de sucesso plausível de cada método (amostragem de
+Thompson sobre uma Beta com contagens descontadas) e ordena os métodos pelo
+custo esperado: latência / taxa de sucesso, ou seja, o tempo médio gasto por
+placa com dados. Métodos com poucas observações têm sorteios mais dispersos;
+como as contagens de todos os métodos são descontadas a cada resultado, a
+incerteza sobre um método pouco usado volta a crescer. Além disso, uma fração
+`exploracao` das placas começa por um método sorteado, para que mudanças no
+site (ou um método lento que passou a funcionar) sejam percebidas.
+"""
+
+import random
+import threading
+from collections import deque
+from typing import Dict, List, Optional
+
+# Latência inicial (s) de cada método antes de qualquer medição; mantém a
+# ordem antiga (requests, alternativo, selenium) enquanto nada foi aprendido
+LATENCIA_INICIAL = {
+    "requests": 3.0,
+    "alternative": 5.0,
+    "selenium": 20.0,
+}
+
+
+class _EstatisticaMetodo:
+    def __init__(self, latencia_inicial: float):
+        self.sucessos = 0.0  # contagens descontadas
+        self.falhas = 0.0
+        self.latencia = latencia_inicial  # média móvel, em segundos
+        self.duracoes = deque(maxlen=100)  # últimas durações, para percentis
+        self.tentativas = 0
+        self.total_sucessos = 0
+
+
+class SeletorMetodos:
+    """Ordena os métodos do híbrido pelo custo esperado por placa com dados"""
+
+    def __init__(self, desconto: float = 0.98, peso_latencia: float = 0.2,
+                 exploracao: float = 0.05, aleatorio: Optional[random.Random] = None):
+        """
+        Args:
+            desconto: fator aplicado às contagens de todos os métodos a cada resultado
+                (0.98 ≈ janela das últimas 50 consultas)
+            peso_latencia: peso de cada nova medição na latência média
+            exploracao: fração das placas em que o primeiro método é sorteado
+            aleatorio: gerador de números aleatórios (para testes reprodutíveis)
+        """
+        self.desconto = desconto
+        self.peso_latencia = peso_latencia
+        self.exploracao = exploracao
+        self.aleatorio = aleatorio or random.Random()
+        self._metodos: Dict[str, _EstatisticaMetodo] = {}
+        self._lock = threading.Lock()
+
+    def _estatistica(self, metodo: str) -> _EstatisticaMetodo:
+        if metodo not in self._metodos:
+            self._metodos[metodo] = _EstatisticaMetodo(LATENCIA_INICIAL.get(metodo, 10.0))
+        return self._metodos[metodo]
+
+    def ordem(self, metodos: List[str]) -> List[str]:
+        """Métodos em ordem crescente de custo esperado sorteado"""
+        with self._lock:
+            custos = {}
+            for metodo in metodos:
+                estatistica = self._estatistica(metodo)
+                taxa = self.aleatorio.betavariate(estatistica.sucessos + 1, estatistica.falhas + 1)
+                custos[metodo] = estatistica.latencia / max(taxa, 1e-3)
+            ordem = sorted(metodos, key=custos.get)
+            if len(ordem) > 1 and self.aleatorio.random() < self.exploracao:
+                ordem.insert(0, ordem.pop(self.aleatorio.randrange(len(ordem))))
+            return ordem
+
+    def registrar(self, metodo: str, sucesso: bool, duracao: float):
+        """Registra o resultado e a duração (s) de uma tentativa"""
+        with self._lock:
+            for estatistica in self._metodos.values():
+                estatistica.sucessos *= self.desconto
+                estatistica.falhas *= self.desconto
+
+            estatistica = self._estatistica(metodo)
+            if sucesso:
+                estatistica.sucessos += 1
+                estatistica.total_sucessos += 1
+            else:
+                estatistica.falhas += 1
+            estatistica.tentativas += 1
+            estatistica.latencia += self.peso_latencia * (duracao - estatistica.latencia)
+            estatistica.duracoes.append(duracao)
+
+    def percentil(self, metodo: str, fracao: float = 0.9, minimo_amostras: int = 10) -> Optional[float]:
+        """Percentil das durações recentes do método (None com poucas amostras)"""
+        with self._lock:
+            duracoes = sorted(self._estatistica(metodo).duracoes)
+        if len(duracoes) < minimo_amostras:
+            return None
+        return duracoes[min(len(duracoes) - 1, int(fracao * len(duracoes)))]
+
+    def latencia(self, metodo: str) -> float:
+        """Latência média móvel do método (ou a inicial, sem medições)"""
+        with self._lock:
+            return self._estatistica(metodo).latencia
+
+    def estatisticas(self) -> Dict[str, Dict[str, float]]:
+        """Taxa de sucesso recente, latência média e custo esperado de cada método"""
+        with self._lock:
+            resultado = {}
+            for metodo, estatistica in self._metodos.items():
+                taxa = (estatistica.sucessos + 1) / (estatistica.sucessos + estatistica.falhas + 2)
+                resultado[metodo] = {
+                    "taxa_sucesso": round(taxa, 3),
+                    "latencia_media": round(estatistica.latencia, 2),
+                    "latencia_p90": (round(sorted(estatistica.duracoes)[int(0.9 * len(estatistica.duracoes))], 2)
+                                     if estatistica.duracoes else None),
+                    "custo_esperado": round(estatistica.latencia / taxa, 2),
+                    "tentativas": estatistica.tentativas,
+                    "sucessos": estatistica.total_sucessos,
+                }
+            return resultado
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Servidor local que imita o placafipe (e os sites do scraper alternativo)
+
+Serve a página inicial com o formulário sPlaca (e cookie de sessão), responde
+ao POST de consulta com a tabela fipeTablePriceDetail e simula latência,
+erros 500, rajadas de 403 e placas "não encontradas". O resultado de cada
+placa (dados, não encontrada ou erro) é função da placa e da semente, então
+a mesma lista de placas produz sempre as mesmas respostas: benchmarks e
+testes rodam offline e são reprodutíveis.
+
+Uso:
+    python servidor_replay.py [--porta 8765] [--latencia 0.05] [--taxa-erro 0.02]
+                              [--taxa-nao-encontrada 0.1] [--rajada-403 0.01 5]
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+MARCAS = [
+    ('FIAT', 'UNO MILLE FIRE FLEX'), ('VOLKSWAGEN', 'GOL 1.0 CITY'), ('CHEVROLET', 'ONIX 1.4 LT'),
+    ('FORD', 'KA SE 1.0'), ('HONDA', 'CIVIC LXS 1.8'), ('TOYOTA', 'COROLLA XEI 2.0'),
+    ('RENAULT', 'SANDERO EXPRESSION'), ('HYUNDAI', 'HB20 COMFORT PLUS'),
+]
+CORES = ['Prata', 'Branca', 'Preta', 'Vermelha', 'Cinza', 'Azul']
+UFS = [('MG', 'Belo Horizonte'), ('SP', 'São Paulo'), ('RJ', 'Rio de Janeiro'), ('PR', 'Curitiba')]
+
+PAGINA_INICIAL = """<html><head><title>Placa FIPE</title></head><body>
+<nav>Consulta de veículos</nav>
+<form method="post" action="/"><input id="sPlaca" name="sPlaca"><button type="submit">Pesquisar</button></form>
+</body></html>"""
+
+PAGINA_NAO_ENCONTRADA = """<html><body><form><input id="sPlaca" name="sPlaca"></form>
+<div class="alert">Placa não encontrada na base de dados.</div></body></html>"""
+
+PAGINA_SITE_PUBLICO = """<html><body><h1>Serviço público</h1>
+<p>Informações gerais sobre emplacamento. Consulte o órgão responsável.</p></body></html>"""
+
+
+def dados_da_placa(placa: str, semente: int = 42) -> Dict[str, str]:
+    """Dados fictícios, sempre os mesmos para a mesma placa"""
+    r = random.Random(f"{semente}:{placa}")
+    marca, modelo = r.choice(MARCAS)
+    uf, municipio = r.choice(UFS)
+    ano = r.randint(2000, 2023)
+    return {
+        'Marca': marca, 'Modelo': modelo, 'Importado': 'NÃO', 'Ano': str(ano),
+        'Ano Modelo': str(ano + r.randint(0, 1)), 'Cor': r.choice(CORES),
+        'Cilindrada': str(r.choice([999, 1398, 1598, 1998])), 'Combustível': 'Alcool / Gasolina',
+        'Chassi': '*****' + str(r.randint(10000, 99999)), 'Motor': '*****' + str(r.randint(100, 999)),
+        'Passageiros': '5', 'UF': uf, 'Município': municipio,
+    }
+
+
+def pagina_resultado(placa: str, semente: int = 42) -> str:
+    linhas = ''.join(f'<tr><td><b>{rotulo}:</b></td><td>{valor}</td></tr>'
+                     for rotulo, valor in dados_da_placa(placa, semente).items())
+    return (f'<html><body><h2>Resultado para {placa}</h2>'
+            f'<table class="fipeTablePriceDetail table">{linhas}</table></body></html>')
+
+
+class ServidorReplay:
+    """Stand-in do placafipe com falhas configuráveis"""
+
+    def __init__(self, porta: int = 0, latencia: float = 0.0, variacao_latencia: float = 0.0,
+                 taxa_erro: float = 0.0, taxa_nao_encontrada: float = 0.0,
+                 rajada_403: Tuple[float, int] = (0.0, 0), semente: int = 42):
+        """
+        Args:
+            porta: porta local (0 = livre)
+            latencia, variacao_latencia: segundos de atraso por resposta (latência ± variação)
+            taxa_erro: fração das placas cuja consulta responde 500
+            taxa_nao_encontrada: fração das placas "não encontradas"
+            rajada_403: (probabilidade por consulta de começar uma rajada, consultas bloqueadas na rajada)
+            semente: define quais placas caem em cada caso e os dados gerados
+        """
+        self.latencia = latencia
+        self.variacao_latencia = variacao_latencia
+        self.taxa_erro = taxa_erro
+        self.taxa_nao_encontrada = taxa_nao_encontrada
+        self.rajada_403 = rajada_403
+        self.semente = semente
+
+        self._aleatorio_rajadas = random.Random(semente)
+        self._bloqueios_restantes = 0
+        self._lock = threading.Lock()
+        self.contadores: Dict[str, int] = {}
+
+        self.servidor = ThreadingHTTPServer(('127.0.0.1', porta), self._criar_handler())
+        self.servidor.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.servidor.server_address[1]}"
+
+    def _sorteio(self, *partes) -> float:
+        """Número em [0, 1) determinado pelas partes e pela semente"""
+        resumo = hashlib.sha1(':'.join([str(self.semente), *map(str, partes)]).encode()).digest()
+        return int.from_bytes(resumo[:8], 'big') / 2 ** 64
+
+    def _contar(self, evento: str):
+        with self._lock:
+            self.contadores[evento] = self.contadores.get(evento, 0) + 1
+
+    def _em_rajada_403(self) -> bool:
+        probabilidade, duracao = self.rajada_403
+        if not probabilidade or not duracao:
+            return False
+        with self._lock:
+            if self._bloqueios_restantes > 0:
+                self._bloqueios_restantes -= 1
+                return True
+            if self._aleatorio_rajadas.random() < probabilidade:
+                self._bloqueios_restantes = duracao - 1
+                return True
+            return False
+
+    def _atraso(self, *partes) -> float:
+        if not self.latencia and not self.variacao_latencia:
+            return 0.0
+        return max(0.0, self.latencia + (2 * self._sorteio('latencia', *partes) - 1) * self.variacao_latencia)
+
+    def consultar(self, placa: Optional[str]) -> Tuple[int, str]:
+        """Status e HTML da consulta de uma placa"""
+        if not placa:
+            return 200, PAGINA_INICIAL
+        if self._em_rajada_403():
+            self._contar('403')
+            return 403, '<html><body>Acesso negado</body></html>'
+        if self._sorteio('erro', placa) < self.taxa_erro:
+            self._contar('500')
+            return 500, '<html><body>Internal Server Error</body></html>'
+        if self._sorteio('nao_encontrada', placa) < self.taxa_nao_encontrada:
+            self._contar('nao_encontrada')
+            return 200, PAGINA_NAO_ENCONTRADA
+        self._contar('resultado')
+        return 200, pagina_resultado(placa, self.semente)
+
+    def _criar_handler(self):
+        servidor = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            # Cabeçalho e corpo saem em writes separados; com Nagle cada resposta esperaria o ACK atrasado
+            disable_nagle_algorithm = True
+
+            def _responder(self, status: int, corpo: str, cookie: bool = False,
+                           tipo: str = 'text/html; charset=utf-8'):
+                dados = corpo.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', tipo)
+                if cookie:
+                    self.send_header('Set-Cookie', 'PHPSESSID=replay; Max-Age=3600; Path=/')
+                self.send_header('Content-Length', str(len(dados)))
+                self.end_headers()
+                self.wfile.write(dados)
+
+            def _placa(self, campos, nome: str) -> Optional[str]:
+                valores = campos.get(nome)
+                return valores[0].strip().upper() if valores else None
+
+            def do_GET(self):
+                partes = urlsplit(self.path)
+                if partes.path == '/__replay/contadores':
+                    # Contadores para quem roda o servidor em outro processo (não conta como requisição)
+                    with servidor._lock:
+                        contadores = dict(servidor.contadores)
+                    self._responder(200, json.dumps(contadores), tipo='application/json')
+                    return
+                servidor._contar('requisicoes')
+                placa = self._placa(parse_qs(partes.query), 'placa')
+                time.sleep(servidor._atraso('GET', partes.path, placa))
+                if partes.path in ('', '/'):
+                    servidor._contar('pagina_inicial')
+                    self._responder(200, PAGINA_INICIAL, cookie=True)
+                else:
+                    # Sites do scraper alternativo: páginas públicas sem dados do veículo
+                    servidor._contar('site_alternativo')
+                    self._responder(200, PAGINA_SITE_PUBLICO)
+
+            def do_POST(self):
+                servidor._contar('requisicoes')
+                corpo = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode('utf-8')
+                # Como no site real, só o campo sPlaca do formulário é reconhecido
+                placa = self._placa(parse_qs(corpo), 'sPlaca')
+                time.sleep(servidor._atraso('POST', placa))
+                status, html = servidor.consultar(placa)
+                self._responder(status, html)
+
+            def log_message(self, *args):
+                pass
+
+        return _Handler
+
+    def iniciar(self) -> 'ServidorReplay':
+        self.thread = threading.Thread(target=self.servidor.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def parar(self):
+        self.servidor.shutdown()
+        self.servidor.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *args):
+        self.parar()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor local que imita o placafipe")
+    parser.add_argument('--porta', type=int, default=8765)
+    parser.add_argument('--latencia', type=float, default=0.0, help="Segundos de atraso por resposta")
+    parser.add_argument('--variacao-latencia', type=float, default=0.0)
+    parser.add_argument('--taxa-erro', type=float, default=0.0)
+    parser.add_argument('--taxa-nao-encontrada', type=float, default=0.0)
+    parser.add_argument('--rajada-403', type=float, nargs=2, default=(0.0, 0),
+                        metavar=('PROBABILIDADE', 'DURACAO'))
+    parser.add_argument('--semente', type=int, default=42)
+    args = parser.parse_args()
+
+    servidor = ServidorReplay(args.porta, args.latencia, args.variacao_latencia, args.taxa_erro,
+                              args.taxa_nao_encontrada, (args.rajada_403[0], int(args.rajada_403[1])),
+                              args.semente)
+    # Linha lida pelo benchmark quando o servidor roda em outro processo
+    print(f"URL: {servidor.url}", flush=True)
+    try:
+        servidor.servidor.serve_forever()
+    except KeyboardInterrupt:
+        print("\n👋 Servidor parado")
+        servidor.parar()
+
+
+if __name__ == "__main__":
+    main()
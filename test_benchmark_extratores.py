@@ -0,0 +1,27 @@
+#!/usr/bin/env python3
+"""
+Teste do limite de regressão do micro-benchmark dos extratores
+"""
+
+from benchmark_extratores import comparar
+
+
+def test_comparar():
+    base = {
+        'a/tipica': {'tempo_ms': 1.0, 'memoria_kb': 100.0},
+        'b/pequena': {'tempo_ms': 0.01, 'memoria_kb': 2.0},
+    }
+    # Dentro do limite
+    assert comparar({'a/tipica': {'tempo_ms': 1.2, 'memoria_kb': 105.0}}, base) == []
+    # Tempo e memória acima do limite
+    regressoes = comparar({'a/tipica': {'tempo_ms': 1.5, 'memoria_kb': 120.0}}, base)
+    assert len(regressoes) == 2 and all(r.startswith('a/tipica') for r in regressoes)
+    # Casos minúsculos: piora relativa grande, absoluta dentro da folga (ruído)
+    assert comparar({'b/pequena': {'tempo_ms': 0.03, 'memoria_kb': 3.0}}, base) == []
+    # Casos novos não têm referência
+    assert comparar({'c/1mb': {'tempo_ms': 9.0, 'memoria_kb': 9.0}}, base) == []
+    print("✅ Limites de regressão ok")
+
+
+if __name__ == "__main__":
+    test_comparar()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Teste da busca indexada (FTS5 trigram no SQLite) e do prefixo de placa
+"""
+
+from sqlalchemy.dialects import mysql
+
+from app import app, db, Placa, Marca, ORDENS_PLACAS, busca_placas, cache_respostas, totais_placas
+from busca_placas import BuscaPlacas, prefixo_placa
+from persistencia import GravadorLotes
+
+MARCAS = [('FIAT', 'UNO MILLE'), ('VOLKSWAGEN', 'GOL 1.0'), ('CHEVROLET', 'ONIX LT'), ('FORD', 'KA SE')]
+
+
+def buscar(search):
+    """Placas encontradas pela condição indexada e pelos LIKE antigos"""
+    indexada = {p.placa for p in Placa.query.filter(busca_placas.condicao(search))}
+    like = {p.placa for p in Placa.query.filter(busca_placas._filtro_like(search))}
+    return indexada, like
+
+
+def test_busca_indexada():
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add_all([Placa(placa=f'{"ABC" if i < 30 else "XYZ"}{i % 10}{"D" if i % 2 else "0"}{i:02d}',
+                                  marca=MARCAS[i % 4][0], modelo=MARCAS[i % 4][1]) for i in range(60)])
+        db.session.commit()
+
+        assert not busca_placas.disponivel()
+        assert busca_placas.criar_indice() and busca_placas.disponivel()
+
+        for termo in ('fiat', 'UNO M', 'olks', 'LT', 'D', 'ABC', 'Z3', '"x', 'nada'):
+            indexada, like = buscar(termo)
+            assert indexada == like, termo
+        assert len(buscar('uno m')[0]) == 15
+
+        # Prefixo de placa: faixa do índice único, mesmo com separadores
+        assert prefixo_placa(' abc-1 ') == 'ABC1' and prefixo_placa('ABC1D23') == 'ABC1D23'
+        assert prefixo_placa('ABC') is None and prefixo_placa('UNO') is None and prefixo_placa('ABC1D234') is None
+        assert buscar('abc-1')[0] == {f'ABC1{"D" if i % 2 else "0"}{i:02d}' for i in (1, 11, 21)}
+
+        # Modelo que parece prefixo de placa: acha o modelo e as placas com o prefixo
+        db.session.add_all([Placa(placa='KKK0001', marca='FIAT', modelo='UNO1 FIRE'),
+                            Placa(placa='UNO1A23', marca='FORD', modelo='KA')])
+        db.session.commit()
+        indexada, like = buscar('uno1')
+        assert indexada == like == {'KKK0001', 'UNO1A23'}
+        assert busca_placas.contar('uno1') == 2
+        assert {p.placa for p in busca_placas.consulta_keyset(Placa.query, 'UNO1', ORDENS_PLACAS['id'])[0]} == \
+            {'KKK0001', 'UNO1A23'}
+        Placa.query.filter(Placa.placa.in_(['KKK0001', 'UNO1A23'])).delete()
+        db.session.commit()
+
+        # Gravações do worker (upsert em lote), edições e exclusões chegam ao índice
+        gravador = GravadorLotes('teste')
+        gravador._placas = {'ABC1D01': {'marca': 'HONDA', 'modelo': 'CIVIC EXL'},
+                            'QWE1234': {'marca': 'TOYOTA', 'modelo': 'COROLLA'}}
+        gravador._upsert_placas()
+        db.session.commit()
+        Placa.query.filter_by(placa='XYZ0000').delete()
+        db.session.commit()
+        assert buscar('civic')[0] == {'ABC1D01'} and buscar('coroll')[0] == {'QWE1234'}
+        assert 'ABC1D01' not in buscar('FIAT')[0] and 'XYZ0000' not in buscar('FIAT')[0]
+
+        # Sem os triggers o índice ficaria velho: volta para os LIKE
+        db.session.execute(db.text('DROP TRIGGER placa_busca_au'))
+        db.session.commit()
+        assert not busca_placas.disponivel() and buscar('civic')[0] == {'ABC1D01'}
+        assert busca_placas.criar_indice()
+    print("✅ Busca indexada OK")
+
+
+def test_busca_paginada():
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add_all([Placa(placa=f'PAG{i:04d}', marca=MARCAS[i % 4][0], modelo=MARCAS[i % 4][1])
+                            for i in range(100)])
+        db.session.commit()
+        busca_placas.criar_indice()
+        esperadas = [p.placa for p in Placa.query.filter(Placa.marca == 'VOLKSWAGEN').order_by(Placa.id)]
+
+        # Em ordem de id o cursor anda pelo rowid do FTS5
+        _, ordem = busca_placas.consulta_keyset(Placa.query, 'wagen', ORDENS_PLACAS['id'])
+        assert ordem.colunas[0].table.name == 'placa_busca' and ordem.chaves == ['id']
+    totais_placas.invalidar()
+    cache_respostas.limpar()
+
+    cliente = app.test_client()
+    for ordem in ('id', 'data_scraping'):
+        placas, cursor, anterior = [], '', None
+        while True:
+            dados = cliente.get(f'/api/placas?cursor={cursor}&per_page=7&search=wagen&ordem={ordem}').get_json()
+            placas += [p['placa'] for p in dados['placas']]
+            anterior, cursor = dados['anterior'], dados['proximo']
+            if not cursor:
+                break
+        # Busca por texto sai sempre em ordem de id (data_scraping ordenaria todas as linhas do termo)
+        assert placas == esperadas and dados['ordem'] == 'id'
+        if ordem == 'id':
+            dados = cliente.get(f'/api/placas?cursor={anterior}&per_page=7&search=wagen').get_json()
+            assert [p['placa'] for p in dados['placas']] == esperadas[14:21]
+
+    dados = cliente.get('/api/placas?page=2&per_page=10&search=wagen').get_json()
+    totais_placas.aguardar()
+    assert [p['placa'] for p in dados['placas']] == esperadas[10:20] and dados['total'] == 25
+    print("✅ Busca paginada OK")
+
+
+def test_busca_mysql_union():
+    class BuscaMySQL(BuscaPlacas):
+        dialeto = 'mysql'
+
+        def disponivel(self):
+            return True
+
+    def sql(search):
+        condicao = BuscaMySQL(db, Placa, Marca).condicao(search)
+        return str(condicao.compile(dialect=mysql.dialect(), compile_kwargs={'literal_binds': True}))
+
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(Placa(placa='AAA0001', marca='FIAT'))
+        db.session.commit()
+        marca, prefixo, so_texto = sql('fiat'), sql('uno1'), sql('civic')
+    # MATCH, marca_id e prefixo em consultas separadas: cada uma no seu índice, sem OR entre elas
+    assert 'UNION' in marca and ' OR ' not in marca
+    assert 'MATCH (placa_texto.placa, placa_texto.modelo)' in marca and 'marca_id IN' in marca
+    assert 'UNION' in prefixo and ' OR ' not in prefixo
+    assert "placa_prefixo.placa >= 'UNO1'" in prefixo and 'MATCH (placa_texto.placa' in prefixo
+    assert so_texto.startswith('MATCH (placa.placa, placa.modelo)')
+    print("✅ Busca MySQL com UNION OK")
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Teste do cache de consultas (LRU em memória -> banco -> scraping) com scraper e banco falsos
+"""
+
+from datetime import datetime, timedelta
+
+import cache_placas
+from cache_placas import CacheConsultaPlacas
+
+
+class _ScraperFalso:
+    """Retorna dados fixos, sem rede; 'SEM0000' não tem dados"""
+
+    def __init__(self):
+        self.consultadas = []
+
+    def scraping_placa(self, placa):
+        self.consultadas.append(placa)
+        if placa == 'SEM0000':
+            return None
+        return {'marca': 'FIAT', 'placa': placa}
+
+    def get_status(self):
+        return {'metodo': 'falso'}
+
+
+class _BancoFalso:
+    """Placas gravadas com a data do scraping; devolve só as que estão dentro do limite"""
+
+    def __init__(self, gravadas):
+        self.gravadas = gravadas
+        self.consultadas = []
+
+    def __call__(self, placa, limite):
+        self.consultadas.append(placa)
+        gravada = self.gravadas.get(placa)
+        if gravada and gravada[1] >= limite:
+            return dict(gravada[0])
+        return None
+
+
+def _com_relogio(teste):
+    """Troca o relógio do cache por um que só anda quando o teste manda"""
+    relogio = {'agora': datetime(2024, 1, 10, 12, 0)}
+    original = cache_placas._agora_gmt3
+    cache_placas._agora_gmt3 = lambda: relogio['agora']
+    try:
+        teste(relogio)
+    finally:
+        cache_placas._agora_gmt3 = original
+
+
+def test_ordem_memoria_banco_rede():
+    def teste(relogio):
+        agora = relogio['agora']
+        banco = _BancoFalso({
+            'BAN0001': ({'marca': 'VW'}, agora - timedelta(hours=2)),
+            'VEL0001': ({'marca': 'GM'}, agora - timedelta(hours=30)),  # fora do TTL
+        })
+        scraper = _ScraperFalso()
+        cache = CacheConsultaPlacas(scraper, banco, ttl_horas=24)
+
+        # Fresca no banco: não vai à rede e passa a ficar em memória
+        assert cache.scraping_placa('BAN0001') == {'marca': 'VW'} and cache.ultima_origem == 'banco'
+        assert cache.scraping_placa('BAN0001') == {'marca': 'VW'} and cache.ultima_origem == 'memoria'
+        assert banco.consultadas == ['BAN0001'] and scraper.consultadas == []
+
+        # Velha no banco ou ausente: scraping, e o resultado fica em memória
+        assert cache.scraping_placa('VEL0001') == {'marca': 'FIAT', 'placa': 'VEL0001'}
+        assert cache.ultima_origem == 'rede'
+        assert cache.scraping_placa('VEL0001')['marca'] == 'FIAT' and cache.ultima_origem == 'memoria'
+        assert scraper.consultadas == ['VEL0001'] and banco.consultadas == ['BAN0001', 'VEL0001']
+
+        # Sem dados não fica no cache: a próxima tentativa vai à rede de novo
+        assert cache.scraping_placa('SEM0000') is None
+        assert cache.scraping_placa('SEM0000') is None
+        assert scraper.consultadas == ['VEL0001', 'SEM0000', 'SEM0000']
+
+        # Cópias: alterar o retorno não altera o cache
+        cache.scraping_placa('BAN0001')['marca'] = 'ALTERADA'
+        assert cache.scraping_placa('BAN0001') == {'marca': 'VW'}
+
+        stats = cache.estatisticas()
+        assert (stats['hits_memoria'], stats['hits_banco'], stats['misses']) == (4, 1, 3)
+        assert stats['taxa_acerto'] == round(5 / 8, 4) and stats['placas_em_memoria'] == 2
+        assert cache.get_status() == {'metodo': 'falso', 'cache': stats}
+
+        # Entrada da memória que passou do TTL é descartada e consultada de novo
+        relogio['agora'] = agora + timedelta(hours=25)
+        assert cache.scraping_placa('BAN0001') == {'marca': 'FIAT', 'placa': 'BAN0001'}
+        assert cache.ultima_origem == 'rede' and banco.consultadas[-1] == 'BAN0001'
+
+    _com_relogio(teste)
+    print("✅ Ordem memória -> banco -> rede OK")
+
+
+def test_lru_e_cache_desligado():
+    scraper = _ScraperFalso()
+    banco = _BancoFalso({})
+    cache = CacheConsultaPlacas(scraper, banco, ttl_horas=24, tamanho_lru=2)
+    for placa in ('AAA0001', 'AAA0002', 'AAA0001', 'AAA0003'):
+        cache.scraping_placa(placa)
+    # AAA0002 foi a menos usada e saiu; AAA0001 continua em memória
+    assert list(cache._lru) == ['AAA0001', 'AAA0003']
+    cache.scraping_placa('AAA0002')
+    assert scraper.consultadas == ['AAA0001', 'AAA0002', 'AAA0003', 'AAA0002']
+    cache.esquecer('AAA0003')
+    assert 'AAA0003' not in cache._lru
+
+    # TTL 0: sempre vai à rede, sem consultar o banco nem guardar em memória
+    scraper, banco = _ScraperFalso(), _BancoFalso({})
+    cache = CacheConsultaPlacas(scraper, banco, ttl_horas=0)
+    assert not cache.ativo
+    cache.scraping_placa('AAA0001')
+    cache.scraping_placa('AAA0001')
+    assert scraper.consultadas == ['AAA0001', 'AAA0001'] and banco.consultadas == []
+    assert cache.estatisticas()['misses'] == 2 and cache.estatisticas()['placas_em_memoria'] == 0
+    print("✅ LRU e cache desligado OK")
+
+
+if __name__ == "__main__":
+    test_ordem_memoria_banco_rede()
+    test_lru_e_cache_desligado()
@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Teste do cache de respostas de /api/placas e /api/placa/<id> (ETag, 304, invalidação)
+"""
+
+from sqlalchemy import event
+
+from app import app, db, Placa, HistoricoScraping, ItemFila, cache_respostas, salvar_dados_placa, totais_placas
+from cache_respostas import CacheRespostas
+from persistencia import GravadorLotes
+
+
+class _ContadorConsultas:
+    """Conta os comandos SQL enviados ao banco"""
+
+    def __init__(self):
+        self.total = 0
+
+    def __call__(self, *args):
+        self.total += 1
+
+    def __enter__(self):
+        self.total = 0
+        event.listen(db.engine, 'before_cursor_execute', self)
+        return self
+
+    def __exit__(self, *args):
+        event.remove(db.engine, 'before_cursor_execute', self)
+
+
+def _gravar(placas):
+    """Grava placas pelo caminho do worker (itens reservados, upsert em lote + invalidação)"""
+    historico = HistoricoScraping(total_placas=len(placas))
+    db.session.add(historico)
+    db.session.flush()
+    itens = {placa: ItemFila(historico_id=historico.id, placa=placa, status='em_execucao', worker_id='teste')
+             for placa in placas}
+    db.session.add_all(itens.values())
+    db.session.commit()
+
+    gravador = GravadorLotes('teste')
+    for placa, dados in placas.items():
+        gravador.adicionar(itens[placa].id, historico.id, 'concluido', placa, dados)
+    gravador.descarregar()
+
+
+def test_respostas_em_cache():
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add_all([Placa(placa=f'CAC{i:04d}', marca='FIAT', modelo='UNO', ano='2010')
+                            for i in range(30)])
+        db.session.commit()
+        ids = {p.placa: p.id for p in Placa.query}
+    totais_placas.invalidar()
+    cache_respostas.limpar()
+    cliente = app.test_client()
+
+    with app.app_context(), _ContadorConsultas() as consultas:
+        detalhe = cliente.get(f"/api/placa/{ids['CAC0001']}")
+        assert detalhe.status_code == 200 and detalhe.get_json()['ano'] == 2010
+        etag, modificado = detalhe.headers['ETag'], detalhe.headers['Last-Modified']
+        assert consultas.total > 0 and 'no-cache' in detalhe.headers['Cache-Control']
+
+        # Sem nada gravado: 304 sem corpo, ou o corpo da memória, sem ir ao banco
+        consultas.total = 0
+        revalidada = cliente.get(f"/api/placa/{ids['CAC0001']}", headers={'If-None-Match': etag})
+        assert revalidada.status_code == 304 and revalidada.data == b''
+        revalidada = cliente.get(f"/api/placa/{ids['CAC0001']}", headers={'If-Modified-Since': modificado})
+        assert revalidada.status_code == 304
+        assert cliente.get(f"/api/placa/{ids['CAC0001']}").get_json() == detalhe.get_json()
+        assert consultas.total == 0
+
+        lista = cliente.get('/api/placas?page=1&per_page=10')
+        assert lista.get_json()['total'] == 30 and not lista.get_json()['total_aproximado']
+        cliente.get(f"/api/placa/{ids['CAC0002']}")
+        consultas.total = 0
+        # Mesmos parâmetros em outra ordem: mesma resposta
+        assert cliente.get('/api/placas?per_page=10&page=1',
+                           headers={'If-None-Match': lista.headers['ETag']}).status_code == 304
+        assert consultas.total == 0
+        assert cliente.get('/api/placa/999999').status_code == 404  # erro não fica no cache
+
+    # O worker grava CAC0001: o detalhe dela e a listagem vencem, o de CAC0002 não
+    with app.app_context():
+        _gravar({'CAC0001': {'marca': 'FORD', 'modelo': 'KA', 'ano': '2015'}})
+    with app.app_context(), _ContadorConsultas() as consultas:
+        atualizada = cliente.get(f"/api/placa/{ids['CAC0001']}", headers={'If-None-Match': etag})
+        assert atualizada.status_code == 200 and atualizada.headers['ETag'] != etag
+        assert (atualizada.get_json()['marca'], atualizada.get_json()['ano']) == ('FORD', 2015)
+        consultas.total = 0
+        assert cliente.get(f"/api/placa/{ids['CAC0002']}").status_code == 200 and consultas.total == 0
+
+        # Listagem remontada; o total vencido volta como aproximado e não fica no cache
+        lista_nova = cliente.get('/api/placas?page=1&per_page=10', headers={'If-None-Match': lista.headers['ETag']})
+        assert lista_nova.status_code == 200 and lista_nova.get_json()['placas'][1]['marca'] == 'FORD'
+        assert lista_nova.get_json()['total_aproximado']
+        totais_placas.aguardar()
+        exata = cliente.get('/api/placas?page=1&per_page=10')
+        assert not exata.get_json()['total_aproximado']
+        consultas.total = 0
+        assert cliente.get('/api/placas?page=1&per_page=10').get_json() == exata.get_json()
+        assert consultas.total == 0
+
+    print(f"✅ Cache de respostas OK: {cache_respostas.estatisticas()}")
+
+
+def test_invalidacao_pelo_orm():
+    """Gravações fora do GravadorLotes (salvar_dados_placa, edição direta do modelo) também invalidam"""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add_all([Placa(placa='ORM0001', marca='FIAT'), Placa(placa='ORM0002', marca='FIAT')])
+        db.session.commit()
+        ids = {p.placa: p.id for p in Placa.query}
+    totais_placas.invalidar()
+    cache_respostas.limpar()
+    cliente = app.test_client()
+
+    def etags():
+        return {placa: cliente.get(f'/api/placa/{id_}').headers['ETag'] for placa, id_ in ids.items()}
+
+    def revalidar(placa, etag):
+        return cliente.get(f'/api/placa/{ids[placa]}', headers={'If-None-Match': etag})
+
+    antes = etags()
+    lista = cliente.get('/api/placas?page=1&per_page=10').headers['ETag']
+
+    # Caminho linha a linha do scraping
+    with app.app_context():
+        salvar_dados_placa('ORM0001', {'marca': 'FORD'})
+        db.session.commit()
+    resposta = revalidar('ORM0001', antes['ORM0001'])
+    assert resposta.status_code == 200 and resposta.get_json()['marca'] == 'FORD'
+    assert revalidar('ORM0002', antes['ORM0002']).status_code == 304
+    assert cliente.get('/api/placas?page=1&per_page=10', headers={'If-None-Match': lista}).status_code == 200
+
+    # Edição direta do modelo; um rollback não invalida nada
+    antes = etags()
+    with app.app_context():
+        Placa.query.filter_by(placa='ORM0002').one().modelo = 'KA'
+        db.session.rollback()
+    assert revalidar('ORM0002', antes['ORM0002']).status_code == 304
+    with app.app_context():
+        Placa.query.filter_by(placa='ORM0002').one().modelo = 'KA'
+        db.session.commit()
+    resposta = revalidar('ORM0002', antes['ORM0002'])
+    assert resposta.status_code == 200 and resposta.get_json()['modelo'] == 'KA'
+    assert revalidar('ORM0001', antes['ORM0001']).status_code == 304
+    print("✅ Invalidação pelas gravações do ORM OK")
+
+
+def test_cache_respostas_versao():
+    cache = CacheRespostas(ttl=60, maximo=2)
+    vencidos = []
+    cache.ao_mudar(lambda: vencidos.append(True))
+
+    # Gravação durante a montagem: a resposta não fica no cache
+    versao = cache.versao()
+    cache.invalidar_placas(['AAA0001'])
+    cache.guardar('/lista?', b'[1]', versao)
+    assert cache.obter('/lista?') is None and vencidos == [True]
+
+    # Last-Modified só muda quando o corpo muda
+    primeira = cache.guardar('/lista?', b'[1]', cache.versao())
+    cache.invalidar_placas([])
+    assert cache.obter('/lista?') is None
+    igual = cache.guardar('/lista?', b'[1]', cache.versao())
+    assert igual['etag'] == primeira['etag'] and igual['modificado'] == primeira['modificado']
+    diferente = cache.guardar('/lista?', b'[2]', cache.versao())
+    assert diferente['modificado'] > primeira['modificado']
+
+    # LRU com índice por placa
+    cache.guardar('/placa/1?', b'{}', cache.versao(), placa='AAA0001')
+    cache.guardar('/placa/2?', b'{}', cache.versao(), placa='AAA0002')
+    assert cache.obter('/lista?') is None and 'AAA0001' in cache._por_placa
+    cache.guardar('/placa/3?', b'{}', cache.versao(), placa='AAA0003')
+    assert 'AAA0001' not in cache._por_placa and cache.obter('/placa/2?') is not None
+
+    assert CacheRespostas(ttl=0).obter('/lista?') is None
+    print("✅ Versões do cache de respostas OK")
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Teste da preparação de sessão: página inicial carregada uma vez, jar reaproveitado após reinício
+"""
+
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from cookies_sessao import InicializadorSessao
+from scraper_requests import PlacaFipeScraperRequests
+
+HTML_RESULTADO = b"""<html><body><table class="table">
+<tr><td>Marca:</td><td>FIAT</td></tr><tr><td>Modelo:</td><td>UNO</td></tr>
+</table></body></html>"""
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    paginas_iniciais = 0
+    bloquear = False
+    demora = 0.0
+
+    def _responder(self, status, corpo, cookie=False):
+        self.send_response(status)
+        if cookie:
+            self.send_header('Set-Cookie', 'sessao=abc; Max-Age=3600; Path=/')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def do_GET(self):
+        _Handler.paginas_iniciais += 1
+        time.sleep(_Handler.demora)
+        self._responder(200, b'<html>inicio</html>', cookie=True)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        if _Handler.bloquear or 'sessao=abc' not in self.headers.get('Cookie', ''):
+            self._responder(403, b'bloqueado')
+        else:
+            self._responder(200, HTML_RESULTADO)
+
+    def log_message(self, *args):
+        pass
+
+
+def _scraper(base_url, diretorio):
+    scraper = PlacaFipeScraperRequests(base_url=base_url)
+    scraper.inicializador = InicializadorSessao(scraper.session, [base_url], nome='teste',
+                                                diretorio=diretorio)
+    scraper._get_random_delay = lambda: 0
+    return scraper
+
+
+def test_cookies_sessao():
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{servidor.server_address[1]}"
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        try:
+            scraper = _scraper(base_url, diretorio)
+            for placa in ('ABC1234', 'DEF5678', 'GHI9012'):
+                assert scraper.scraping_placa(placa) == {'marca': 'FIAT', 'modelo': 'UNO'}
+            assert _Handler.paginas_iniciais == 1
+
+            # "Reinício do worker": novo scraper lê o jar do disco
+            scraper = _scraper(base_url, diretorio)
+            assert scraper.inicializador.valido
+            assert scraper.scraping_placa('JKL3456')['marca'] == 'FIAT'
+            assert _Handler.paginas_iniciais == 1
+
+            # 403 descarta os cookies; a próxima consulta prepara de novo
+            _Handler.bloquear = True
+            assert scraper.scraping_placa('MNO7890') is None
+            assert not scraper.inicializador.valido
+            _Handler.bloquear = False
+            assert scraper.scraping_placa('MNO7890')['marca'] == 'FIAT'
+            assert _Handler.paginas_iniciais == 2
+
+            # Várias threads com a sessão vencida: só a primeira carrega a página inicial
+            scraper.inicializador.invalidar()
+            _Handler.demora = 0.2
+            resultados = []
+            threads = [threading.Thread(target=lambda: resultados.append(scraper.inicializador.garantir()))
+                       for _ in range(6)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            assert _Handler.paginas_iniciais == 3
+            assert sorted(resultados, key=str) == [None] * 5 + [True]
+            print(f"✅ Sessão: {scraper.inicializador.estatisticas()}")
+        finally:
+            _Handler.demora = 0.0
+            servidor.shutdown()
+
+
+if __name__ == "__main__":
+    test_cookies_sessao()
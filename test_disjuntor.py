@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Teste dos disjuntores por site do scraper alternativo
+"""
+
+import time
+
+from disjuntor import Disjuntor, ABERTO, FECHADO, MEIO_ABERTO
+from scraper_alternative import PlacaFipeScraperAlternative
+
+
+def test_disjuntor():
+    disjuntor = Disjuntor('teste', limite_falhas=3, espera=0.05, espera_maxima=0.1)
+    for _ in range(3):
+        assert disjuntor.permite()
+        disjuntor.registrar_falha()
+    assert disjuntor.estado == ABERTO
+    assert not disjuntor.permite()
+
+    # Depois da espera: uma única consulta de teste
+    time.sleep(0.06)
+    assert disjuntor.permite()
+    assert disjuntor.estado == MEIO_ABERTO
+    assert not disjuntor.permite()
+
+    # Teste falhou: reabre com espera dobrada
+    disjuntor.registrar_falha()
+    assert disjuntor.estado == ABERTO and disjuntor.espera == 0.1
+    time.sleep(0.11)
+    assert disjuntor.permite()
+    disjuntor.registrar_sucesso()
+    assert disjuntor.estado == FECHADO and disjuntor.espera == 0.05
+    print("✅ Disjuntor OK")
+
+
+def test_alternativo_pula_sites_abertos():
+    scraper = PlacaFipeScraperAlternative()
+    scraper._get_random_delay = lambda: 0
+    tentativas = []
+    scraper._try_site = lambda site, placa: tentativas.append(site['name'])
+    for nome, disjuntor in scraper.disjuntores.items():
+        disjuntor.limite_falhas = 2
+        disjuntor.espera = 3600
+    scraper.disjuntores['generico'].permite = lambda: False
+
+    for placa in ('ABC1234', 'DEF5678', 'GHI9012', 'JKL3456'):
+        assert scraper.scraping_placa(placa)['formato_placa'] == 'antigo'
+
+    # Cada site foi consultado só até o disjuntor abrir
+    assert len(tentativas) == 2 * len(scraper.sites)
+    assert all(s['estado'] == ABERTO for n, s in scraper.get_status().items() if n != 'generico')
+    print("✅ Sites mortos pulados")
+
+
+if __name__ == "__main__":
+    test_disjuntor()
+    test_alternativo_pula_sites_abertos()
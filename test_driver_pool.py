@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Teste do pool de navegadores com um WebDriver falso (sem abrir o Chrome)
+"""
+
+import threading
+import time
+
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+from driver_pool import PoolChromeDriver, _Navegador
+
+
+class _DriverFalso:
+    """Responde title e switch_to como o Chrome; travado=True simula um navegador morto"""
+
+    def __init__(self, numero):
+        self.numero = numero
+        self.travado = False
+        self.fechado = False
+        self.switch_to = self
+
+    @property
+    def title(self):
+        if self.travado:
+            raise WebDriverException("chrome not reachable")
+        return f"Chrome {self.numero}"
+
+    def window(self, handle):
+        pass
+
+    def quit(self):
+        self.fechado = True
+
+
+class _PoolFalso(PoolChromeDriver):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.drivers = []
+
+    def _criar_navegador(self):
+        driver = _DriverFalso(len(self.drivers))
+        self.drivers.append(driver)
+        self.navegadores_criados += 1
+        return _Navegador(driver, [f"aba-{driver.numero}-{i}" for i in range(self.abas_por_navegador)])
+
+
+def test_reuso_e_verificacao_de_saude():
+    pool = _PoolFalso(tamanho=2, max_paginas=3)
+    with pool.obter_aba() as aba:
+        assert aba.executar(lambda driver: driver.title) == "Chrome 0"
+    with pool.obter_aba() as aba:
+        aba.registrar_pagina()
+    assert len(pool.drivers) == 1
+
+    # Navegador que parou de responder é trocado antes de entregar a aba
+    pool.drivers[0].travado = True
+    with pool.obter_aba() as aba:
+        assert aba.executar(lambda driver: driver.title) == "Chrome 1"
+    assert pool.drivers[0].fechado and not pool.drivers[1].fechado
+
+    # Reciclagem depois de max_paginas
+    for _ in range(3):
+        with pool.obter_aba() as aba:
+            aba.registrar_pagina()
+    assert pool.drivers[1].fechado
+    stats = pool.estatisticas()
+    assert stats["navegadores_criados"] == 2 and stats["navegadores_reciclados"] == 2
+    assert stats["navegadores_abertos"] == 0 and stats["abas_em_uso"] == 0
+    pool.fechar()
+    print("✅ Reuso e verificação de saúde OK")
+
+
+def test_aposenta_depois_de_webdriver_exception():
+    pool = _PoolFalso(tamanho=1)
+
+    # Erro de página (elemento não encontrado, timeout) não derruba o navegador
+    try:
+        with pool.obter_aba():
+            raise TimeoutException("sem resultado")
+    except TimeoutException:
+        pass
+    assert not pool.drivers[0].fechado and pool.estatisticas()["navegadores_abertos"] == 1
+
+    # Outra WebDriverException: o navegador sai do pool ao devolver a aba
+    try:
+        with pool.obter_aba():
+            raise WebDriverException("tab crashed")
+    except WebDriverException:
+        pass
+    assert pool.drivers[0].fechado and pool.estatisticas()["navegadores_abertos"] == 0
+
+    with pool.obter_aba() as aba:
+        assert aba.executar(lambda driver: driver.title) == "Chrome 1"
+    assert pool.estatisticas()["navegadores_reciclados"] == 1
+    pool.fechar()
+    print("✅ Navegador aposentado após WebDriverException")
+
+
+def test_fechar_esvazia_o_pool():
+    pool = _PoolFalso(tamanho=2, abas_por_navegador=2)
+    abas = [pool._reservar(None) for _ in range(4)]
+    assert len(pool.drivers) == 2
+
+    # Uma consulta esperando por aba acorda com erro quando o pool fecha
+    erros = []
+
+    def esperar():
+        try:
+            with pool.obter_aba():
+                pass
+        except RuntimeError as e:
+            erros.append(e)
+
+    thread = threading.Thread(target=esperar)
+    thread.start()
+    time.sleep(0.1)
+    pool.fechar()
+    thread.join(timeout=2)
+    assert not thread.is_alive() and len(erros) == 1
+    assert all(driver.fechado for driver in pool.drivers)
+    assert pool.estatisticas()["navegadores_abertos"] == 0
+
+    # Abas devolvidas depois do fechamento não reabrem navegadores
+    for aba in abas:
+        pool._devolver(aba)
+    try:
+        pool._reservar(None)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("pool fechado não deveria entregar abas")
+    assert len(pool.drivers) == 2
+    print("✅ Pool fechado e esvaziado")
+
+
+if __name__ == "__main__":
+    test_reuso_e_verificacao_de_saude()
+    test_aposenta_depois_de_webdriver_exception()
+    test_fechar_esvazia_o_pool()
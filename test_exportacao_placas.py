@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Teste da exportação em fluxo (/api/placas/export)
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+
+from app import app, db, Placa, COLUNAS_EXPORTACAO
+from exportacao_placas import gerar_csv
+
+
+def test_exportar_placas():
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add_all([Placa(placa=f'AAA{i:04d}', marca='FIAT' if i % 2 else 'FORD',
+                                  modelo='UNO, "MILLE"' if i == 1 else None) for i in range(250)])
+        db.session.commit()
+
+    os.environ['EXPORTACAO_LOTE'] = '50'
+    try:
+        cliente = app.test_client()
+        resposta = cliente.get('/api/placas/export')
+        assert resposta.is_streamed and resposta.mimetype == 'text/csv'
+        linhas = list(csv.DictReader(io.StringIO(resposta.get_data(as_text=True))))
+        assert len(linhas) == 250 and list(linhas[0]) == COLUNAS_EXPORTACAO
+        assert linhas[1]['modelo'] == 'UNO, "MILLE"' and linhas[0]['modelo'] == ''
+        assert linhas[0]['data_scraping'].startswith('20')
+
+        resposta = cliente.get('/api/placas/export?formato=ndjson&search=FORD&gzip=1')
+        assert resposta.mimetype == 'application/gzip'
+        assert 'placas.ndjson.gz' in resposta.headers['Content-Disposition']
+        objetos = [json.loads(l) for l in gzip.decompress(resposta.get_data()).decode().splitlines()]
+        assert len(objetos) == 125 and all(o['marca'] == 'FORD' for o in objetos)
+        assert objetos[0]['placa'] == 'AAA0000' and objetos[0]['generico'] is None
+
+        assert cliente.get('/api/placas/export?formato=xml').status_code == 400
+    finally:
+        del os.environ['EXPORTACAO_LOTE']
+
+    # Blocos limitados, sem acumular o arquivo inteiro
+    blocos = list(gerar_csv(((i, 'x' * 100) for i in range(5000)), ['id', 'texto'], tamanho_bloco=4096))
+    assert len(blocos) > 100 and max(len(b) for b in blocos) < 4096 + 200
+    print("✅ Exportação em fluxo OK")
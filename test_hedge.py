@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Teste do fallback com hedge no scraper híbrido
+"""
+
+import threading
+import time
+
+from rate_controller import ControladorTaxa
+from scraper_hybrid import PlacaFipeScraperHybrid
+
+
+class _ScraperLento:
+    def __init__(self, demora, dados):
+        self.demora = demora
+        self.dados = dados
+        self.chamadas = 0
+        self.ultimo_status = 200
+        self.em_andamento = 0
+        self.pico = 0  # consultas simultâneas na mesma instância
+
+    def scraping_placa(self, placa):
+        self.chamadas += 1
+        self.em_andamento += 1
+        self.pico = max(self.pico, self.em_andamento)
+        try:
+            time.sleep(self.demora)
+            return dict(self.dados) if self.dados else None
+        finally:
+            self.em_andamento -= 1
+
+
+def _hibrido(requests, alternativo, controlador_taxa=None):
+    hibrido = PlacaFipeScraperHybrid(preferencia="requests", hedge=True, controlador_taxa=controlador_taxa)
+    hibrido.scraper_requests = requests
+    hibrido.scraper_alternative = alternativo
+    hibrido.disponivel["selenium"] = False
+    # Limiar conhecido: 10 medições de 0.1s -> p90 = 0.1s
+    for _ in range(10):
+        hibrido.seletor.registrar("requests", True, 0.1)
+    return hibrido
+
+
+def test_hedge():
+    # Primário rápido: o paralelo nunca é iniciado
+    rapido = _ScraperLento(0.01, {'marca': 'FIAT'})
+    reserva = _ScraperLento(0.01, {'marca': 'OUTRA'})
+    hibrido = _hibrido(rapido, reserva)
+    for i in range(5):
+        assert hibrido.scraping_placa(f"ABC{i:04d}") == {'marca': 'FIAT'}
+    assert reserva.chamadas == 0
+
+    # Primário travado: o alternativo começa após ~0.1s e vence
+    travado = _ScraperLento(2.0, {'marca': 'FIAT'})
+    hibrido = _hibrido(travado, _ScraperLento(0.05, {'marca': 'OUTRA'}))
+    inicio = time.time()
+    assert hibrido.scraping_placa("DEF5678") == {'marca': 'OUTRA'}
+    assert time.time() - inicio < 1.0
+    assert hibrido.get_status()["hedge"]["vencidos_pelo_paralelo"] == 1
+
+    # Primário falha rápido: fallback imediato, sem esperar o limiar
+    hibrido = _hibrido(_ScraperLento(0.0, None), _ScraperLento(0.0, {'marca': 'OUTRA'}))
+    assert hibrido.scraping_placa("GHI9012") == {'marca': 'OUTRA'}
+    assert hibrido.hedges_iniciados == 0
+    hibrido.close()
+    print("✅ Hedge OK")
+
+
+def test_hedge_metodos_ocupados():
+    # Os dois métodos ainda rodam consultas que perderam o hedge
+    requests, alternativo = _ScraperLento(0.3, {'marca': 'FIAT'}), _ScraperLento(0.5, {'marca': 'OUTRA'})
+    hibrido = _hibrido(requests, alternativo)
+    for metodo in ("requests", "alternative"):
+        hibrido._iniciar_em_paralelo(metodo, "PER0001", threading.Event())
+
+    # A placa seguinte espera o primeiro liberar em vez de dividir a instância com a perdida
+    inicio = time.time()
+    assert hibrido.scraping_placa("ABC1234") == {'marca': 'FIAT'}
+    assert 0.25 < time.time() - inicio < 1.0
+    assert requests.pico == 1 and alternativo.pico == 1
+    assert requests.chamadas == 2 and alternativo.chamadas == 1
+
+    # Um método ocupado sai da fila: o hedge não o inicia em paralelo
+    hibrido._iniciar_em_paralelo("requests", "PER0002", threading.Event())
+    assert hibrido.scraping_placa("DEF5678") == {'marca': 'OUTRA'}
+    assert hibrido.hedges_iniciados == 0 and requests.pico == 1
+    hibrido.close()
+    print("✅ Hedge com métodos ocupados OK")
+
+
+
+def test_hedge_com_ritmo():
+    # Intervalo de 0.3s entre consultas da fonte, limiar de 0.1s: a espera pelo
+    # ritmo não conta para o limiar, então um primário rápido nunca dispara o hedge
+    controlador = ControladorTaxa(intervalo_min=0.3, intervalo_max=1.0, intervalo_inicial=0.3)
+    rapido = _ScraperLento(0.01, {'marca': 'FIAT'})
+    reserva = _ScraperLento(0.01, {'marca': 'OUTRA'})
+    hibrido = _hibrido(rapido, reserva, controlador)
+    inicio = time.time()
+    for i in range(3):
+        assert hibrido.scraping_placa(f"ABC{i:04d}") == {'marca': 'FIAT'}
+    assert time.time() - inicio > 0.5  # a segunda e a terceira esperaram o ritmo
+    assert hibrido.hedges_iniciados == 0 and reserva.chamadas == 0
+
+    # Primário travado depois de sair: o hedge continua valendo
+    hibrido = _hibrido(_ScraperLento(2.0, {'marca': 'FIAT'}), _ScraperLento(0.01, {'marca': 'OUTRA'}),
+                       ControladorTaxa(intervalo_min=0.3, intervalo_max=1.0, intervalo_inicial=0.3))
+    assert hibrido.scraping_placa("DEF5678") == {'marca': 'OUTRA'}
+    assert hibrido.hedges_iniciados == 1
+    hibrido.close()
+    print("✅ Hedge com ritmo da fonte OK")
+
+
+if __name__ == "__main__":
+    test_hedge()
+    test_hedge_metodos_ocupados()
+    test_hedge_com_ritmo()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Teste da importação de placas em fluxo (/api/importar-placas)
+"""
+
+import io
+import os
+
+from app import app, db, Placa, HistoricoScraping, ItemFila
+from ingestao_placas import ArquivoMultipart, em_lotes, extrair_placas, ler_linhas
+
+
+class _FluxoEmPartes:
+    """Corpo que chega em pedaços pequenos; chama `ao_ler(bytes_lidos)` a cada leitura"""
+
+    def __init__(self, conteudo, parte=40, ao_ler=None):
+        self.conteudo = io.BytesIO(conteudo)
+        self.parte = parte
+        self.ao_ler = ao_ler
+
+    def tell(self):
+        return self.conteudo.tell()
+
+    def seek(self, *args):
+        return self.conteudo.seek(*args)
+
+    def read(self, tamanho=-1):
+        if self.ao_ler:
+            self.ao_ler(self.tell())
+        return self.conteudo.read(self.parte if tamanho < 0 else min(tamanho, self.parte))
+
+
+def _placas(conteudo: bytes, formato=None, bloco=7):
+    return list(extrair_placas(ler_linhas(io.BytesIO(conteudo), tamanho_bloco=bloco), formato))
+
+
+def test_leitura_em_fluxo():
+    # Blocos pequenos partem linhas, \r\n e caracteres UTF-8 ao meio
+    assert _placas(b'\xef\xbb\xbfABC1234\r\nabc-1d23\r\n\r\nJos\xc3\xa91234\nXYZ9999') == \
+        ['ABC1234', 'abc-1d23', 'José1234', 'XYZ9999']
+    assert _placas(b'id;Placa;uf\n1;ABC1234;MG\n2;DEF5678;SP\n\n3;;RJ\n') == ['ABC1234', 'DEF5678', '']
+    assert _placas(b'ABC1234,MG\nDEF5678,SP\n') == ['ABC1234', 'DEF5678']
+    assert _placas(b'{"placa": "ABC1234"}\n"DEF5678"\n{quebrado\n{"outro": 1}\n') == \
+        ['ABC1234', 'DEF5678', '{quebrado', None]
+    assert _placas(b'ABC1234\n', formato='csv') == ['ABC1234']
+    assert _placas(b'') == []
+    assert list(em_lotes(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+    # Multipart lido em fluxo: as primeiras linhas saem antes do corpo chegar ao fim
+    linhas = [f'AAA{i:04d}' for i in range(200)]
+    corpo = (b'--limite\r\nContent-Disposition: form-data; name="outro"\r\n\r\nx\r\n'
+             b'--limite\r\nContent-Disposition: form-data; name="arquivo"; filename="p.txt"\r\n'
+             b'Content-Type: text/plain\r\n\r\n' + '\n'.join(linhas).encode() + b'\r\n--limite--\r\n')
+    fluxo = _FluxoEmPartes(corpo)
+    arquivo = ArquivoMultipart(fluxo, 'limite', 'arquivo', tamanho_bloco=40)
+    assert arquivo.abrir() and arquivo.mimetype == 'text/plain'
+    lidas = ler_linhas(arquivo)
+    assert next(lidas) == 'AAA0000' and fluxo.tell() < len(corpo) // 4
+    assert [next(lidas)] + list(lidas) == linhas[1:]
+    assert not ArquivoMultipart(_FluxoEmPartes(corpo), 'limite', 'nada').abrir()
+    print("✅ Leitura em fluxo OK")
+
+
+def test_importar_placas():
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        db.session.add(Placa(placa='CAD0001', marca='FIAT'))
+        db.session.commit()
+
+    linhas = (['placa'] + [f'AAA{i:04d}' for i in range(5)] + ['CAD0001'] + [f'AAA{i:04d}' for i in range(5, 25)]
+              + ['aaa0003', 'lixo', 'CAD0001', 'AAA0024'])
+    corpo = ('\n'.join(linhas) + '\n').encode()
+    os.environ['IMPORTACAO_LOTE'] = '10'
+    try:
+        cliente = app.test_client()
+        resposta = cliente.post('/api/importar-placas', data=corpo, content_type='text/csv')
+        dados = resposta.get_json()
+        assert dados['status'] == 'sucesso', dados
+        resumo = dados['importacao']
+        assert resumo['linhas'] == 30
+        assert resumo['aceitas'] == 25
+        assert resumo['duplicadas'] == 3  # repetidas em lotes diferentes, cadastradas ou não
+        assert resumo['ja_cadastradas'] == 1
+        assert resumo['rejeitadas'] == 1 and resumo['motivos'] == {'tamanho': 1}
+
+        with app.app_context():
+            historico = db.session.get(HistoricoScraping, dados['historico_id'])
+            assert historico.total_placas == 25 and historico.status == 'em_andamento'
+            itens = ItemFila.query.filter_by(historico_id=historico.id).order_by(ItemFila.id).all()
+            assert [i.placa for i in itens] == [f'AAA{i:04d}' for i in range(25)]
+            assert all(i.status == 'pendente' for i in itens)
+
+        # Multipart com NDJSON
+        arquivo = (io.BytesIO(b'{"placa": "bbb1c23"}\n{"placa": "CAD0001"}\n'), 'placas.ndjson')
+        dados = cliente.post('/api/importar-placas?formato=ndjson', data={'arquivo': arquivo},
+                             content_type='multipart/form-data').get_json()
+        assert dados['importacao']['aceitas'] == 1 and dados['importacao']['ja_cadastradas'] == 1
+
+        # Histórico parado no meio do upload: os lotes seguintes não entram na fila
+        corpo = ('\n'.join(f'PAR{i:04d}' for i in range(50)) + '\n').encode()
+
+        def parar(lidos):
+            if lidos > len(corpo) // 2:
+                cliente.post('/api/parar-scraping')
+
+        dados = cliente.post('/api/importar-placas', input_stream=_FluxoEmPartes(corpo, ao_ler=parar),
+                             content_length=len(corpo), content_type='text/plain').get_json()
+        assert dados['status'] == 'sucesso' and dados['importacao']['interrompida']
+        with app.app_context():
+            historico = db.session.get(HistoricoScraping, dados['historico_id'])
+            enfileiradas = ItemFila.query.filter_by(historico_id=historico.id).count()
+            assert historico.status == 'parado' and 0 < enfileiradas < 50
+            assert historico.total_placas == enfileiradas == dados['importacao']['aceitas']
+
+        # Nada novo: nenhum histórico criado
+        dados = cliente.post('/api/importar-placas', data=b'CAD0001\n', content_type='text/plain').get_json()
+        assert dados['status'] == 'erro'
+        assert cliente.post('/api/importar-placas?formato=xml', data=b'x').status_code == 400
+    finally:
+        del os.environ['IMPORTACAO_LOTE']
+    print("✅ Importação em fluxo OK")
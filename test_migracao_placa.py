@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Teste da migração online de placa para o esquema tipado (SQLite)
+"""
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, text
+
+from app import app, db, Placa, Marca, busca_placas
+from campos_placa import ano_inteiro, inteiro_pequeno, sigla_uf
+import migracao_placa
+
+# A tabela placa como era antes: tudo texto
+placa_antiga = Table(
+    'placa', MetaData(),
+    Column('id', Integer, primary_key=True),
+    Column('placa', String(7), nullable=False, unique=True),
+    *[Column(nome, String(tamanho)) for nome, tamanho in (
+        ('marca', 100), ('generico', 100), ('modelo', 100), ('importado', 10), ('ano', 10),
+        ('ano_modelo', 10), ('cor', 50), ('cilindrada', 50), ('combustivel', 50), ('chassi', 50),
+        ('motor', 50), ('passageiros', 10), ('uf', 10), ('municipio', 100))],
+    Column('data_scraping', DateTime),
+    Column('status', String(20)),
+)
+
+# Valores que o scraping já gravou, dos normais aos que viram NULL
+ANOS = ['2011', '2011/2012', ' 1998 ', '2000-2018', '20111', '11', '', None, 'abc']
+PASSAGEIROS = ['5', '5 lugares', '0', '1234', '', None, '12']
+UFS = ['MG', ' sp', 'Mg ', 'XX', 'MGX', '', None]
+MARCAS = ['FIAT', ' FIAT ', 'VW', '', None]
+
+
+def _linha(i):
+    return {'placa': f'MIG{i:04d}', 'marca': MARCAS[i % len(MARCAS)], 'modelo': f'MODELO {i % 3}',
+            'ano': ANOS[i % len(ANOS)], 'ano_modelo': ANOS[(i + 1) % len(ANOS)],
+            'passageiros': PASSAGEIROS[i % len(PASSAGEIROS)], 'uf': UFS[i % len(UFS)],
+            'combustivel': 'FLEX' if i % 2 else 'Gasolina', 'status': 'atualizado'}
+
+
+def test_conversoes():
+    assert [ano_inteiro(a) for a in ANOS] == [2011, 2011, 1998, None, None, None, None, None, None]
+    assert [inteiro_pequeno(p) for p in PASSAGEIROS] == [5, 5, None, None, None, None, 12]
+    assert [sigla_uf(u) for u in UFS] == ['MG', 'SP', 'MG', None, None, None, None]
+    assert ano_inteiro(2011) == 2011 and inteiro_pequeno(7) == 7
+    print("✅ Conversões OK")
+
+
+def test_migracao_online():
+    with app.app_context():
+        db.drop_all()
+        busca_placas.remover_indice_sqlite()
+        placa_antiga.create(db.session.connection())
+        db.session.execute(placa_antiga.insert(), [_linha(i) for i in range(40)])
+        # Índice de busca do formato antigo (conteúdo direto de placa.marca)
+        db.session.execute(text("CREATE VIRTUAL TABLE placa_busca USING fts5(placa, marca, modelo, "
+                                "content='placa', content_rowid='id', tokenize='trigram')"))
+        db.session.commit()
+        # Versão nova subindo com o banco antigo: avisa e não mexe em placa
+        db.create_all()
+        assert migracao_placa.esquema_antigo() and not busca_placas.criar_indice()
+
+        assert migracao_placa.preparar()
+        # Gravações do app antigo durante a cópia: antes e depois da faixa já copiada
+        db.session.execute(text("UPDATE placa SET marca = 'HONDA', ano = '2020' WHERE placa = 'MIG0001'"))
+        db.session.execute(text("DELETE FROM placa WHERE placa = 'MIG0002'"))
+        db.session.execute(placa_antiga.insert(), [_linha(40)])
+        db.session.commit()
+        assert migracao_placa.copiar(lote=7, pausa=0)
+        db.session.execute(text("UPDATE placa SET uf = 'rj', passageiros = '2' WHERE placa = 'MIG0003'"))
+        db.session.commit()
+
+        esperadas = {linha['placa']: linha for linha in db.session.execute(placa_antiga.select()).mappings()}
+        assert migracao_placa.finalizar()
+        assert not migracao_placa.esquema_antigo()
+
+        placas = {p.placa: p for p in Placa.query}
+        assert set(placas) == set(esperadas) and len(placas) == 40
+        for placa, antiga in esperadas.items():
+            nova = placas[placa]
+            assert nova.id == antiga['id'] and nova.modelo == antiga['modelo']
+            # As conversões em SQL dão o mesmo que as de campos_placa
+            assert nova.ano == ano_inteiro(antiga['ano']), (antiga['ano'], nova.ano)
+            assert nova.ano_modelo == ano_inteiro(antiga['ano_modelo'])
+            assert nova.passageiros == inteiro_pequeno(antiga['passageiros']), antiga['passageiros']
+            assert nova.uf == sigla_uf(antiga['uf'])
+            assert nova.marca == ((antiga['marca'] or '').strip() or None)
+            assert nova.combustivel == antiga['combustivel']
+        assert (placas['MIG0001'].marca, placas['MIG0001'].ano) == ('HONDA', 2020)
+        assert (placas['MIG0003'].uf, placas['MIG0003'].passageiros) == ('RJ', 2)
+        assert {m.nome for m in Marca.query} == {'FIAT', 'VW', 'HONDA'}
+
+        # Busca recriada sobre a tabela nova, filtros pelos índices novos
+        assert busca_placas.disponivel()
+        assert {p.placa for p in Placa.query.filter(busca_placas.condicao('hond'))} == {'MIG0001'}
+        assert migracao_placa.limpar() and migracao_placa.ler_estado() is None
+        assert 'placa_antiga' not in db.inspect(db.engine).get_table_names()
+
+    cliente = app.test_client()
+    dados = cliente.get('/api/placas?marca=FIAT&uf=mg').get_json()
+    assert dados['placas'] and all(p['marca'] == 'FIAT' and p['uf'] == 'MG' for p in dados['placas'])
+    assert dados['total'] == len(dados['placas'])
+    assert cliente.get('/api/placas?cursor=&marca=FIAT&uf=mg&ano=2011').get_json()['placas'][0]['ano'] == 2011
+    assert cliente.get('/api/placas?uf=XX').status_code == 400
+    print("✅ Migração online OK")
+
+
+def test_migracao_desfeita():
+    with app.app_context():
+        db.drop_all()
+        busca_placas.remover_indice_sqlite()
+        placa_antiga.create(db.session.connection())
+        db.session.execute(placa_antiga.insert(), [_linha(i) for i in range(5)])
+        db.session.commit()
+
+        assert migracao_placa.preparar()
+        assert not migracao_placa.finalizar()  # cópia não feita: nada é trocado
+        assert migracao_placa.limpar()
+        nomes = {nome for (nome,) in db.session.execute(text("SELECT name FROM sqlite_master"))}
+        assert 'placa_nova' not in nomes and not any(n.startswith('migracao_placa') for n in nomes)
+        db.session.execute(text("INSERT INTO placa (placa, marca) VALUES ('MIG9999', 'FIAT')"))
+        db.session.commit()
+        db.session.execute(text("DROP TABLE placa"))
+        db.session.commit()
+    print("✅ Migração desfeita OK")
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Teste da paginação por cursor e dos totais em cache (/api/placas)
+"""
+
+import time
+from datetime import datetime, timedelta
+
+from app import app, db, Placa, ORDENS_PLACAS, cache_respostas, totais_placas
+from paginacao import TotaisEmCache, codificar_cursor, decodificar_cursor
+
+
+def percorrer(cliente, consulta, chave='proximo', cursor=''):
+    """Placas de todas as páginas seguindo os tokens até o fim"""
+    placas, paginas = [], 0
+    while True:
+        dados = cliente.get(f'/api/placas?{consulta}&cursor={cursor}').get_json()
+        pagina = [p['placa'] for p in dados['placas']]
+        placas = placas + pagina if chave == 'proximo' else pagina + placas
+        paginas += 1
+        cursor = dados[chave]
+        if not cursor:
+            return placas, paginas, dados
+
+
+def test_paginacao_cursor():
+    base = datetime(2024, 1, 1)
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        # Datas repetidas (empates resolvidos pelo id) e algumas sem data
+        db.session.add_all([Placa(placa=f'PAG{i:04d}', marca='FIAT' if i % 3 else 'FORD',
+                                  data_scraping=base + timedelta(hours=i // 4)) for i in range(45)])
+        db.session.flush()
+        for placa in Placa.query.filter(Placa.id.in_([7, 8, 30])):
+            placa.data_scraping = None
+        db.session.commit()
+        por_id = [p.placa for p in Placa.query.order_by(Placa.id)]
+        recentes = [p.placa for p in Placa.query.order_by(Placa.data_scraping.desc(), Placa.id.desc())]
+    totais_placas.invalidar()
+    cache_respostas.limpar()
+
+    cliente = app.test_client()
+    placas, paginas, ultima = percorrer(cliente, 'per_page=20')
+    assert placas == por_id and paginas == 3 and ultima['anterior']
+
+    placas, paginas, primeira = percorrer(cliente, 'per_page=20', 'anterior', ultima['anterior'])
+    assert placas == por_id[:40] and paginas == 2 and primeira['proximo']
+
+    placas, paginas, _ = percorrer(cliente, 'per_page=7&ordem=data_scraping')
+    assert placas == recentes and recentes[-3:] == ['PAG0029', 'PAG0007', 'PAG0006'] and paginas == 7
+
+    placas, _, _ = percorrer(cliente, 'per_page=10&search=FORD')
+    assert placas == [p for i, p in enumerate(por_id) if i % 3 == 0]
+
+    # Total: contado na primeira vez (fora da requisição) e guardado
+    totais_placas.aguardar()
+    dados = cliente.get('/api/placas?cursor=&per_page=20').get_json()
+    assert dados['total'] == 45 and dados['total_aproximado'] is False
+
+    # Modo por página continua disponível
+    dados = cliente.get('/api/placas?page=3&per_page=20').get_json()
+    assert [p['placa'] for p in dados['placas']] == por_id[40:] and dados['pages'] == 3
+
+    assert cliente.get('/api/placas?cursor=lixo').status_code == 400
+    token = codificar_cursor(ORDENS_PLACAS['id'], [5])
+    assert cliente.get(f'/api/placas?cursor={token}&ordem=data_scraping').status_code == 400
+    assert cliente.get('/api/placas?cursor=&ordem=placa').status_code == 400
+    print("✅ Paginação por cursor OK")
+
+
+def test_cursor_e_totais():
+    ordem = ORDENS_PLACAS['data_scraping']
+    posicao = [datetime(2024, 5, 1, 12, 30), 99]
+    token = codificar_cursor(ordem, posicao, anterior=True)
+    assert '=' not in token and decodificar_cursor(token, ordem) == (posicao, True)
+    assert decodificar_cursor(codificar_cursor(ordem, [None, 3]), ordem) == ([None, 3], False)
+
+    chamadas = []
+
+    def contar(chave):
+        chamadas.append(chave)
+        time.sleep(0.05)
+        return 100 + len(chamadas)
+
+    totais = TotaisEmCache(contar, ttl=0.2, estimar=lambda chave: 90)
+    assert totais.obter('') == (90, True)  # estimativa enquanto conta em segundo plano
+    assert totais.obter('') == (90, True) and totais.aguardar()
+    assert totais.obter('') == (101, False) and chamadas == ['']
+    time.sleep(0.25)
+    assert totais.obter('') == (101, True) and totais.aguardar()  # vencido: valor antigo e recálculo
+    assert totais.obter('') == (102, False)
+    assert totais.obter('x', esperar=True) == (103, False)
+    assert TotaisEmCache(contar, ttl=0).obter('') == (104, False)
+    print("✅ Cursores e totais em cache OK")
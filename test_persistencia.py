@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Teste da gravação em lote (GravadorLotes) com um banco SQLite temporário
+"""
+
+import contextlib
+import io
+
+from sqlalchemy import event
+
+from app import app, db, Placa, HistoricoScraping, ItemFila
+from persistencia import GravadorLotes
+
+
+@contextlib.contextmanager
+def _comandos(ao_executar=None):
+    """Comandos SQL enviados ao banco dentro do bloco; ao_executar(sql) pode levantar um erro"""
+    executados = []
+
+    def registrar(conexao, cursor, sql, parametros, contexto, varios):
+        executados.append(sql)
+        if ao_executar:
+            ao_executar(sql)
+
+    event.listen(db.engine, 'before_cursor_execute', registrar)
+    try:
+        yield executados
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', registrar)
+
+
+def _criar_itens(placas_por_historico, worker_id='teste'):
+    """Históricos com itens já reservados por `worker_id`; retorna {historico_id: [item_id, ...]}"""
+    itens = {}
+    for placas in placas_por_historico:
+        historico = HistoricoScraping(total_placas=len(placas))
+        db.session.add(historico)
+        db.session.flush()
+        fila = [ItemFila(historico_id=historico.id, placa=p, status='em_execucao', worker_id=worker_id)
+                for p in placas]
+        db.session.add_all(fila)
+        db.session.flush()
+        itens[historico.id] = [item.id for item in fila]
+    db.session.commit()
+    return itens
+
+
+def _updates(executados, tabela):
+    return [sql for sql in executados if sql.lstrip().upper().startswith(f'UPDATE {tabela.upper()}')]
+
+
+def test_updates_agrupados():
+    """Um UPDATE por (histórico, status) e os contadores do histórico uma vez por lote"""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        itens = _criar_itens([['AAA0001', 'AAA0002', 'AAA0003'], ['BBB0001', 'BBB0002']])
+        (h1, ids1), (h2, ids2) = itens.items()
+
+        gravador = GravadorLotes('teste', tamanho_lote=10)
+        gravador.adicionar(ids1[0], h1, 'concluido', 'AAA0001', {'marca': 'FIAT'})
+        gravador.adicionar(ids2[0], h2, 'concluido', 'BBB0001', {'marca': 'VW'})
+        gravador.adicionar(ids1[1], h1, 'sem_dados')
+        gravador.adicionar(ids1[2], h1, 'concluido', 'AAA0003', {'marca': 'FIAT'})
+        gravador.adicionar(ids2[1], h2, 'erro')
+        assert len(gravador) == 5 and not gravador.precisa_descarregar()
+
+        with _comandos() as executados:
+            assert gravador.descarregar() == {h1, h2}
+
+        # (h1, concluido), (h2, concluido), (h1, sem_dados), (h2, erro)
+        assert len(_updates(executados, 'item_fila')) == 4
+        assert len(_updates(executados, 'historico_scraping')) == 2
+        assert len(gravador) == 0 and gravador.lotes_gravados == 1 and gravador.placas_gravadas == 3
+
+        status = {item.id: item.status for item in ItemFila.query}
+        assert [status[i] for i in ids1] == ['concluido', 'sem_dados', 'concluido']
+        assert [status[i] for i in ids2] == ['concluido', 'erro']
+        assert db.session.get(HistoricoScraping, h1).placas_processadas == 2
+        assert db.session.get(HistoricoScraping, h2).placas_processadas == 1
+        assert Placa.query.filter_by(placa='AAA0001').one().marca == 'FIAT'
+
+        # Segundo lote do mesmo histórico: contador soma, não sobrescreve
+        extra = ItemFila(historico_id=h1, placa='AAA0004', status='em_execucao', worker_id='teste')
+        db.session.add(extra)
+        db.session.commit()
+        gravador.adicionar(extra.id, h1, 'concluido', 'AAA0004', {'marca': 'GM'})
+        with _comandos() as executados:
+            gravador.descarregar()
+        assert len(_updates(executados, 'historico_scraping')) == 1
+        assert db.session.get(HistoricoScraping, h1).placas_processadas == 3
+        print("✅ UPDATEs agrupados por histórico e status")
+
+
+def test_lease_perdido():
+    """Itens reservados por outro worker não são fechados nem contados, e a placa deles não é gravada"""
+    with app.app_context():
+        dialeto = db.engine.dialect
+        retornar = dialeto.update_returning
+        # Com UPDATE ... RETURNING (SQLite) e com SELECT ... FOR UPDATE antes (MySQL)
+        for usar_returning in (retornar, False):
+            dialeto.update_returning = usar_returning
+            db.drop_all()
+            db.create_all()
+            historico_id, ids = next(iter(_criar_itens([['CCC0001', 'CCC0002']]).items()))
+            # O lease do segundo item venceu e outro worker o reservou e gravou a placa
+            db.session.get(ItemFila, ids[1]).worker_id = 'outro'
+            db.session.add(Placa(placa='CCC0002', marca='VW', status='atualizado'))
+            db.session.commit()
+
+            gravador = GravadorLotes('teste')
+            gravador.adicionar(ids[0], historico_id, 'concluido', 'CCC0001', {'marca': 'FIAT'})
+            gravador.adicionar(ids[1], historico_id, 'concluido', 'CCC0002', {'marca': 'FIAT'})
+            saida = io.StringIO()
+            try:
+                with contextlib.redirect_stdout(saida):
+                    gravador.descarregar()
+            finally:
+                dialeto.update_returning = retornar
+
+            assert '1 item(ns) com lease perdido' in saida.getvalue()
+            assert db.session.get(ItemFila, ids[0]).status == 'concluido'
+            assert db.session.get(ItemFila, ids[1]).status == 'em_execucao'
+            assert db.session.get(ItemFila, ids[1]).worker_id == 'outro'
+            assert db.session.get(HistoricoScraping, historico_id).placas_processadas == 1
+            assert Placa.query.filter_by(placa='CCC0001').one().marca == 'FIAT'
+            assert Placa.query.filter_by(placa='CCC0002').one().marca == 'VW'
+            assert gravador.placas_gravadas == 1
+    print("✅ Lease perdido avisado, não contado e sem sobrescrever a placa")
+
+
+def test_rollback_em_erro():
+    """Erro no meio do lote desfaz tudo e mantém os resultados para uma nova tentativa"""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        historico_id, ids = next(iter(_criar_itens([['DDD0001']]).items()))
+
+        def falhar_no_historico(sql):
+            if sql.lstrip().upper().startswith('UPDATE HISTORICO_SCRAPING'):
+                raise RuntimeError('banco caiu')
+
+        gravador = GravadorLotes('teste')
+        gravador.adicionar(ids[0], historico_id, 'concluido', 'DDD0001', {'marca': 'FIAT'})
+        with _comandos(falhar_no_historico):
+            try:
+                gravador.descarregar()
+            except RuntimeError:
+                pass
+            else:
+                raise AssertionError("o erro do banco deveria chegar ao worker")
+
+        # Nada do lote ficou gravado: nem a placa nem o fechamento do item
+        assert Placa.query.filter_by(placa='DDD0001').first() is None
+        assert db.session.get(ItemFila, ids[0]).status == 'em_execucao'
+        assert db.session.get(HistoricoScraping, historico_id).placas_processadas == 0
+        assert len(gravador) == 1 and gravador.lotes_gravados == 0
+
+        # A nova tentativa grava o mesmo lote
+        gravador.descarregar()
+        assert db.session.get(ItemFila, ids[0]).status == 'concluido'
+        assert Placa.query.filter_by(placa='DDD0001').one().marca == 'FIAT'
+        print("✅ Rollback do lote em erro")
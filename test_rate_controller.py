@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Teste do controle de ritmo (AIMD) com um relógio falso, sem esperas reais
+"""
+
+import math
+
+import rate_controller
+from rate_controller import ControladorTaxa
+
+
+def _perto(valor, esperado):
+    return math.isclose(valor, esperado, rel_tol=1e-9)
+
+
+class _RelogioFalso:
+    """Substitui o módulo time em rate_controller: sleep só avança o relógio"""
+
+    def __init__(self):
+        self.agora = 1000.0
+        self.esperas = []
+
+    def monotonic(self):
+        return self.agora
+
+    def sleep(self, segundos):
+        self.esperas.append(segundos)
+        self.agora += segundos
+
+
+def _com_relogio(teste):
+    relogio = _RelogioFalso()
+    original = rate_controller.time
+    rate_controller.time = relogio
+    try:
+        teste(relogio)
+    finally:
+        rate_controller.time = original
+
+
+def test_reducao_e_recuperacao():
+    controlador = ControladorTaxa(intervalo_min=2, intervalo_max=120, intervalo_inicial=30, passos_ate_maximo=20)
+    assert _perto(controlador.intervalo('requests'), 30)
+
+    # Bloqueio e timeout dobram o intervalo, até o teto
+    controlador.registrar('requests', 429, False)
+    assert _perto(controlador.intervalo('requests'), 60)
+    controlador.registrar('requests', 503, False)
+    assert _perto(controlador.intervalo('requests'), 120)
+    controlador.registrar('requests', 'timeout', False)
+    controlador.registrar('requests', 403, False)
+    assert _perto(controlador.intervalo('requests'), 120)
+
+    # Outras falhas (ex.: 404) não mexem na taxa
+    controlador.registrar('requests', 404, False)
+    assert _perto(controlador.intervalo('requests'), 120)
+
+    # Cada resposta saudável soma um passo fixo à taxa, até o piso do intervalo
+    passo = (1 / 2 - 1 / 120) / 20
+    controlador.registrar('requests', 200, True)
+    assert _perto(controlador.intervalo('requests'), 1 / (1 / 120 + passo))
+    for _ in range(9):
+        controlador.registrar('requests', None, True)
+    assert _perto(controlador.intervalo('requests'), 1 / (1 / 120 + 10 * passo))
+    for _ in range(15):
+        controlador.registrar('requests', 200, True)
+    assert _perto(controlador.intervalo('requests'), 2)
+
+    # Fontes independentes
+    assert _perto(controlador.intervalo('selenium'), 30)
+    estatisticas = controlador.estatisticas()['requests']
+    assert estatisticas['sucessos'] == 25 and estatisticas['bloqueios'] == 4
+    print("✅ Redução e recuperação OK")
+
+
+def test_aguardar_com_relogio_falso():
+    def teste(relogio):
+        controlador = ControladorTaxa(intervalo_min=2, intervalo_max=120, intervalo_inicial=10)
+
+        # Balde cheio: a primeira sai na hora, a segunda espera o intervalo
+        assert controlador.aguardar('requests') == 0
+        assert _perto(controlador.aguardar('requests'), 10)
+
+        # Tempo ocioso repõe no máximo a capacidade do balde
+        relogio.agora += 500
+        assert controlador.aguardar('requests') == 0
+        assert _perto(controlador.aguardar('requests'), 10)
+
+        # Bloqueio esvazia o balde: a próxima espera o intervalo novo inteiro
+        relogio.agora += 500
+        controlador.registrar('requests', 429, False)
+        assert _perto(controlador.aguardar('requests'), 20)
+        assert len(relogio.esperas) == 3 and all(map(_perto, relogio.esperas, [10, 10, 20]))
+
+    _com_relogio(teste)
+    print("✅ Espera pelo balde OK")
+
+
+def test_limites_invalidos():
+    for limites in ({'intervalo_min': 0}, {'intervalo_min': 10, 'intervalo_max': 5}):
+        try:
+            ControladorTaxa(**limites)
+        except ValueError:
+            continue
+        raise AssertionError(f"limites aceitos: {limites}")
+    # O intervalo inicial fica dentro dos limites
+    assert _perto(ControladorTaxa(intervalo_min=2, intervalo_max=60, intervalo_inicial=600).intervalo('x'), 60)
+    assert _perto(ControladorTaxa(intervalo_min=2, intervalo_max=60, intervalo_inicial=0.5).intervalo('x'), 2)
+    print("✅ Limites OK")
+
+
+def test_do_ambiente_divide_entre_processos(monkeypatch):
+    monkeypatch.setenv('SCRAPING_DELAY_MIN', '2')
+    monkeypatch.setenv('SCRAPING_DELAY_MAX', '60')
+    monkeypatch.setenv('SCRAPING_DELAY_INICIAL', '10')
+    monkeypatch.delenv('SCRAPING_WORKERS', raising=False)
+    assert _perto(ControladorTaxa.do_ambiente().intervalo('x'), 10)
+
+    # Três processos com o mesmo .env: juntos mantêm uma consulta a cada 10s
+    monkeypatch.setenv('SCRAPING_WORKERS', '3')
+    controlador = ControladorTaxa.do_ambiente()
+    assert _perto(controlador.intervalo('x'), 30)
+    assert _perto(1 / controlador.taxa_min, 180) and _perto(1 / controlador.taxa_max, 6)
+
+    monkeypatch.setenv('SCRAPING_WORKERS', '0')
+    try:
+        ControladorTaxa.do_ambiente()
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("SCRAPING_WORKERS=0 aceito")
+    print("✅ Taxa dividida entre processos OK")
+
+
+if __name__ == "__main__":
+    import pytest
+
+    test_reducao_e_recuperacao()
+    test_aguardar_com_relogio_falso()
+    test_limites_invalidos()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_do_ambiente_divide_entre_processos(monkeypatch)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Teste do roteamento aprendido: só a rota vencedora é tentada em regime
+"""
+
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import parse_qs
+
+from cookies_sessao import InicializadorSessao
+from scraper_async import PlacaFipeScraperAsync
+from scraper_requests import PlacaFipeScraperRequests
+
+HTML_RESULTADO = b"""<html><body><table class="table">
+<tr><td>Marca:</td><td>FIAT</td></tr><tr><td>Modelo:</td><td>UNO</td></tr>
+</table></body></html>"""
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    rota_valida = ('/buscar', 'sPlaca')
+    nao_encontradas = set()
+    posts = 0
+
+    def _responder(self, status, corpo):
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def do_GET(self):
+        self._responder(200, b'<html>inicio</html>')
+
+    def do_POST(self):
+        _Handler.posts += 1
+        campos = parse_qs(self.rfile.read(int(self.headers.get('Content-Length', 0))).decode())
+        caminho, campo = _Handler.rota_valida
+        if self.path == caminho and campo in campos:
+            if campos[campo][0] in _Handler.nao_encontradas:
+                self._responder(200, 'Placa não encontrada'.encode())
+            else:
+                self._responder(200, HTML_RESULTADO)
+        else:
+            self._responder(404, b'nada')
+
+    def log_message(self, *args):
+        pass
+
+
+def test_roteamento():
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{servidor.server_address[1]}"
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        try:
+            scraper = PlacaFipeScraperRequests(base_url=base_url)
+            scraper.inicializador = InicializadorSessao(scraper.session, [base_url], nome='teste',
+                                                        diretorio=diretorio)
+            scraper._get_random_delay = lambda: 0
+
+            # Primeira placa: sondagem até achar /buscar com sPlaca
+            assert scraper.scraping_placa('ABC1234')['marca'] == 'FIAT'
+            assert _Handler.posts == 6
+
+            # Regime: um POST por placa
+            for placa in ('DEF5678', 'GHI9012', 'JKL3456'):
+                _Handler.posts = 0
+                assert scraper.scraping_placa(placa)['marca'] == 'FIAT'
+                assert _Handler.posts == 1
+
+            # Site muda: a vencedora falha duas vezes e então todas são sondadas
+            _Handler.rota_valida = ('/consulta', 'placa')
+            assert scraper.scraping_placa('MNO7890') is None
+            assert scraper.scraping_placa('MNO7890') is None
+            assert scraper.scraping_placa('MNO7890')['marca'] == 'FIAT'
+            assert scraper.roteador.vencedora == ('/consulta', 'padrao')
+
+            # Placa não encontrada prova que a rota funciona: um POST e a rota continua a primeira
+            _Handler.nao_encontradas = {'NAO0001', 'NAO0002', 'NAO0003'}
+            for placa in sorted(_Handler.nao_encontradas):
+                _Handler.posts = 0
+                assert scraper.scraping_placa(placa) is None
+                assert _Handler.posts == 1
+                assert scraper.roteador.ordem() == [('/consulta', 'padrao')]
+            _Handler.posts = 0
+            assert scraper.scraping_placa('PQR1234')['marca'] == 'FIAT' and _Handler.posts == 1
+            assert scraper.roteador.sondagens == 2
+            print(f"✅ Roteamento: {scraper.roteador.estatisticas()}")
+        finally:
+            _Handler.rota_valida = ('/buscar', 'sPlaca')
+            _Handler.nao_encontradas = set()
+            servidor.shutdown()
+
+
+def test_roteamento_async():
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{servidor.server_address[1]}"
+
+    with tempfile.TemporaryDirectory() as diretorio:
+        try:
+            scraper = PlacaFipeScraperAsync(base_url=base_url, max_concorrencia=8, max_por_host=4,
+                                            delay_min=0, delay_max=0)
+            scraper.inicializador = InicializadorSessao(scraper.session, [base_url], nome='teste',
+                                                        diretorio=diretorio)
+            _Handler.posts = 0
+            _Handler.nao_encontradas = {'ASY0003'}
+            placas = [f"ASY{i:04d}" for i in range(20)]
+            resultados = scraper.scraping_multiplas_placas(placas)
+
+            # Uma placa sonda (6 POSTs até /buscar com sPlaca); as outras esperam e fazem um POST cada
+            assert len(resultados) == 19
+            assert _Handler.posts == 6 + 19
+            assert scraper.roteador.sondagens == 1
+            assert scraper.roteador.vencedora == ('/buscar', 'splaca')
+            print(f"✅ Roteamento assíncrono: {_Handler.posts} POSTs para {len(placas)} placas")
+        finally:
+            _Handler.nao_encontradas = set()
+            servidor.shutdown()
+
+
+if __name__ == "__main__":
+    test_roteamento()
+    test_roteamento_async()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Teste do scraper assíncrono contra um servidor HTTP local
+"""
+
+import asyncio
+import tempfile
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import aiohttp
+
+from cookies_sessao import InicializadorSessao
+from scraper_async import PlacaFipeScraperAsync
+
+HTML_RESULTADO = """
+<html><body>
+<table class="table">
+<tr><td>Marca:</td><td>FIAT</td></tr>
+<tr><td>Modelo:</td><td>UNO MILLE</td></tr>
+<tr><td>Cor:</td><td>Branca</td></tr>
+<tr><td>UF:</td><td>MG</td></tr>
+</table>
+</body></html>
+"""
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Simula o placafipe: página inicial + POST de consulta com latência"""
+
+    lock = threading.Lock()
+    em_andamento = 0
+    pico = 0
+    paginas_iniciais = 0
+    sem_cookie = 0
+    inicio_posts = []
+
+    def _entrar(self):
+        with _Handler.lock:
+            _Handler.em_andamento += 1
+            _Handler.pico = max(_Handler.pico, _Handler.em_andamento)
+
+    def _sair(self):
+        with _Handler.lock:
+            _Handler.em_andamento -= 1
+
+    def _responder(self, corpo, cookie=False):
+        dados = corpo.encode('utf-8')
+        self.send_response(200)
+        if cookie:
+            self.send_header('Set-Cookie', 'sessao=abc; Max-Age=3600; Path=/')
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def do_GET(self):
+        self._entrar()
+        try:
+            _Handler.paginas_iniciais += 1
+            time.sleep(0.05)
+            self._responder('<html><body><form></form></body></html>', cookie=True)
+        finally:
+            self._sair()
+
+    def do_POST(self):
+        self._entrar()
+        try:
+            tamanho = int(self.headers.get('Content-Length', 0))
+            self.rfile.read(tamanho)
+            _Handler.inicio_posts.append(time.monotonic())
+            if 'sessao=abc' not in self.headers.get('Cookie', ''):
+                _Handler.sem_cookie += 1
+            time.sleep(0.05)
+            self._responder(HTML_RESULTADO)
+        finally:
+            self._sair()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def test_scraper_async_servidor_local():
+    """Processa várias placas em paralelo sem passar do limite por host"""
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+
+    try:
+        base_url = f"http://127.0.0.1:{servidor.server_address[1]}"
+        scraper = PlacaFipeScraperAsync(base_url=base_url, max_concorrencia=8,
+                                        max_por_host=3, delay_min=0, delay_max=0)
+        diretorio = tempfile.mkdtemp()
+        scraper.inicializador = InicializadorSessao(scraper.session, [base_url], nome='teste',
+                                                    diretorio=diretorio)
+
+        placas = [f"ABC{i:04d}" for i in range(12)]
+        resultados = scraper.scraping_multiplas_placas(placas)
+
+        # Página inicial carregada uma vez para o lote, cookie enviado em todas as consultas
+        assert _Handler.paginas_iniciais == 1 and _Handler.sem_cookie == 0
+        assert len(scraper.scraping_multiplas_placas(placas[:3])) == 3
+        assert _Handler.paginas_iniciais == 1 and _Handler.sem_cookie == 0
+
+        assert [r['placa'] for r in resultados] == placas
+        assert resultados[0]['marca'] == 'FIAT'
+        assert resultados[0]['modelo'] == 'UNO MILLE'
+        assert resultados[0]['uf'] == 'MG'
+        assert 1 < _Handler.pico <= 3
+        print(f"✅ {len(resultados)} placas processadas, pico de {_Handler.pico} conexões")
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+def test_scraper_async_chamada_direta():
+    """scraping_placa_async funciona sem o lote; a pausa depois da página inicial não trava as outras placas"""
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+
+    try:
+        base_url = f"http://127.0.0.1:{servidor.server_address[1]}"
+        scraper = PlacaFipeScraperAsync(base_url=base_url, delay_min=0.5, delay_max=0.5)
+        scraper.inicializador = InicializadorSessao(scraper.session, [base_url], nome='teste',
+                                                    diretorio=tempfile.mkdtemp())
+
+        async def consultar(placas):
+            async with aiohttp.ClientSession(cookie_jar=aiohttp.CookieJar(unsafe=True)) as sessao:
+                return await asyncio.gather(*(scraper.scraping_placa_async(sessao, p) for p in placas))
+
+        _Handler.inicio_posts = []
+        inicio = time.monotonic()
+        resultados = asyncio.run(consultar(['DIR0001', 'DIR0002', 'DIR0003']))
+        assert all(dados and dados['marca'] == 'FIAT' for dados in resultados)
+
+        # Quem carregou a página inicial pausa 0.5s; as outras duas consultam logo
+        primeiros = sorted(_Handler.inicio_posts)[:2]
+        assert primeiros[1] - inicio < 0.4, primeiros
+
+        # Outro asyncio.run: semáforos e locks do loop novo
+        assert asyncio.run(consultar(['DIR0004']))[0]['marca'] == 'FIAT'
+        scraper.close()
+        print("✅ Chamada direta de scraping_placa_async OK")
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    test_scraper_async_servidor_local()
+    test_scraper_async_chamada_direta()
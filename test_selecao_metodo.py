@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Teste da escolha adaptativa de método no scraper híbrido
+"""
+
+import os
+import random
+import subprocess
+import sys
+
+from scraper_hybrid import PlacaFipeScraperHybrid
+from selecao_metodo import SeletorMetodos
+
+
+class _ScraperFalso:
+    def __init__(self, responde):
+        self.responde = responde
+        self.chamadas = 0
+        self.ultimo_status = None
+
+    def scraping_placa(self, placa):
+        self.chamadas += 1
+        self.ultimo_status = 200
+        return {'marca': 'FIAT'} if self.responde else None
+
+
+def test_selecao_metodo():
+    hibrido = PlacaFipeScraperHybrid()
+    hibrido.seletor = SeletorMetodos(aleatorio=random.Random(7))
+    hibrido.scraper_requests = _ScraperFalso(responde=False)
+    hibrido.scraper_alternative = _ScraperFalso(responde=True)
+    hibrido.scraper_selenium = _ScraperFalso(responde=True)
+
+    primeiros = []
+    for i in range(100):
+        assert hibrido.scraping_placa(f"ABC{i:04d}") == {'marca': 'FIAT'}
+        primeiros.append(hibrido._ordem_metodos()[0])
+
+    # Em regime o requests (que sempre falha) raramente é a primeira tentativa
+    assert hibrido.scraper_requests.chamadas < 40
+    assert primeiros[-30:].count("requests") <= 5
+
+    status = hibrido.get_status()["metodos"]
+    print(f"📊 Métodos: {status}")
+    assert status["requests"]["taxa_sucesso"] < status["alternative"]["taxa_sucesso"]
+    assert status["alternative"]["sucessos"] > 0
+    print("✅ Seleção de método OK")
+
+
+
+def test_backends_sob_demanda():
+    """Importar a API e usar o requests não carrega o Selenium"""
+    codigo = (
+        "import sys, app, scraper_hybrid\n"
+        "h = scraper_hybrid.PlacaFipeScraperHybrid()\n"
+        "assert h.get_status()['carregados'] == []\n"
+        "h._scraper_do_metodo('requests')\n"
+        "assert h.get_status()['carregados'] == ['requests']\n"
+        "assert 'selenium' not in sys.modules and 'scraper' not in sys.modules\n"
+        "h.close()\n"
+    )
+    ambiente = dict(os.environ, SCRAPING_WORKER_EMBUTIDO='false', SQLALCHEMY_DATABASE_URI='sqlite://',
+                    SCRAPING_COOKIES_DIR='')
+    resultado = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True,
+                               env=ambiente, cwd=os.path.dirname(os.path.abspath(__file__)))
+    assert resultado.returncode == 0, resultado.stderr
+    print("✅ Backends carregados sob demanda")
+
+
+if __name__ == "__main__":
+    test_selecao_metodo()
+    test_backends_sob_demanda()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Teste do servidor_replay: respostas determinísticas e scrapers apontados para ele
+"""
+
+import requests
+
+from servidor_replay import ServidorReplay, dados_da_placa
+from scraper_requests import PlacaFipeScraperRequests
+from scraper_alternative import PlacaFipeScraperAlternative
+from cookies_sessao import InicializadorSessao
+
+PLACAS = [f"ABC{i:04d}" for i in range(40)]
+
+
+def _resultados(servidor):
+    return [servidor.consultar(placa)[0] for placa in PLACAS]
+
+
+def test_servidor_replay():
+    # Mesma semente, mesmas placas: mesmas respostas (inclusive as rajadas de 403)
+    parametros = dict(taxa_erro=0.1, taxa_nao_encontrada=0.2, rajada_403=(0.05, 3), semente=7)
+    primeira = ServidorReplay(**parametros)
+    segunda = ServidorReplay(**parametros)
+    try:
+        assert _resultados(primeira) == _resultados(segunda)
+        assert primeira.contadores == segunda.contadores
+        assert {'resultado', 'nao_encontrada', '500'} <= set(primeira.contadores)
+    finally:
+        primeira.servidor.server_close()
+        segunda.servidor.server_close()
+
+    with ServidorReplay(taxa_nao_encontrada=0.3, semente=7) as servidor:
+        scraper = PlacaFipeScraperRequests(base_url=servidor.url)
+        scraper.inicializador = InicializadorSessao(scraper.session, [servidor.url], nome='replay',
+                                                    diretorio='')
+        scraper._get_random_delay = lambda: 0
+
+        # Só o formulário sPlaca é aceito, como no site real: o roteador aprende a rota
+        encontradas = 0
+        for placa in PLACAS[:10]:
+            dados = scraper.scraping_placa(placa)
+            if servidor._sorteio('nao_encontrada', placa) < 0.3:
+                assert not dados
+            else:
+                encontradas += 1
+                assert dados['marca'] == dados_da_placa(placa, 7)['Marca']
+                assert dados['ano_modelo'] == dados_da_placa(placa, 7)['Ano Modelo']
+        assert encontradas > 0
+        assert scraper.roteador.vencedora[1] == 'splaca'
+        assert servidor.contadores['pagina_inicial'] == 1  # cookies reaproveitados
+
+        # Alternativo: todos os sites sob a URL local
+        alternativo = PlacaFipeScraperAlternative(base_url=servidor.url)
+        alternativo._get_random_delay = lambda: 0
+        assert all(site['url'].startswith(servidor.url) for site in alternativo.sites)
+        dados = alternativo.scraping_placa('ABC1234')
+        assert dados['fonte_consulta'] == 'gov.br'
+        assert servidor.contadores['site_alternativo'] == 4
+
+        contadores = requests.get(f"{servidor.url}/__replay/contadores", timeout=5).json()
+        assert contadores['requisicoes'] == servidor.contadores['requisicoes']
+        print(f"✅ Servidor replay: {contadores}")
+
+
+if __name__ == "__main__":
+    test_servidor_replay()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Teste do transporte HTTP compartilhado: conexões reaproveitadas entre sessões
+"""
+
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import requests
+import urllib3.util.connection as conexao_urllib3
+
+import transporte_http
+from transporte_http import TransporteHTTP, obter_transporte
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def do_GET(self):
+        corpo = b'ok'
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_transporte_http():
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url = f"http://localhost:{servidor.server_address[1]}/"
+
+    try:
+        transporte = obter_transporte()
+        assert obter_transporte() is transporte
+
+        # Duas sessões (como dois scrapers diferentes), várias placas cada
+        sessao_a = transporte.criar_sessao()
+        sessao_b = transporte.criar_sessao({'User-Agent': 'outro'})
+        for _ in range(3):
+            assert sessao_a.get(url).status_code == 200
+            assert sessao_b.get(url).status_code == 200
+        sessao_a.close()
+        assert sessao_b.get(url).status_code == 200
+
+        pool = transporte.estatisticas()["pools"][f"http://localhost:{servidor.server_address[1]}"]
+        print(f"📊 Pool: {pool}")
+        assert pool["requisicoes"] == 7
+        assert pool["conexoes_abertas"] == 1
+
+        dns = transporte.estatisticas()["dns"]
+        assert dns is None or dns["misses"] >= 1
+        print("✅ Transporte HTTP OK")
+    finally:
+        servidor.shutdown()
+
+
+
+def test_cache_dns_so_no_adaptador():
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url = f"http://localhost:{servidor.server_address[1]}/"
+    disponivel = transporte_http.DNS_CACHE_AVAILABLE
+
+    try:
+        transporte = TransporteHTTP(dns_ttl=60)
+        sessao = transporte.criar_sessao()
+        assert sessao.get(url).status_code == 200
+        assert sessao.get(url).status_code == 200
+        assert transporte.dns.estatisticas()["misses"] == 1
+
+        # Conexão nova (pool fechado) reaproveita a resolução guardada
+        transporte.close()
+        assert sessao.get(url).status_code == 200
+        assert transporte.dns.estatisticas() == {"hits": 1, "misses": 1, "hosts": 1}
+
+        # Fora das sessões do transporte nada passa pelo cache
+        assert requests.get(url).status_code == 200
+        assert transporte.dns.estatisticas()["hits"] == 1
+        assert conexao_urllib3.create_connection.__module__ == 'urllib3.util.connection'
+        print("✅ Cache de DNS restrito ao adaptador")
+
+        # urllib3 sem os recursos da 2.x: adaptador padrão, sem cache
+        transporte_http.DNS_CACHE_AVAILABLE = False
+        transporte = TransporteHTTP(dns_ttl=60)
+        assert transporte.dns is None
+        assert transporte.criar_sessao().get(url).status_code == 200
+        print("✅ Sem cache de DNS fora do urllib3 2.x")
+    finally:
+        transporte_http.DNS_CACHE_AVAILABLE = disponivel
+        servidor.shutdown()
+
+
+def test_status_sem_transporte():
+    """get_status do híbrido sem backend carregado não cria o transporte"""
+    from scraper_hybrid import PlacaFipeScraperHybrid
+
+    anterior = transporte_http._transporte
+    transporte_http._transporte = None
+    try:
+        hibrido = PlacaFipeScraperHybrid()
+        assert hibrido.get_status()["http"] == {}
+        assert transporte_http._transporte is None
+        hibrido.close()
+    finally:
+        transporte_http._transporte = anterior
+    print("✅ Status sem transporte OK")
+
+
+if __name__ == "__main__":
+    test_transporte_http()
+    test_cache_dns_so_no_adaptador()
+    test_status_sem_transporte()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Teste da validação/normalização de placas em lote e do uso em /api/iniciar-scraping
+"""
+
+from app import app, db, HistoricoScraping, ItemFila
+from validacao_placas import formato_valido, normalizar_placa, validar_placas
+
+
+def test_validar_placas():
+    entrada = ['ABC1234', ' abc-1234 ', 'abc1d23', 'ABC1D23', 'AB12345', '', '   ',
+               'ABCD123', 1234567, None, 'XYZ 9A88', 'ABC.1234']
+    resultado = validar_placas(entrada)
+    assert resultado.validas == ['ABC1234', 'ABC1D23', 'XYZ9A88']
+    assert resultado.duplicadas == ['ABC1234', 'ABC1D23', 'ABC1234']
+    assert resultado.motivos() == {'formato': 2, 'vazia': 2, 'tipo_invalido': 2}
+    assert resultado.resumo()['aceitas'] == 3
+
+    # Placas já vistas em lotes anteriores contam como duplicadas
+    vistas = set(resultado.validas)
+    assert validar_placas(['xyz9a88', 'DEF5678'], vistas).validas == ['DEF5678']
+    assert 'DEF5678' in vistas
+
+    assert normalizar_placa('abc12345') == (None, 'tamanho')
+    assert formato_valido('abc1d23') and not formato_valido('ABC-1234')
+    print("✅ Validação em lote OK")
+
+
+def test_iniciar_scraping_valida_antes_de_enfileirar():
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+    cliente = app.test_client()
+    resposta = cliente.post('/api/iniciar-scraping', json={'placas': ['lixo', 'abc-1234', 'ABC1234', 'DEF5G78']})
+    dados = resposta.get_json()
+    assert dados['status'] == 'sucesso'
+    assert dados['validacao']['aceitas'] == 2
+    assert dados['validacao']['duplicadas'] == 1
+    assert dados['validacao']['rejeitadas'] == 1
+
+    with app.app_context():
+        historico = db.session.get(HistoricoScraping, dados['historico_id'])
+        assert historico.total_placas == 2
+        assert [i.placa for i in ItemFila.query.order_by(ItemFila.id)] == ['ABC1234', 'DEF5G78']
+
+    dados = cliente.post('/api/iniciar-scraping', json={'placas': ['lixo', '']}).get_json()
+    assert dados['status'] == 'erro' and dados['validacao']['rejeitadas'] == 2
+    print("✅ /api/iniciar-scraping só enfileira placas válidas")
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Teste da fila de scraping e do worker com um banco SQLite temporário
+"""
+
+import time
+from datetime import timedelta
+
+from sqlalchemy import select
+
+from app import app, db, Placa, HistoricoScraping, ItemFila, get_current_time_gmt3
+from worker import WorkerScraping
+
+
+class _ScraperFalso:
+    """Retorna dados fixos, sem rede; 'SEM0000' não tem dados"""
+
+    def __init__(self):
+        self.consultadas = []
+
+    def scraping_placa(self, placa):
+        self.consultadas.append(placa)
+        if placa == 'SEM0000':
+            return None
+        return {'marca': 'FIAT', 'modelo': 'UNO', 'uf': 'MG'}
+
+
+def _criar_job(placas):
+    historico = HistoricoScraping(total_placas=len(placas))
+    db.session.add(historico)
+    db.session.flush()
+    db.session.add_all([ItemFila(historico_id=historico.id, placa=p) for p in placas])
+    db.session.commit()
+    return historico.id
+
+
+def test_worker_processa_fila_e_retoma_lease_vencido():
+    """Processa a fila em ordem e reaproveita itens de um worker que morreu"""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        historico_id = _criar_job(['AAA0001', 'SEM0000', 'AAA0002'])
+
+        # Simula um worker que reservou o primeiro item e morreu
+        primeiro = ItemFila.query.order_by(ItemFila.id).first()
+        primeiro.status = 'em_execucao'
+        primeiro.worker_id = 'morto'
+        primeiro.lease_ate = get_current_time_gmt3() - timedelta(minutes=5)
+        db.session.commit()
+
+    scraper = _ScraperFalso()
+    worker = WorkerScraping(worker_id='teste', scraper=scraper, lease_segundos=30)
+    worker.executar(sair_quando_ocioso=True)
+
+    with app.app_context():
+        assert scraper.consultadas == ['AAA0001', 'SEM0000', 'AAA0002']
+        status = [i.status for i in ItemFila.query.order_by(ItemFila.id)]
+        assert status == ['concluido', 'sem_dados', 'concluido']
+
+        historico = db.session.get(HistoricoScraping, historico_id)
+        assert historico.status == 'concluido'
+        assert historico.placas_processadas == 2
+        assert Placa.query.filter_by(placa='AAA0002').one().marca == 'FIAT'
+        print("✅ Fila processada e lease vencido retomado")
+
+
+def test_worker_ignora_historico_parado():
+    """Itens de um job parado continuam na fila, mas não são reservados"""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        historico_id = _criar_job(['BBB0001'])
+        db.session.get(HistoricoScraping, historico_id).status = 'parado'
+        db.session.commit()
+
+    scraper = _ScraperFalso()
+    WorkerScraping(worker_id='teste', scraper=scraper).executar(sair_quando_ocioso=True)
+
+    with app.app_context():
+        assert scraper.consultadas == []
+        assert ItemFila.query.one().status == 'pendente'
+        print("✅ Job parado não foi processado")
+
+
+def test_worker_usa_dados_frescos_sem_scraping():
+    """Placas com scraping recente vêm do banco; repetidas vêm da memória"""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        db.session.add(Placa(placa='CCC0001', marca='VW', modelo='GOL', status='atualizado'))
+        db.session.add(Placa(placa='CCC0002', status='pendente'))
+        db.session.commit()
+        _criar_job(['CCC0001', 'CCC0002', 'CCC0001'])
+
+    scraper = _ScraperFalso()
+    worker = WorkerScraping(worker_id='teste', scraper=scraper)
+    worker.executar(sair_quando_ocioso=True)
+
+    with app.app_context():
+        # Só a linha 'pendente' (sem scraping) foi à rede
+        assert scraper.consultadas == ['CCC0002']
+        stats = worker.cache.estatisticas()
+        assert (stats['hits_banco'], stats['hits_memoria'], stats['misses']) == (1, 1, 1)
+        assert Placa.query.filter_by(placa='CCC0001').one().marca == 'VW'
+        print(f"✅ Cache evitou {stats['hits_banco'] + stats['hits_memoria']} consultas")
+
+
+
+def test_worker_grava_lote_com_upsert():
+    """Placas novas e existentes são gravadas no mesmo lote; estimativas não sobrescrevem dados reais"""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+
+        antiga = get_current_time_gmt3() - timedelta(days=30)
+        db.session.add(Placa(placa='DDD0001', marca='GM', ano='2010', data_scraping=antiga))
+        db.session.add(Placa(placa='DDD0002', marca='GM', ano='2011', data_scraping=antiga))
+        db.session.commit()
+        historico_id = _criar_job(['DDD0001', 'DDD0002', 'DDD0003'])
+
+    class _ScraperMisto(_ScraperFalso):
+        def scraping_placa(self, placa):
+            self.consultadas.append(placa)
+            if placa == 'DDD0002':
+                # Retorno do método genérico do scraper alternativo
+                return {'status': 'formato_antigo', 'formato_placa': 'antigo', 'ano_estimado': '2000-2018'}
+            return {'marca': 'FIAT', 'modelo': 'UNO', 'uf': 'MG'}
+
+    worker = WorkerScraping(worker_id='teste', scraper=_ScraperMisto(), tamanho_lote=10)
+    worker.executar(sair_quando_ocioso=True)
+
+    with app.app_context():
+        assert worker.gravador.lotes_gravados == 1
+        atualizada = Placa.query.filter_by(placa='DDD0001').one()
+        assert (atualizada.marca, atualizada.status) == ('FIAT', 'atualizado')
+        assert atualizada.data_scraping > antiga.replace(tzinfo=None)
+        estimada = Placa.query.filter_by(placa='DDD0002').one()
+        assert (estimada.ano, estimada.status) == (2011, 'atualizado')
+        assert Placa.query.filter_by(placa='DDD0003').one().marca == 'FIAT'
+        assert db.session.get(HistoricoScraping, historico_id).placas_processadas == 3
+        print("✅ Lote gravado com um upsert")
+
+
+def test_worker_grava_lote_vencido_durante_scraping_lento():
+    """O heartbeat grava o lote que venceu por tempo enquanto o scraping seguinte demora"""
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+        _criar_job(['LEN0001', 'LEN0002'])
+        primeiro = ItemFila.query.order_by(ItemFila.id).first().id
+
+    class _ScraperLento(_ScraperFalso):
+        def __init__(self):
+            super().__init__()
+            self.status_primeiro = None
+
+        def scraping_placa(self, placa):
+            if placa == 'LEN0002':
+                # Espera (até 3s) o primeiro item ser gravado por outra thread
+                limite = time.monotonic() + 3
+                while time.monotonic() < limite and self.status_primeiro != 'concluido':
+                    time.sleep(0.05)
+                    with db.engine.connect() as conexao:
+                        self.status_primeiro = conexao.execute(
+                            select(ItemFila.status).where(ItemFila.id == primeiro)).scalar()
+            return super().scraping_placa(placa)
+
+    scraper = _ScraperLento()
+    worker = WorkerScraping(worker_id='teste', scraper=scraper, lease_segundos=30,
+                            tamanho_lote=50, intervalo_lote=0.2)
+    worker.executar(sair_quando_ocioso=True)
+
+    with app.app_context():
+        assert scraper.status_primeiro == 'concluido'
+        assert worker.gravador.lotes_gravados == 2
+        assert [i.status for i in ItemFila.query.order_by(ItemFila.id)] == ['concluido', 'concluido']
+        print("✅ Lote vencido gravado durante um scraping lento")
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Transporte HTTP compartilhado pelos scrapers baseados em requests
+
+Todas as sessões criadas aqui montam o mesmo HTTPAdapter: um pool de conexões
+keep-alive por host, reaproveitado entre placas e entre classes de scraper
+(cada scraper continua com seus próprios cookies). Também concentra os
+timeouts padrão (conexão, leitura), um cache de DNS com TTL e as métricas
+dos pools.
+
+Configuração (variáveis de ambiente):
+    HTTP_POOL_HOSTS        hosts com pool mantido (10)
+    HTTP_POOL_POR_HOST     conexões mantidas por host (10)
+    HTTP_TIMEOUT_CONEXAO   segundos para abrir a conexão (5)
+    HTTP_TIMEOUT_LEITURA   segundos entre bytes recebidos (25)
+    HTTP_DNS_TTL           segundos de validade do cache de DNS (300; 0 desliga)
+
+O cache de DNS troca o _new_conn das conexões do urllib3 2.x (_dns_host,
+NameResolutionError); com outra versão, o adaptador fica sem ele.
+"""
+
+import os
+import socket
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+import urllib3.util.connection as conexao_urllib3
+
+try:
+    # Só no urllib3 2.x
+    from urllib3.exceptions import NameResolutionError
+    DNS_CACHE_AVAILABLE = True
+except ImportError:
+    DNS_CACHE_AVAILABLE = False
+
+# Cabeçalhos de navegador comuns aos scrapers
+HEADERS_NAVEGADOR = {
+    'User-Agent': 'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
+    'Accept-Language': 'pt-BR,pt;q=0.9,en;q=0.8',
+    'Accept-Encoding': 'gzip, deflate, br',
+    'DNT': '1',
+    'Connection': 'keep-alive',
+    'Upgrade-Insecure-Requests': '1',
+    'Sec-Fetch-Dest': 'document',
+    'Sec-Fetch-Mode': 'navigate',
+    'Sec-Fetch-Site': 'none',
+    'Sec-Fetch-User': '?1',
+    'Cache-Control': 'max-age=0',
+}
+
+
+class CacheDNS:
+    """Resoluções de nomes com TTL, usadas na abertura das conexões do AdaptadorHTTP"""
+
+    def __init__(self, ttl: float = 300):
+        self.ttl = ttl
+        self._entradas: Dict[Tuple[str, int], Tuple[float, List[tuple]]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def resolver(self, host: str, porta: int) -> List[tuple]:
+        """Endereços (família, sockaddr) do host, do cache se ainda válidos"""
+        chave = (host, porta)
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada and entrada[0] > time.monotonic():
+                self.hits += 1
+                return entrada[1]
+
+        enderecos = [(familia, sockaddr) for familia, _, _, _, sockaddr in socket.getaddrinfo(
+            host, porta, conexao_urllib3.allowed_gai_family(), socket.SOCK_STREAM)]
+        with self._lock:
+            self.misses += 1
+            self._entradas[chave] = (time.monotonic() + self.ttl, enderecos)
+        return enderecos
+
+    def invalidar(self, host: str, porta: int):
+        with self._lock:
+            self._entradas.pop((host, porta), None)
+
+    def estatisticas(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "hosts": len(self._entradas)}
+
+
+class _ConexaoComCacheDNS:
+    """Conexão do urllib3 que abre o socket pelos endereços do cache de DNS (atributo dns)
+
+    Cada endereço é tentado com o _new_conn original; o nome do host continua
+    valendo para o SNI e a verificação do certificado.
+    """
+
+    dns: CacheDNS = None
+
+    def _new_conn(self):
+        host, porta = self._dns_host, self.port
+        try:
+            enderecos = self.dns.resolver(host, porta)
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+
+        erro = None
+        for _, sockaddr in enderecos:
+            self._dns_host = sockaddr[0]
+            try:
+                return super()._new_conn()
+            except (ConnectTimeoutError, NewConnectionError) as e:
+                erro = e
+            finally:
+                self._dns_host = host
+        # Nenhum endereço respondeu: resolve de novo na próxima tentativa
+        self.dns.invalidar(host, porta)
+        if erro is None:
+            raise NameResolutionError(self.host, self, socket.gaierror(f"Nenhum endereço para {host}"))
+        raise erro
+
+
+def _pools_com_dns(dns: CacheDNS) -> Dict[str, type]:
+    """Classes de pool (http/https) cujas conexões usam o cache `dns`"""
+    conexao_http = type('ConexaoHTTP', (_ConexaoComCacheDNS, HTTPConnection), {'dns': dns})
+    conexao_https = type('ConexaoHTTPS', (_ConexaoComCacheDNS, HTTPSConnection), {'dns': dns})
+    return {
+        'http': type('PoolHTTP', (HTTPConnectionPool,), {'ConnectionCls': conexao_http}),
+        'https': type('PoolHTTPS', (HTTPSConnectionPool,), {'ConnectionCls': conexao_https}),
+    }
+
+
+class AdaptadorHTTP(HTTPAdapter):
+    """HTTPAdapter cujas conexões resolvem nomes pelo cache de DNS dele
+
+    O cache vale só para as sessões que montam este adaptador; o resto do
+    processo (outras bibliotecas, requests.get avulso) resolve normalmente.
+    """
+
+    __attrs__ = HTTPAdapter.__attrs__ + ['dns']
+
+    def __init__(self, dns: Optional[CacheDNS] = None, **kwargs):
+        self.dns = dns
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        if self.dns is not None:
+            self.poolmanager.pool_classes_by_scheme = _pools_com_dns(self.dns)
+
+
+class Sessao(requests.Session):
+    """requests.Session com timeout padrão do transporte"""
+
+    def __init__(self, timeout: Tuple[float, float]):
+        super().__init__()
+        self.timeout_padrao = timeout
+
+    def request(self, method, url, **kwargs):
+        if kwargs.get('timeout') is None:
+            kwargs['timeout'] = self.timeout_padrao
+        return super().request(method, url, **kwargs)
+
+    def close(self):
+        # O adaptador é compartilhado: fechar uma sessão não derruba as conexões das outras
+        pass
+
+
+class TransporteHTTP:
+    """Pool de conexões e configurações HTTP compartilhados"""
+
+    def __init__(self, hosts: Optional[int] = None, conexoes_por_host: Optional[int] = None,
+                 timeout_conexao: Optional[float] = None, timeout_leitura: Optional[float] = None,
+                 dns_ttl: Optional[float] = None):
+        """
+        Args:
+            hosts: quantos hosts mantêm pool aberto (HTTP_POOL_HOSTS)
+            conexoes_por_host: conexões keep-alive mantidas por host (HTTP_POOL_POR_HOST)
+            timeout_conexao, timeout_leitura: timeouts padrão das sessões, em segundos
+            dns_ttl: validade do cache de DNS em segundos; 0 desliga
+        """
+        self.hosts = hosts or int(os.getenv('HTTP_POOL_HOSTS', 10))
+        self.conexoes_por_host = conexoes_por_host or int(os.getenv('HTTP_POOL_POR_HOST', 10))
+        self.timeout = (
+            timeout_conexao or float(os.getenv('HTTP_TIMEOUT_CONEXAO', 5)),
+            timeout_leitura or float(os.getenv('HTTP_TIMEOUT_LEITURA', 25)),
+        )
+        if dns_ttl is None:
+            dns_ttl = float(os.getenv('HTTP_DNS_TTL', 300))
+        if dns_ttl > 0 and not DNS_CACHE_AVAILABLE:
+            print("⚠️  urllib3 sem suporte ao cache de DNS (precisa da 2.x): resolvendo a cada conexão")
+            dns_ttl = 0
+
+        self.dns = CacheDNS(dns_ttl) if dns_ttl > 0 else None
+        # pool_block=False: acima do limite abre conexão extra em vez de esperar
+        self.adaptador = AdaptadorHTTP(dns=self.dns, pool_connections=self.hosts,
+                                       pool_maxsize=self.conexoes_por_host, pool_block=False)
+        self.sessoes_criadas = 0
+
+    def criar_sessao(self, headers: Optional[Dict[str, str]] = None) -> Sessao:
+        """Nova sessão (cookies próprios) sobre o pool compartilhado"""
+        sessao = Sessao(self.timeout)
+        sessao.mount('https://', self.adaptador)
+        sessao.mount('http://', self.adaptador)
+        sessao.headers.update(HEADERS_NAVEGADOR)
+        if headers:
+            sessao.headers.update(headers)
+        self.sessoes_criadas += 1
+        return sessao
+
+    def estatisticas(self) -> Dict:
+        """Conexões por host (abertas no total, ociosas no pool, requisições feitas) e cache de DNS"""
+        pools = {}
+        gerenciador = self.adaptador.poolmanager
+        for chave in list(gerenciador.pools.keys()):
+            pool = gerenciador.pools.get(chave)
+            if pool is None:
+                continue
+            pools[f"{pool.scheme}://{pool.host}:{pool.port}"] = {
+                "conexoes_abertas": pool.num_connections,
+                "ociosas": pool.pool.qsize() if pool.pool else 0,
+                "maximo": self.conexoes_por_host,
+                "requisicoes": pool.num_requests,
+            }
+        return {
+            "pools": pools,
+            "sessoes": self.sessoes_criadas,
+            "timeout": list(self.timeout),
+            "dns": self.dns.estatisticas() if self.dns else None,
+        }
+
+    def close(self):
+        """Fecha todas as conexões do pool"""
+        self.adaptador.close()
+
+
+_transporte: Optional[TransporteHTTP] = None
+_transporte_lock = threading.Lock()
+def obter_transporte() -> TransporteHTTP:
+    """Transporte único do processo (criado na primeira chamada)"""
+    global _transporte
+    with _transporte_lock:
+        if _transporte is None:
+            _transporte = TransporteHTTP()
+        return _transporte
+
+
+def estatisticas_transporte() -> Optional[Dict]:
+    """Estatísticas do transporte do processo, sem criá-lo (None se nenhum scraper o usou)"""
+    transporte = _transporte
+    return transporte.estatisticas() if transporte else None
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Worker de scraping fora do processo Flask
+
+Reserva placas da tabela item_fila com lease (prazo de posse renovado por
+heartbeat), faz o scraping e grava em Placa/HistoricoScraping. Vários workers,
+em uma ou mais máquinas, podem rodar contra o mesmo banco: um item só é
+processado por quem tem o lease válido, e itens de um worker que morreu voltam
+para a fila quando o lease expira.
+
+Uso:
+    python worker.py [--id NOME] [--lease 120] [--sair-quando-ocioso]
+"""
+
+import argparse
+import os
+import socket
+import threading
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+from sqlalchemy import and_, or_, update
+
+from app import app, db, HistoricoScraping, ItemFila, busca_placas, buscar_placa_fresca, get_current_time_gmt3
+from cache_placas import CacheConsultaPlacas
+from persistencia import GravadorLotes
+from rate_controller import ControladorTaxa
+
+
+class WorkerScraping:
+    """Consome a fila de placas do banco"""
+
+    def __init__(self, worker_id=None, scraper=None, controlador_taxa=None,
+                 lease_segundos=120, max_tentativas=3, intervalo_ocioso=5.0,
+                 tamanho_lote=50, intervalo_lote=5.0):
+        """
+        Args:
+            worker_id: identificador gravado nos itens reservados (padrão: host-pid-aleatório)
+            scraper: objeto com scraping_placa(placa); padrão: PlacaFipeScraperHybrid
+            controlador_taxa: ControladorTaxa usado pelo scraper padrão
+            lease_segundos: duração do lease; o heartbeat renova a cada um terço
+            max_tentativas: reservas de um item antes de marcá-lo como erro
+            intervalo_ocioso: pausa entre consultas à fila quando ela está vazia
+            tamanho_lote, intervalo_lote: resultados ou segundos que disparam a gravação em lote
+        """
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.scraper = scraper
+        self.controlador_taxa = controlador_taxa
+        self.lease = timedelta(seconds=lease_segundos)
+        self.max_tentativas = max_tentativas
+        self.intervalo_ocioso = intervalo_ocioso
+
+        self.cache = None
+        self.gravador = GravadorLotes(self.worker_id, tamanho_lote=tamanho_lote,
+                                      intervalo_max=intervalo_lote)
+        self.parar = threading.Event()
+        self._lock_lote = threading.Lock()  # o heartbeat também grava o lote vencido por tempo
+        self.thread = None
+        self._item_atual = None
+
+    def _obter_scraper(self):
+        """Cria o scraper (atrás do cache) na primeira placa e o reaproveita nas seguintes"""
+        if self.scraper is None:
+            from scraper_hybrid import PlacaFipeScraperHybrid
+
+            print("🔧 Inicializando scraper...")
+            if self.controlador_taxa is None:
+                self.controlador_taxa = ControladorTaxa.do_ambiente()
+            self.scraper = PlacaFipeScraperHybrid(controlador_taxa=self.controlador_taxa)
+            print("✅ Scraper inicializado com sucesso")
+        if self.cache is None:
+            self.cache = CacheConsultaPlacas(self.scraper, buscar_placa_fresca)
+        return self.cache
+
+    def _condicao_livre(self, agora):
+        """Itens pendentes ou com lease vencido"""
+        return or_(
+            ItemFila.status == 'pendente',
+            and_(ItemFila.status == 'em_execucao', ItemFila.lease_ate < agora)
+        )
+
+    def reservar(self):
+        """Reserva o próximo item livre (na ordem de entrada) e o retorna, ou None"""
+        agora = get_current_time_gmt3()
+        candidatos = db.session.query(ItemFila.id).join(
+            HistoricoScraping, HistoricoScraping.id == ItemFila.historico_id
+        ).filter(
+            HistoricoScraping.status == 'em_andamento',
+            self._condicao_livre(agora)
+        ).order_by(ItemFila.id).limit(10).all()
+
+        for (item_id,) in candidatos:
+            # UPDATE condicional: só um worker consegue mudar a linha
+            resultado = db.session.execute(
+                update(ItemFila)
+                .where(ItemFila.id == item_id, self._condicao_livre(agora))
+                .values(status='em_execucao', worker_id=self.worker_id,
+                        lease_ate=agora + self.lease, tentativas=ItemFila.tentativas + 1,
+                        atualizado_em=agora)
+            )
+            db.session.commit()
+            if resultado.rowcount == 1:
+                return db.session.get(ItemFila, item_id)
+
+        db.session.rollback()
+        return None
+
+    def _heartbeat(self):
+        """
+        Renova o lease do item em processamento e dos que aguardam gravação
+
+        Também grava o lote que venceu por tempo enquanto o loop principal está
+        preso num scraping lento.
+        """
+        intervalo = self.lease.total_seconds() / 3
+        renovar_em = time.monotonic() + intervalo
+        while True:
+            # Acorda a tempo do vencimento do lote (ou de um lote que comece durante a espera)
+            restante = self.gravador.tempo_restante()
+            espera = min(renovar_em - time.monotonic(),
+                         self.gravador.intervalo_max if restante is None else restante)
+            if self.parar.wait(max(0.0, espera)):
+                break
+
+            if self.gravador.precisa_descarregar():
+                try:
+                    with app.app_context():
+                        self.descarregar()
+                except Exception as e:
+                    print(f"⚠️  Erro ao gravar o lote vencido no heartbeat: {e}")
+            if time.monotonic() < renovar_em:
+                continue
+            renovar_em = time.monotonic() + intervalo
+
+            with self._lock_lote:
+                ids = self.gravador.itens_pendentes
+            if self._item_atual is not None:
+                ids.append(self._item_atual)
+            if not ids:
+                continue
+            try:
+                with app.app_context():
+                    agora = get_current_time_gmt3()
+                    with db.engine.begin() as conexao:
+                        conexao.execute(
+                            update(ItemFila)
+                            .where(ItemFila.id.in_(ids), ItemFila.worker_id == self.worker_id)
+                            .values(lease_ate=agora + self.lease, atualizado_em=agora)
+                        )
+            except Exception as e:
+                print(f"⚠️  Erro no heartbeat dos itens {ids}: {e}")
+
+    def _finalizar_item(self, item, status):
+        """Fecha o item, se o lease ainda for deste worker; retorna se conseguiu"""
+        resultado = db.session.execute(
+            update(ItemFila)
+            .where(ItemFila.id == item.id, ItemFila.worker_id == self.worker_id,
+                   ItemFila.status == 'em_execucao')
+            .values(status=status, lease_ate=None, atualizado_em=get_current_time_gmt3())
+        )
+        return resultado.rowcount == 1
+
+    def _finalizar_historico_se_concluido(self, historico_id):
+        """Marca o histórico como concluído quando não sobra item aberto"""
+        abertos = ItemFila.query.filter(
+            ItemFila.historico_id == historico_id,
+            ItemFila.status.in_(['pendente', 'em_execucao'])
+        ).count()
+        if abertos == 0:
+            HistoricoScraping.query.filter_by(id=historico_id, status='em_andamento').update(
+                {'status': 'concluido', 'data_fim': get_current_time_gmt3()}
+            )
+            db.session.commit()
+            historico = db.session.get(HistoricoScraping, historico_id)
+            print(f"📊 Histórico finalizado: {historico.placas_processadas}/{historico.total_placas} placas processadas")
+            if self.cache:
+                print(f"⚡ Cache: {self.cache.estatisticas()}")
+
+    def processar(self, item):
+        """Faz o scraping de um item reservado e grava o resultado"""
+        placa = item.placa
+        print(f"\n🚗 Processando placa {placa} (item {item.id}, tentativa {item.tentativas})")
+        self._item_atual = item.id
+
+        try:
+            print(f"   🔍 Fazendo scraping de {placa}...")
+            dados = self._obter_scraper().scraping_placa(placa)
+
+            if dados:
+                print(f"   ✅ Dados obtidos para {placa}: {len(dados)} campos")
+                # Dados vindos do cache já estão no banco: só o item é fechado
+                novos = dados if self.cache.ultima_origem == 'rede' else None
+                with self._lock_lote:
+                    self.gravador.adicionar(item.id, item.historico_id, 'concluido', placa, novos)
+            else:
+                print(f"   ⚠️  Nenhum dado obtido para {placa}")
+                with self._lock_lote:
+                    self.gravador.adicionar(item.id, item.historico_id, 'sem_dados')
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"   ❌ Erro ao processar placa {placa}: {str(e)}")
+            traceback.print_exc()
+            # Devolve para a fila ou desiste após max_tentativas
+            status = 'erro' if item.tentativas >= self.max_tentativas else 'pendente'
+            self._finalizar_item(item, status)
+            db.session.commit()
+        finally:
+            self._item_atual = None
+
+    def descarregar(self):
+        """Grava o lote acumulado e fecha os históricos que terminaram"""
+        with self._lock_lote:
+            try:
+                historicos = self.gravador.descarregar()
+            except Exception as e:
+                # Os itens continuam reservados; voltam para a fila quando o lease vencer
+                print(f"❌ Erro ao gravar lote: {e}")
+                traceback.print_exc()
+                self.gravador.descartar()
+                return
+
+        for historico_id in historicos:
+            self._finalizar_historico_se_concluido(historico_id)
+
+    def executar(self, sair_quando_ocioso=False):
+        """Loop principal: reserva e processa itens até parar"""
+        print(f"👷 Worker {self.worker_id} iniciado")
+        heartbeat = threading.Thread(target=self._heartbeat, daemon=True)
+        heartbeat.start()
+
+        with app.app_context():
+            try:
+                while not self.parar.is_set():
+                    try:
+                        item = self.reservar()
+                    except Exception as e:
+                        db.session.rollback()
+                        print(f"❌ Erro ao consultar a fila: {e}")
+                        item = None
+
+                    if item is None:
+                        self.descarregar()
+                        if sair_quando_ocioso:
+                            break
+                        self.parar.wait(self.intervalo_ocioso)
+                        continue
+
+                    self.processar(item)
+                    if self.gravador.precisa_descarregar():
+                        self.descarregar()
+            finally:
+                self.descarregar()
+                self.parar.set()
+                db.session.remove()
+                print(f"🏁 Worker {self.worker_id} finalizado")
+
+    def close(self):
+        """Para o loop e fecha o scraper"""
+        self.parar.set()
+        if self.cache is not None:
+            self.cache.close()
+        elif self.scraper is not None and hasattr(self.scraper, 'close'):
+            self.scraper.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Worker de scraping de placas")
+    parser.add_argument('--id', help="Identificador do worker (padrão: host-pid)")
+    parser.add_argument('--lease', type=int, default=120, help="Duração do lease em segundos")
+    parser.add_argument('--max-tentativas', type=int, default=3)
+    parser.add_argument('--sair-quando-ocioso', action='store_true',
+                        help="Encerra quando a fila estiver vazia")
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.create_all()
+        busca_placas.criar_indice()
+
+    worker = WorkerScraping(worker_id=args.id, lease_segundos=args.lease,
+                            max_tentativas=args.max_tentativas)
+    try:
+        worker.executar(sair_quando_ocioso=args.sair_quando_ocioso)
+    except KeyboardInterrupt:
+        print("\n👋 Worker parado pelo usuário")
+    finally:
+        worker.close()
+
+
+if __name__ == "__main__":
+    main()